@@ -0,0 +1,85 @@
+"""Compare one commit per food entry with the bulk ingestion path.
+
+Usage:
+    python -m benchmarks.bench_bulk_insert [--entries 500 --days 7 --runs 3]
+
+Runs against a throwaway SQLite database and prints a JSON document with
+timings for NutritionDatabase.add_food_entry in a loop and for
+NutritionDatabase.add_food_entries with the same items.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def make_items(count, days):
+    today = date.today()
+    return [{
+        'food_description': f'Benchmark food {i}',
+        'calories': 100 + i % 400,
+        'protein': 10.0,
+        'carbs': 20.0,
+        'fat': 5.0,
+        'meal_type': ('breakfast', 'lunch', 'dinner', 'snack')[i % 4],
+        'date_logged': (today - timedelta(days=i % days)).strftime('%Y-%m-%d')
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=500)
+    parser.add_argument('--days', type=int, default=7, help='Spread entries over this many days')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app creates its database (AUTO_INIT_DB) and log directory
+        os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", AUTO_INIT_DB='true')
+        os.chdir(tmp)
+        # Keep the app's startup messages out of the JSON on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            from app import create_app
+            app = create_app()
+        from models import User
+        from utils.nutrition_db import NutritionDatabase, parse_food_item
+
+        items = make_items(args.entries, args.days)
+        single, bulk = [], []
+        with app.app_context():
+            user_id = User.query.first().id
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                for item in items:
+                    NutritionDatabase.add_food_entry(user_id, parse_food_item(item))
+                single.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                created, errors = NutritionDatabase.add_food_entries(user_id, items)
+                bulk.append(time.perf_counter() - start)
+                assert len(created) == len(items) and not errors
+
+        single_avg = sum(single) / len(single)
+        bulk_avg = sum(bulk) / len(bulk)
+        results = {
+            'benchmark': 'bulk_insert',
+            'entries': args.entries,
+            'days': args.days,
+            'runs': args.runs,
+            'per_entry_commit': {'min_seconds': round(min(single), 4), 'avg_seconds': round(single_avg, 4)},
+            'bulk': {'min_seconds': round(min(bulk), 4), 'avg_seconds': round(bulk_avg, 4)},
+            'speedup': round(single_avg / bulk_avg, 1) if bulk_avg else None
+        }
+        os.chdir(ROOT)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+"""Time the hot endpoints against a seeded synthetic dataset.
+
+Usage:
+    python -m benchmarks.bench_endpoints [--users 200 --days 90 --entries-per-day 4 --runs 5]
+                                         [--only dashboard stats_overview_30d ...] [--warm]
+                                         [--output results.json] [--compare baseline.json]
+
+Seeds a throwaway SQLite database with benchmarks.datagen, starts the stub
+OpenRouter server for the AI endpoints and requests each endpoint through
+the Flask test client as the first generated user (admin pages as the
+default admin). For every endpoint the JSON document on stdout has wall
+time (min/avg/p95), SQL statements, response size and peak Python memory
+of one extra run under tracemalloc. Per-worker response caches are cleared
+before each run unless --warm is given. With --compare, endpoints more than
+--threshold times slower than the baseline file, or issuing more
+statements, are listed under "regressions".
+"""
+import io
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+from datetime import date
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks import datagen, stub_openrouter
+
+ADMIN_LOGIN = ('admin@example.com', 'admin123')
+
+
+def endpoints():
+    """name -> (client role, method, path)"""
+    today = date.today().isoformat()
+    return {
+        'dashboard': ('user', 'GET', '/dashboard'),
+        'nutrition_data': ('user', 'GET', f'/api/nutrition_data/{today}'),
+        'weekly_nutrition': ('user', 'GET', '/api/weekly_nutrition'),
+        'stats_overview_30d': ('user', 'GET', '/stats/api/overview?days=30'),
+        'stats_overview_365d': ('user', 'GET', '/stats/api/overview?days=365'),
+        'stats_goal_progress': ('user', 'GET', '/stats/api/goal-progress'),
+        'stats_nutrition_trends': ('user', 'GET', '/stats/api/nutrition-trends?days=30'),
+        'stats_macro_distribution': ('user', 'GET', '/stats/api/macro-distribution?days=30'),
+        'stats_food_categories': ('user', 'GET', '/stats/api/food-categories?days=30'),
+        'stats_goal_achievement': ('user', 'GET', '/stats/api/goal-achievement?days=30'),
+        'stats_weekly_summary': ('user', 'GET', '/stats/api/weekly-summary'),
+        'stats_period_summary': ('user', 'GET', '/stats/api/period-summary?period=month&periods=6'),
+        'export_csv': ('user', 'GET', '/auth/export/csv'),
+        'export_json': ('user', 'GET', '/auth/export/json'),
+        'export_jsonl': ('user', 'GET', '/auth/export/jsonl?mode=entries'),
+        'export_columnar': ('user', 'GET', '/auth/export/columnar'),
+        'admin_dashboard': ('admin', 'GET', '/admin/dashboard'),
+        'admin_dashboard_search': ('admin', 'GET', '/admin/dashboard?q=bench00&sort=last_login'),
+        'admin_analytics': ('admin', 'GET', '/admin/analytics/data?days=90'),
+        'generate_tip': ('user', 'GET', '/api/generate_tip'),
+        'analyze_food_image': ('user', 'POST', '/api/analyze_food_image'),
+    }
+
+
+def food_photo():
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', (1600, 1200), (230, 225, 210))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((300, 200, 1300, 1000), fill=(250, 250, 245))
+    draw.ellipse((500, 400, 900, 750), fill=(190, 120, 60))
+    draw.rectangle((850, 450, 1150, 800), fill=(60, 150, 60))
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def clear_response_caches():
+    from utils import stats_cache, dashboard
+    with stats_cache._cache_lock:
+        stats_cache._cache.clear()
+    with dashboard._cache_lock:
+        dashboard._cache.clear()
+
+
+def measure(request, runs, statements, warm):
+    """Run request() `runs` times plus once under tracemalloc"""
+    timings = []
+    for _ in range(runs):
+        if not warm:
+            clear_response_caches()
+        statements.clear()
+        start = time.perf_counter()
+        response = request()
+        body = response.get_data()  # drains streamed exports
+        timings.append(time.perf_counter() - start)
+    count = len(statements)
+
+    if not warm:
+        clear_response_caches()
+    tracemalloc.start()
+    request().get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'min_ms': round(timings[0] * 1000, 2),
+        'avg_ms': round(sum(timings) / len(timings) * 1000, 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+        'statements': count,
+        'response_bytes': len(body),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        ratio = current['avg_ms'] / before['avg_ms'] if before['avg_ms'] else None
+        if (ratio and ratio > threshold) or current['statements'] > before['statements']:
+            regressions.append({
+                'endpoint': name,
+                'avg_ms': [before['avg_ms'], current['avg_ms']],
+                'statements': [before['statements'], current['statements']],
+                'slowdown': round(ratio, 2) if ratio else None
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--entries-per-day', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--only', nargs='+', metavar='ENDPOINT', help='Only run these endpoints')
+    parser.add_argument('--warm', action='store_true', help='Keep per-worker response caches between runs')
+    parser.add_argument('--openrouter-latency', type=float, default=0.0, help='Seconds the stub waits per call')
+    parser.add_argument('--output', help='Also write the results to this file')
+    parser.add_argument('--compare', help='Baseline results file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    # The app is imported from a temporary working directory
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    selected = endpoints()
+    if args.only:
+        unknown = set(args.only) - set(selected)
+        if unknown:
+            parser.error(f'unknown endpoints: {", ".join(sorted(unknown))}')
+        selected = {name: selected[name] for name in args.only}
+
+    stub, stub_url = stub_openrouter.start(args.openrouter_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app creates its database (AUTO_INIT_DB) and log directory
+        os.environ.update({
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            'AUTO_INIT_DB': 'true',
+            'ANALYSIS_STORE_PATH': os.path.join(tmp, 'analysis_cache.db'),
+            'IMAGE_CACHE_ENABLED': 'false',  # every analysis should reach the stub
+            'OPENROUTER_API_KEY': os.environ.get('OPENROUTER_API_KEY') or 'benchmark',
+            'OPENROUTER_API_URL': stub_url,
+        })
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(sys.stderr):
+            from app import create_app
+            app = create_app()
+        from sqlalchemy import event
+        from models import db
+
+        app.config.update(WTF_CSRF_ENABLED=False, UPLOAD_FOLDER=os.path.join(tmp, 'uploads'),
+                          THUMBNAIL_FOLDER=os.path.join(tmp, 'uploads', 'thumbs'))
+        with app.app_context():
+            seeded = datagen.generate(args.users, args.days, args.entries_per_day, args.seed)
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+        clients = {'user': app.test_client(), 'admin': app.test_client()}
+        clients['user'].post('/auth/login', data={'email': f'{datagen.username(0)}@example.com',
+                                                  'password': datagen.PASSWORD})
+        clients['admin'].post('/auth/login', data={'email': ADMIN_LOGIN[0], 'password': ADMIN_LOGIN[1]})
+        photo = food_photo()
+
+        results = {}
+        for name, (role, method, path) in selected.items():
+            client = clients[role]
+            if method == 'POST':
+                request = lambda: client.post(path, data={'image': (io.BytesIO(photo), 'meal.jpg')},
+                                              content_type='multipart/form-data')
+            else:
+                request = lambda: client.get(path)
+            results[name] = measure(request, args.runs, statements, args.warm)
+            print(f"{name}: {results[name]['avg_ms']} ms, {results[name]['statements']} statements", file=sys.stderr)
+        os.chdir(ROOT)
+    stub.shutdown()
+
+    document = {
+        'benchmark': 'endpoints',
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'params': {'users': args.users, 'days': args.days, 'entries_per_day': args.entries_per_day,
+                   'seed': args.seed, 'runs': args.runs, 'warm': args.warm,
+                   'openrouter_latency': args.openrouter_latency},
+        'dataset': {key: value for key, value in seeded.items() if key != 'user_ids'},
+        'endpoints': results
+    }
+    if baseline is not None:
+        document['regressions'] = compare(results, baseline, args.threshold)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+    print(json.dumps(document, indent=2))
+
+
+if __name__ == '__main__':
+    main()
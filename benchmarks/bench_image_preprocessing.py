@@ -0,0 +1,90 @@
+"""Compare the legacy full-resolution encode with the upload preprocessing pipeline.
+
+Usage:
+    python -m benchmarks.bench_image_preprocessing [--width 4032 --height 3024 --runs 5]
+
+Prints a JSON document with payload bytes and encode time for both paths.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+from io import BytesIO
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.image_processing import preprocess_image
+
+
+def make_photo(path, width, height):
+    """Write a noisy JPEG roughly resembling a phone photo"""
+    img = Image.effect_noise((width, height), 64).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, max(width // 12, 1)):
+        draw.ellipse((i, height // 4, i + width // 8, height // 4 + height // 3), fill=(i % 255, 120, 60))
+    img.save(path, format='JPEG', quality=95)
+
+
+def legacy_encode(path):
+    """The original OpenRouterAI._encode_image behaviour"""
+    with open(path, 'rb') as img_file:
+        img = Image.open(BytesIO(img_file.read()))
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        buffer = BytesIO()
+        img.save(buffer, format='JPEG')
+        return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def timed(func, runs):
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, min(timings), sum(timings) / len(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-dimension', type=int, default=1024)
+    parser.add_argument('--quality', type=int, default=80)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'photo.jpg')
+        make_photo(path, args.width, args.height)
+
+        legacy, legacy_min, legacy_avg = timed(lambda: legacy_encode(path), args.runs)
+        processed, new_min, new_avg = timed(
+            lambda: preprocess_image(path, args.max_dimension, args.quality, thumbnail_folder=os.path.join(tmp, 'thumbs')),
+            args.runs
+        )
+        new_payload = processed.base64_payload
+
+        results = {
+            'benchmark': 'image_preprocessing',
+            'input': {'width': args.width, 'height': args.height, 'bytes': os.path.getsize(path)},
+            'legacy': {'base64_bytes': len(legacy), 'min_seconds': round(legacy_min, 4), 'avg_seconds': round(legacy_avg, 4)},
+            'pipeline': {
+                'base64_bytes': len(new_payload),
+                'size': list(processed.size),
+                'min_seconds': round(new_min, 4),
+                'avg_seconds': round(new_avg, 4)
+            },
+            'bytes_reduction': round(1 - len(new_payload) / len(legacy), 3),
+            'speedup': round(legacy_avg / new_avg, 2) if new_avg else None
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Measure SQLite write throughput with parallel worker processes, before and after the connection tuning.
+
+Usage:
+    python -m benchmarks.bench_sqlite_concurrency [--workers 1 4 8 --writes 200 --readers 2]
+
+Each worker is a separate process, as under gunicorn, that builds the app
+and logs food entries for its own user through NutritionDatabase.add_food_entry
+(entry, daily summary, goal status and usage rollup in one transaction).
+Reader processes load the 30-day statistics overview in a loop meanwhile.
+The "default" scenario uses SQLite's own defaults (rollback journal,
+synchronous=FULL, no mmap, 2 MB cache); "tuned" uses the app's defaults
+(WAL, synchronous=NORMAL, mmap, 64 MB cache). Both use the same busy
+timeout. Prints a JSON document with writes/s, write latency, lock errors
+and reads/s per scenario and worker count.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+from datetime import date, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks import datagen
+
+SCENARIOS = {
+    'default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                'SQLITE_MMAP_SIZE': '0', 'SQLITE_CACHE_SIZE': '-2000'},
+    'tuned': {},
+}
+
+
+def _load_app(env):
+    os.environ.update(env)
+    os.chdir(env['BENCH_DIR'])
+    with contextlib.redirect_stdout(sys.stderr):
+        from app import create_app
+        app = create_app()
+    return app
+
+
+def _setup(env, users):
+    app = _load_app(env)
+    with app.app_context():
+        datagen.generate(users=users, days=30, entries_per_day=2)
+
+
+def _writer(env, user_index, writes, barrier, results):
+    app = _load_app(env)
+    from sqlalchemy.exc import OperationalError
+    from models import User
+    from utils.nutrition_db import NutritionDatabase
+
+    with app.app_context():
+        user_id = User.query.filter_by(username=datagen.username(user_index)).one().id
+        latencies, errors = [], 0
+        barrier.wait()
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                NutritionDatabase.add_food_entry(user_id, {
+                    'food_description': f'Concurrent entry {i}', 'calories': 200 + i % 300, 'protein': 10,
+                    'carbs': 20, 'fat': 5, 'ai_analyzed': i % 3 == 0,
+                    'date_logged': date.today() - timedelta(days=i % 3)
+                })
+                latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                errors += 1
+    results.put(('writer', latencies, errors))
+
+
+def _reader(env, barrier, stop, results):
+    app = _load_app(env)
+    from models import db, User
+    from utils.stats_engine import compute_overview
+
+    with app.app_context():
+        user = User.query.filter_by(username=datagen.username(0)).one()
+        latencies, errors = [], 0
+        barrier.wait()
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                compute_overview(user, 30)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+            # Like the end of a request
+            db.session.remove()
+            user = db.session.merge(user, load=False)
+    results.put(('reader', latencies, errors))
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 2)
+
+
+def run(scenario, workers, writes, readers):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(SCENARIOS[scenario], BENCH_DIR=tmp, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   AUTO_INIT_DB='true', ANALYSIS_STORE_PATH=os.path.join(tmp, 'analysis_cache.db'), INSTRUMENTATION_ENABLED='false')
+        setup = context.Process(target=_setup, args=(env, max(workers, 1)))
+        setup.start()
+        setup.join()
+
+        barrier = context.Barrier(workers + readers + 1)
+        stop = context.Event()
+        results = context.Queue()
+        processes = [context.Process(target=_writer, args=(env, i, writes, barrier, results)) for i in range(workers)]
+        processes += [context.Process(target=_reader, args=(env, barrier, stop, results)) for _ in range(readers)]
+        for process in processes:
+            process.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+        collected = [results.get() for _ in range(workers)]
+        elapsed = time.perf_counter() - start
+        stop.set()
+        collected += [results.get() for _ in range(readers)]
+        for process in processes:
+            process.join()
+
+    write_latencies = [value for kind, values, _ in collected if kind == 'writer' for value in values]
+    read_latencies = [value for kind, values, _ in collected if kind == 'reader' for value in values]
+    return {
+        'workers': workers,
+        'readers': readers,
+        'seconds': round(elapsed, 3),
+        'writes': len(write_latencies),
+        'write_errors': sum(errors for kind, _, errors in collected if kind == 'writer'),
+        'writes_per_second': round(len(write_latencies) / elapsed, 1),
+        'write_p50_ms': percentile(write_latencies, 0.5),
+        'write_p95_ms': percentile(write_latencies, 0.95),
+        'reads_per_second': round(len(read_latencies) / elapsed, 1),
+        'read_p95_ms': percentile(read_latencies, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--writes', type=int, default=200, help='Food entries logged per worker')
+    parser.add_argument('--readers', type=int, default=2, help='Processes reading statistics meanwhile')
+    args = parser.parse_args()
+
+    results = {'benchmark': 'sqlite_concurrency', 'writes_per_worker': args.writes, 'runs': []}
+    for workers in args.workers:
+        run_results = {scenario: run(scenario, workers, args.writes, args.readers) for scenario in SCENARIOS}
+        default, tuned = run_results['default'], run_results['tuned']
+        results['runs'].append({
+            'workers': workers,
+            'default': default,
+            'tuned': tuned,
+            'write_throughput_ratio': round(tuned['writes_per_second'] / default['writes_per_second'], 2)
+            if default['writes_per_second'] else None
+        })
+        print(f"{workers} workers: {default['writes_per_second']} -> {tuned['writes_per_second']} writes/s",
+              file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
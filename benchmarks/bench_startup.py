@@ -0,0 +1,102 @@
+"""Measure the cold start of one app process with and without database initialisation at start-up.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 10 --users 50 --days 30]
+
+Seeds a throwaway SQLite database with benchmarks.datagen, then starts
+fresh Python processes, as gunicorn does for each worker. Every process
+builds the app with create_app() and serves one anonymous request. The
+"auto" mode sets AUTO_INIT_DB=true, so each start re-checks the schema,
+seeds and looks for backfills. The "lazy" mode keeps the default
+AUTO_INIT_DB=false, the deployment setup where `flask init-db` has already
+run once. For each mode the JSON document on stdout has the time to build
+the app, to serve the first request and for the whole process, plus the
+database connections opened and SQL statements run while building it.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+MODES = {'auto': 'true', 'lazy': 'false'}
+
+# Runs in each worker-like process; SQLAlchemy is imported first so its events can be counted
+WORKER = """
+import sys, json, time, contextlib
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+counts = {'connections': 0, 'statements': 0}
+event.listen(Pool, 'connect', lambda *a: counts.update(connections=counts['connections'] + 1))
+event.listen(Engine, 'before_cursor_execute', lambda *a: counts.update(statements=counts['statements'] + 1))
+start = time.perf_counter()
+with contextlib.redirect_stdout(sys.stderr):
+    from app import create_app
+    app = create_app()
+imported = time.perf_counter()
+at_import = dict(counts)
+status = app.test_client().get('/auth/login').status_code
+print(json.dumps({'import_s': imported - start, 'first_request_s': time.perf_counter() - imported,
+                  'status': status, 'import_connections': at_import['connections'],
+                  'import_statements': at_import['statements']}))
+"""
+
+
+def summarize(samples):
+    def stats(name):
+        values = sorted(sample[name] * 1000 for sample in samples)
+        return {'min': round(values[0], 1), 'avg': round(sum(values) / len(values), 1),
+                'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 1)}
+    return {
+        'import_ms': stats('import_s'),
+        'first_request_ms': stats('first_request_s'),
+        'process_ms': stats('process_s'),
+        'import_connections': max(sample['import_connections'] for sample in samples),
+        'import_statements': max(sample['import_statements'] for sample in samples),
+        'statuses': sorted({sample['status'] for sample in samples}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Processes started per mode')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   ANALYSIS_STORE_PATH=os.path.join(tmp, 'analysis_cache.db'),
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        # Creates and seeds the database the way `flask init-db` would
+        subprocess.run([sys.executable, '-m', 'benchmarks.datagen', env['DATABASE_URL'], '--users', str(args.users),
+                        '--days', str(args.days)], cwd=tmp, env=dict(env, AUTO_INIT_DB='true'), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        samples = {mode: [] for mode in MODES}
+        for _ in range(args.runs):
+            # Alternate the modes so disk cache and CPU frequency affect both alike
+            for mode, auto_init in MODES.items():
+                start = time.perf_counter()
+                result = subprocess.run([sys.executable, '-c', WORKER], cwd=tmp, env=dict(env, AUTO_INIT_DB=auto_init),
+                                        capture_output=True, text=True, check=True)
+                sample = json.loads(result.stdout.strip().splitlines()[-1])
+                sample['process_s'] = time.perf_counter() - start
+                samples[mode].append(sample)
+
+    results = {mode: summarize(mode_samples) for mode, mode_samples in samples.items()}
+    for mode, result in results.items():
+        print(f"{mode}: import {result['import_ms']['avg']} ms, {result['import_statements']} statements",
+              file=sys.stderr)
+    print(json.dumps({'benchmark': 'startup', 'runs': args.runs,
+                      'dataset': {'users': args.users, 'days': args.days}, 'modes': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
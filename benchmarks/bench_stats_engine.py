@@ -0,0 +1,132 @@
+"""Time the statistics engine against the per-endpoint FoodEntry aggregates it replaced.
+
+Usage:
+    python -m benchmarks.bench_stats_engine [--ranges 30 365 1825 --entries-per-day 4 --runs 5]
+
+Seeds a throwaway SQLite database with one user's history (twice the longest
+range, so the previous period is populated too) and prints a JSON document
+with timings and SQL statement counts per range. The overview also
+aggregates the previous period and computes rolling averages and goal
+histograms, which the legacy endpoints never did.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def seed(db, FoodEntry, WaterIntake, user_id, days, per_day):
+    today = date.today()
+    now = datetime.utcnow()
+    categories = ('fruit', 'vegetable', 'meat', 'grain', 'dairy', 'other')
+    foods, water = [], []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        if offset % 9 == 4:
+            continue  # leave some days unlogged
+        for i in range(per_day):
+            foods.append({
+                'user_id': user_id, 'food_description': f'Food {i}', 'calories': 300 + (offset * 37 + i * 91) % 500,
+                'protein': 12.0 + i, 'carbs': 40.0, 'fat': 9.5, 'fiber': 3.0, 'sugar': 5.0, 'sodium': 120.0,
+                'food_category': categories[(offset + i) % len(categories)], 'date_logged': day, 'created_at': now
+            })
+        water.append({'user_id': user_id, 'amount_ml': 1500 + offset % 1000, 'date_logged': day, 'time_logged': now})
+    db.session.execute(FoodEntry.__table__.insert(), foods)
+    db.session.execute(WaterIntake.__table__.insert(), water)
+    db.session.commit()
+    return len(foods)
+
+
+def legacy_endpoints(db, FoodEntry, func, user, days):
+    """The trends, macro, category and goal queries as the endpoints used to run them"""
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days - 1)
+    in_range = (FoodEntry.user_id == user.id, FoodEntry.date_logged >= start_date, FoodEntry.date_logged <= end_date)
+
+    daily = db.session.query(
+        FoodEntry.date_logged, func.sum(FoodEntry.calories), func.sum(FoodEntry.protein),
+        func.sum(FoodEntry.carbs), func.sum(FoodEntry.fat)
+    ).filter(*in_range).group_by(FoodEntry.date_logged).all()
+    by_date = {row[0]: row for row in daily}
+    trends = [by_date.get(start_date + timedelta(days=i)) for i in range(days)]
+
+    macros = db.session.query(
+        func.sum(FoodEntry.protein), func.sum(FoodEntry.carbs), func.sum(FoodEntry.fat)
+    ).filter(*in_range).first()
+    categories = db.session.query(
+        FoodEntry.food_category, func.sum(FoodEntry.calories)
+    ).filter(*in_range).group_by(FoodEntry.food_category).all()
+    goal_days = db.session.query(
+        FoodEntry.date_logged, func.sum(FoodEntry.calories)
+    ).filter(*in_range).group_by(FoodEntry.date_logged).all()
+    met = sum(1 for _, calories in goal_days if user.calorie_goal * 0.9 <= calories <= user.calorie_goal * 1.1)
+    return trends, macros, categories, met
+
+
+def measure(func, runs, counter):
+    timings = []
+    statements = 0
+    for _ in range(runs):
+        counter.clear()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        statements = len(counter)
+    return {
+        'min_ms': round(min(timings) * 1000, 2),
+        'avg_ms': round(sum(timings) / len(timings) * 1000, 2),
+        'statements': statements
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ranges', type=int, nargs='+', default=[30, 365, 1825])
+    parser.add_argument('--entries-per-day', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app creates its database (AUTO_INIT_DB) and log directory
+        os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}", AUTO_INIT_DB='true')
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(sys.stderr):
+            from app import create_app
+            app = create_app()
+        from sqlalchemy import event, func
+        from models import db, User, FoodEntry, WaterIntake
+        from utils.nutrition_db import rebuild_daily_summaries
+        from utils.stats_engine import compute_overview
+
+        results = {'benchmark': 'stats_engine', 'entries_per_day': args.entries_per_day, 'runs': args.runs, 'ranges': []}
+        with app.app_context():
+            user = User.query.first()
+            results['food_entries'] = seed(db, FoodEntry, WaterIntake, user.id, 2 * max(args.ranges), args.entries_per_day)
+            rebuild_daily_summaries(user.id)
+            user = User.query.first()
+
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+            for days in args.ranges:
+                legacy = measure(lambda: legacy_endpoints(db, FoodEntry, func, user, days), args.runs, statements)
+                engine = measure(lambda: compute_overview(user, days), args.runs, statements)
+                results['ranges'].append({
+                    'days': days,
+                    'legacy_endpoints': legacy,
+                    'overview': engine,
+                    'speedup': round(legacy['avg_ms'] / engine['avg_ms'], 2) if engine['avg_ms'] else None
+                })
+        os.chdir(ROOT)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Seeded synthetic users, food entries and water logs for benchmarks.
+
+Usage:
+    python -m benchmarks.datagen sqlite:////tmp/bench.db [--users 200 --days 90 --entries-per-day 4 --seed 42]
+
+The same arguments always produce the same rows (dates are relative to
+today), so results from different commits are comparable. Every generated
+user has the password "benchmark"; the first one is "bench0000". Daily
+summaries, goal streaks and usage rollups are rebuilt afterwards. From
+Python, call generate() inside an application context.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import contextlib
+from datetime import date, datetime, time, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'benchmark'
+CATEGORIES = ('fruit', 'vegetable', 'meat', 'fish', 'grain', 'dairy', 'other')
+MEAL_TYPES = ('breakfast', 'lunch', 'dinner', 'snack')
+FOODS = ('Oatmeal with berries', 'Chicken salad', 'Salmon and rice', 'Greek yogurt', 'Apple',
+         'Pasta bolognese', 'Veggie stir fry', 'Turkey sandwich', 'Protein shake', 'Lentil soup')
+BATCH_SIZE = 5000
+
+
+def username(index):
+    return f'bench{index:04d}'
+
+
+def _batched(db, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def generate(users=200, days=90, entries_per_day=4, seed=42, log_probability=0.85):
+    """Insert users x days x entries_per_day food entries (plus water logs) and rebuild the derived tables.
+
+    Must run inside an application context. Returns the generated user IDs
+    and row counts.
+    """
+    from werkzeug.security import generate_password_hash
+    from models import db, User, FoodEntry, WaterIntake
+    from utils.nutrition_db import rebuild_daily_summaries
+
+    rng = random.Random(seed)
+    today = date.today()
+    # Hashing is deliberately slow, so every user shares one hash
+    password_hash = generate_password_hash(PASSWORD)
+
+    user_rows = []
+    for i in range(users):
+        joined = today - timedelta(days=days + rng.randint(0, 365))
+        user_rows.append({
+            'username': username(i), 'email': f'{username(i)}@example.com', 'password_hash': password_hash,
+            'is_admin': False, 'is_active': rng.random() > 0.05, 'data_version': 0,
+            'last_login': None if rng.random() < 0.2 else datetime.combine(
+                today - timedelta(days=rng.randint(0, days)), time(rng.randint(6, 22), rng.randint(0, 59))),
+            'calorie_goal': rng.choice((1800, 2000, 2200, 2500)), 'protein_goal': rng.choice((100, 130, 150)),
+            'carbs_goal': 200, 'fat_goal': 65, 'fiber_goal': 30, 'water_goal': 2500,
+            'created_at': datetime.combine(joined, time(12, 0))
+        })
+    _batched(db, User.__table__, user_rows)
+    db.session.flush()
+    user_ids = db.session.execute(
+        db.select(User.id).where(User.username.in_([row['username'] for row in user_rows])).order_by(User.username)
+    ).scalars().all()
+
+    foods, water = [], []
+    for user_id in user_ids:
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            if rng.random() > log_probability:
+                continue
+            for _ in range(entries_per_day):
+                calories = rng.randint(50, 900)
+                foods.append({
+                    'user_id': user_id, 'food_description': rng.choice(FOODS), 'calories': calories,
+                    'protein': round(calories * rng.uniform(0.02, 0.08), 1),
+                    'carbs': round(calories * rng.uniform(0.05, 0.15), 1),
+                    'fat': round(calories * rng.uniform(0.01, 0.05), 1),
+                    'fiber': round(rng.uniform(0, 10), 1), 'sugar': round(rng.uniform(0, 25), 1),
+                    'sodium': round(rng.uniform(0, 900), 1), 'quantity': 1.0, 'unit': 'serving',
+                    'meal_type': rng.choice(MEAL_TYPES), 'food_category': rng.choice(CATEGORIES),
+                    'image_url': None, 'ai_analyzed': rng.random() < 0.3, 'date_logged': day,
+                    'created_at': datetime.combine(day, time(rng.randint(6, 22), rng.randint(0, 59)))
+                })
+            for _ in range(rng.randint(1, 4)):
+                water.append({
+                    'user_id': user_id, 'amount_ml': rng.choice((250, 330, 500, 750)), 'date_logged': day,
+                    'time_logged': datetime.combine(day, time(rng.randint(6, 22), rng.randint(0, 59)))
+                })
+
+    try:
+        _batched(db, FoodEntry.__table__, foods)
+        _batched(db, WaterIntake.__table__, water)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+
+    summaries = rebuild_daily_summaries()
+    return {'user_ids': user_ids, 'users': len(user_ids), 'food_entries': len(foods),
+            'water_logs': len(water), 'daily_summaries': summaries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url', help='e.g. sqlite:////tmp/bench.db (created if missing)')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--entries-per-day', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.update(DATABASE_URL=args.database_url, AUTO_INIT_DB='true')
+    with contextlib.redirect_stdout(sys.stderr):
+        from app import create_app
+        app = create_app()
+    with app.app_context():
+        result = generate(args.users, args.days, args.entries_per_day, args.seed)
+    result.pop('user_ids')
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Check read-replica routing locally with a primary SQLite file and a snapshot copy as the replica.
+
+Usage:
+    python -m benchmarks.replica_routing [--users 5 --days 30 --sticky 1]
+
+Seeds the primary with benchmarks.datagen, copies it to replica.db with
+SQLite's backup API and then logs a food entry on the primary only, so the
+replica lags behind. Requests then go through the Flask test client as the
+first generated user while every statement is attributed to the engine that
+ran it:
+
+- right after logging in (a write), reads stay on the primary;
+- once REPLICA_STICKY_SECONDS have passed, reads still come from the
+  primary while the replica is behind the user's data_version, so no stale
+  totals are served or cached;
+- after a second snapshot (the replica has caught up), dashboard, nutrition
+  data and statistics reads run on the replica;
+- logging water answers with the fresh total and the next read is served
+  by the primary again;
+- no INSERT, UPDATE or DELETE ever reaches the replica.
+
+Prints a JSON document with per-step statement counts and the checks, and
+exits with status 1 if any check fails.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from benchmarks import datagen
+from benchmarks.bench_endpoints import clear_response_caches
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def snapshot(source, target):
+    """Consistent copy of a live SQLite database, WAL included"""
+    with contextlib.closing(sqlite3.connect(source)) as src, contextlib.closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--sticky', type=float, default=1.0, help='REPLICA_STICKY_SECONDS for the run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        primary_path, replica_path = os.path.join(tmp, 'primary.db'), os.path.join(tmp, 'replica.db')
+        os.environ.update({
+            'DATABASE_URL': f'sqlite:///{primary_path}',
+            'AUTO_INIT_DB': 'true',
+            'DATABASE_REPLICA_URLS': f'sqlite:///{replica_path}',
+            'REPLICA_STICKY_SECONDS': str(args.sticky),
+            'ANALYSIS_STORE_PATH': os.path.join(tmp, 'analysis_cache.db'),
+        })
+        os.chdir(tmp)
+        with contextlib.redirect_stdout(sys.stderr):
+            from app import create_app
+            app = create_app()
+        from sqlalchemy import event
+        from models import db, User, DailySummary
+        from utils.nutrition_db import NutritionDatabase
+
+        app.config.update(WTF_CSRF_ENABLED=False)
+        today = datetime.utcnow().date()
+        with app.app_context():
+            datagen.generate(args.users, args.days, entries_per_day=2)
+            user_id = User.query.filter_by(username=datagen.username(0)).one().id
+            snapshot(primary_path, replica_path)
+
+            # Diverge: this entry exists on the primary only
+            NutritionDatabase.add_food_entry(user_id, {
+                'food_description': 'Primary-only entry', 'calories': 777, 'protein': 1, 'carbs': 1, 'fat': 1,
+                'date_logged': today
+            })
+            fresh_calories = db.session.get(DailySummary, (user_id, today)).calories
+            db.session.remove()
+
+            statements = []
+            for key, engine in db.engines.items():
+                name = 'replica' if key else 'primary'
+                event.listen(engine, 'before_cursor_execute',
+                             lambda *a, name=name: statements.append((name, a[2].lstrip().split(None, 1)[0].upper())))
+        with contextlib.closing(sqlite3.connect(replica_path)) as replica:
+            row = replica.execute('SELECT calories FROM daily_summary WHERE user_id = ? AND date_logged = ?',
+                                  (user_id, today.isoformat())).fetchone()
+        stale_calories = row[0] if row else 0
+
+        client = app.test_client()
+        steps, checks = {}, {}
+
+        def step(name, request):
+            clear_response_caches()
+            statements.clear()
+            response = request()
+            steps[name] = {
+                'status': response.status_code,
+                'primary': sum(1 for engine, _ in statements if engine == 'primary'),
+                'replica': sum(1 for engine, _ in statements if engine == 'replica'),
+                'replica_writes': sum(1 for engine, kind in statements if engine == 'replica' and kind in WRITES),
+            }
+            return response
+
+        nutrition_path = f'/api/nutrition_data/{today.isoformat()}'
+        step('login', lambda: client.post('/auth/login', data={'email': f'{datagen.username(0)}@example.com',
+                                                               'password': datagen.PASSWORD}))
+        response = step('read_after_login', lambda: client.get(nutrition_path))
+        checks['reads_after_write_use_primary'] = (steps['read_after_login']['replica'] == 0
+                                                   and response.get_json()['calories'] == fresh_calories)
+
+        time.sleep(args.sticky + 0.1)
+        response = step('read_from_lagging_replica', lambda: client.get(nutrition_path))
+        checks['lagging_replica_is_skipped'] = (steps['read_from_lagging_replica']['replica'] <= 1  # version check
+                                                and response.get_json()['calories'] == fresh_calories)
+
+        snapshot(primary_path, replica_path)  # replication catches up
+        response = step('nutrition_data', lambda: client.get(nutrition_path))
+        checks['replica_serves_reads'] = (steps['nutrition_data']['replica'] > 1
+                                          and response.get_json()['calories'] == fresh_calories)
+        for name, path in (('dashboard', '/dashboard'), ('stats_overview', '/stats/api/overview?days=30'),
+                           ('stats_nutrition_trends', '/stats/api/nutrition-trends?days=30'),
+                           ('stats_weekly_summary', '/stats/api/weekly-summary')):
+            step(name, lambda: client.get(path))
+        checks['dashboard_and_stats_use_replica'] = all(
+            steps[name]['status'] == 200 and steps[name]['replica'] > 0
+            for name in ('dashboard', 'stats_overview', 'stats_nutrition_trends', 'stats_weekly_summary'))
+
+        response = step('add_water', lambda: client.post('/add_water', data={'amount_ml': 300},
+                                                         headers={'X-Requested-With': 'XMLHttpRequest'}))
+        water = response.get_json()['total_water']
+        response = step('read_after_write', lambda: client.get(nutrition_path))
+        checks['read_your_writes'] = (steps['add_water']['replica'] == 0 and steps['read_after_write']['replica'] == 0
+                                      and response.get_json()['water_intake'] == water)
+
+        checks['replica_never_written'] = not any(values['replica_writes'] for values in steps.values())
+        os.chdir(ROOT)
+
+    document = {'benchmark': 'replica_routing', 'stale_calories': stale_calories, 'fresh_calories': fresh_calories,
+                'steps': steps, 'checks': checks, 'passed': all(checks.values())}
+    print(json.dumps(document, indent=2))
+    sys.exit(0 if document['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""A local stand-in for the OpenRouter chat completions API.
+
+Usage:
+    python -m benchmarks.stub_openrouter [--port 8089 --latency 0.5]
+
+Then run the app with OPENROUTER_API_URL=http://127.0.0.1:8089/api/v1/chat/completions.
+Image analysis requests (response_format json_object) get a fixed nutrition
+JSON document; other requests get a short tip. --latency adds a fixed delay
+per call to mimic the model. Benchmarks start it in-process with start().
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+NUTRITION = {
+    'food_description': 'Grilled chicken with rice and broccoli',
+    'calories': 620, 'protein': 45.0, 'carbs': 62.0, 'fat': 18.0,
+    'fiber': 6.0, 'sugar': 4.0, 'sodium': 540.0,
+    'quantity': 1, 'unit': 'plate', 'food_category': 'meat'
+}
+TIP = 'Add a portion of vegetables to your lunch to reach your fiber goal more easily.'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API behind the pooled session
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.latency:
+            time.sleep(self.latency)
+        wants_json = (payload.get('response_format') or {}).get('type') == 'json_object'
+        content = json.dumps(NUTRITION) if wants_json else TIP
+        body = json.dumps({
+            'id': 'stub', 'model': payload.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(latency=0.0, port=0):
+    """Serve the stub on a background thread; returns (server, chat completions URL)"""
+    handler = type('StubHandler', (StubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/api/v1/chat/completions'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering')
+    args = parser.parse_args()
+
+    server, url = start(args.latency, args.port)
+    print(f'Stub OpenRouter listening on {url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
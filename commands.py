@@ -0,0 +1,120 @@
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+
+
+def parse_date_option(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+@click.command('init-db')
+@click.option('--migrate/--no-migrate', default=True,
+              help='Apply the Alembic migrations (default) or only create missing tables.')
+@with_appcontext
+def init_db_command(migrate):
+    """Bring the schema up to date, seed the admin user and tips, and backfill derived tables."""
+    from utils.db_setup import init_database
+
+    init_database(migrate=migrate)
+    click.echo('Database is ready.')
+
+
+@click.command('rebuild-summaries')
+@click.option('--user-id', type=int, help='Only rebuild summaries for this user.')
+@click.option('--start', help='First date to rebuild (YYYY-MM-DD).')
+@click.option('--end', help='Last date to rebuild (YYYY-MM-DD).')
+@with_appcontext
+def rebuild_summaries_command(user_id, start, end):
+    """Recompute the daily summary table from food and water entries."""
+    from utils.nutrition_db import rebuild_daily_summaries
+
+    count = rebuild_daily_summaries(user_id, parse_date_option(start), parse_date_option(end))
+    click.echo(f'Rebuilt {count} daily summaries.')
+
+
+@click.command('rebuild-goal-progress')
+@click.option('--user-id', type=int, help='Only rebuild this user.')
+@with_appcontext
+def rebuild_goal_progress_command(user_id):
+    """Reclassify summary days against current goals and recompute streaks."""
+    from utils.goal_progress import rebuild_goal_progress
+
+    count = rebuild_goal_progress(user_id)
+    click.echo(f'Rebuilt goal progress for {count} users.')
+
+
+@click.command('rebuild-usage-rollups')
+@click.option('--start', help='First date to rebuild (YYYY-MM-DD).')
+@click.option('--end', help='Last date to rebuild (YYYY-MM-DD).')
+@with_appcontext
+def rebuild_usage_rollups_command(start, end):
+    """Recompute the app-wide daily usage rollups from the daily summaries and signups."""
+    from utils.usage_rollup import rebuild_usage_rollups
+
+    count = rebuild_usage_rollups(parse_date_option(start), parse_date_option(end))
+    click.echo(f'Rebuilt {count} days of usage rollups.')
+
+
+@click.command('check-indexes')
+@click.option('--user-id', type=int, default=1, show_default=True, help='User ID to plug into the queries.')
+@with_appcontext
+def check_indexes_command(user_id):
+    """EXPLAIN the hot per-user queries and fail if any of them scans a whole table or sorts in a temp b-tree."""
+    from utils.query_plans import check_hot_queries
+
+    failed = False
+    for name, plan, indexed in check_hot_queries(user_id):
+        status = {True: 'OK', False: 'NOT INDEXED', None: 'PLAN'}[indexed]
+        click.echo(f'[{status}] {name}')
+        for line in plan:
+            click.echo(f'    {line}')
+        failed = failed or indexed is False
+
+    if failed:
+        raise click.ClickException('Some hot queries do not use an index. Did you run "flask db upgrade"?')
+
+
+@click.command('export-entries')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--user-id', type=int, help='Only export this user\'s entries (default: everyone).')
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'parquet', 'columns']), default='auto', show_default=True,
+              help='Parquet needs pyarrow; "columns" is the stdlib fallback.')
+@with_appcontext
+def export_entries_command(output, user_id, fmt):
+    """Write food and water entries to a columnar zip archive."""
+    from utils.columnar import export_columnar
+
+    try:
+        manifest = export_columnar(output, user_id, fmt)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for table, info in manifest['tables'].items():
+        click.echo(f"{table}: {info['rows']} rows in {info['row_groups']} row groups")
+    click.echo(f"Wrote {manifest['format']} archive to {output}")
+
+
+@click.command('import-entries')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', type=int, help='Assign every imported entry to this user instead of the archived user IDs.')
+@with_appcontext
+def import_entries_command(source, user_id):
+    """Bulk load a columnar archive written by export-entries."""
+    from utils.columnar import import_columnar
+
+    try:
+        counts = import_columnar(source, user_id)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for table, count in counts.items():
+        click.echo(f'{table}: imported {count} rows')
+
+
+def register_commands(app):
+    """Register the application's CLI commands"""
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_summaries_command)
+    app.cli.add_command(rebuild_goal_progress_command)
+    app.cli.add_command(rebuild_usage_rollups_command)
+    app.cli.add_command(check_indexes_command)
+    app.cli.add_command(export_entries_command)
+    app.cli.add_command(import_entries_command)
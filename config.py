@@ -9,11 +9,101 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Create/patch tables, seed and backfill in create_app(). Off by default: run `flask init-db` at deploy time
+    AUTO_INIT_DB = os.environ.get('AUTO_INIT_DB', 'false').lower() == 'true'
+    
+    # SQLite connection tuning, applied to every new connection (see utils/db_engine.py)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')  # readers don't block the writer
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # ms a writer waits for the lock
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes, 0 disables
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64 * 1024))  # negative = KiB per connection
+    
+    # Connection pool for server databases such as PostgreSQL
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    
+    # Read replicas for dashboard and statistics reads (comma-separated URLs, see utils/db_routing.py)
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # reads stay on the primary after a write
+    
+    # File uploads
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
     UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
     # OpenRouter API configuration
     OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY')
-    OPENROUTER_API_URL = 'https://openrouter.ai/api/v1/chat/completions'
+    OPENROUTER_API_URL = os.environ.get('OPENROUTER_API_URL', 'https://openrouter.ai/api/v1/chat/completions')
     OPENROUTER_MODEL = 'google/gemini-2.5-flash-preview-05-20'  # Using the Gemini model
+    
+    # Analysis result store (holds AI results until the user confirms the entry).
+    # The sqlite backend is shared by every worker process on the host.
+    ANALYSIS_STORE_BACKEND = os.environ.get('ANALYSIS_STORE_BACKEND', 'sqlite')  # 'sqlite' or 'memory'
+    ANALYSIS_STORE_PATH = os.environ.get('ANALYSIS_STORE_PATH') or os.path.join(basedir, 'instance', 'analysis_cache.db')
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 3600))  # seconds
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 10000))
+    ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Image dedup cache: re-uploads of the same (or a near-identical) photo reuse the
+    # previous analysis instead of calling OpenRouter again
+    IMAGE_CACHE_ENABLED = os.environ.get('IMAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    IMAGE_CACHE_PATH = os.environ.get('IMAGE_CACHE_PATH') or os.path.join(basedir, 'instance', 'image_cache.db')
+    IMAGE_CACHE_TTL = int(os.environ.get('IMAGE_CACHE_TTL', 7 * 24 * 3600))  # seconds
+    IMAGE_CACHE_MAX_DISTANCE = int(os.environ.get('IMAGE_CACHE_MAX_DISTANCE', 3))  # dHash bits, 0 = exact only
+    IMAGE_CACHE_MAX_ENTRIES = int(os.environ.get('IMAGE_CACHE_MAX_ENTRIES', 50000))
+    
+    # Upload preprocessing: images are downsized once before being sent to the model
+    IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', 1024))  # pixels, longest side
+    IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', 80))
+    THUMBNAIL_SIZE = int(os.environ.get('THUMBNAIL_SIZE', 256))  # pixels, longest side
+    THUMBNAIL_FOLDER = os.path.join(UPLOAD_FOLDER, 'thumbs')
+    
+    # OpenRouter HTTP client: pooled keep-alive session, timeouts (seconds),
+    # exponential-backoff retries on 429/5xx and a circuit breaker
+    OPENROUTER_CONNECT_TIMEOUT = float(os.environ.get('OPENROUTER_CONNECT_TIMEOUT', 5))
+    OPENROUTER_READ_TIMEOUT = float(os.environ.get('OPENROUTER_READ_TIMEOUT', 60))
+    OPENROUTER_MAX_RETRIES = int(os.environ.get('OPENROUTER_MAX_RETRIES', 2))
+    OPENROUTER_BACKOFF_FACTOR = float(os.environ.get('OPENROUTER_BACKOFF_FACTOR', 0.5))
+    OPENROUTER_POOL_SIZE = int(os.environ.get('OPENROUTER_POOL_SIZE', 10))
+    OPENROUTER_CIRCUIT_FAILURES = int(os.environ.get('OPENROUTER_CIRCUIT_FAILURES', 5))  # failures before opening
+    OPENROUTER_CIRCUIT_RESET = float(os.environ.get('OPENROUTER_CIRCUIT_RESET', 30))  # seconds before a retry probe
+    
+    # Background image-analysis jobs (POST /api/analyze_food_image with async=1)
+    ANALYSIS_JOBS_PATH = os.environ.get('ANALYSIS_JOBS_PATH') or os.path.join(basedir, 'instance', 'analysis_jobs.db')
+    ANALYSIS_JOB_WORKERS = int(os.environ.get('ANALYSIS_JOB_WORKERS', 4))  # threads per worker process
+    ANALYSIS_JOB_MAX_PENDING = int(os.environ.get('ANALYSIS_JOB_MAX_PENDING', 32))  # queued + running per process
+    ANALYSIS_JOB_TIMEOUT = int(os.environ.get('ANALYSIS_JOB_TIMEOUT', 300))  # seconds before a job is reported failed
+    ANALYSIS_JOB_POLL_INTERVAL = 0.5  # seconds between status checks in the SSE stream
+    ANALYSIS_JOB_STREAM_MAX_WAIT = int(os.environ.get('ANALYSIS_JOB_STREAM_MAX_WAIT', 60))  # seconds an SSE stream stays open
+    
+    # Batch analysis (POST /api/analyze_food_images)
+    BATCH_MAX_IMAGES = int(os.environ.get('BATCH_MAX_IMAGES', 10))
+    BATCH_ANALYSIS_CONCURRENCY = int(os.environ.get('BATCH_ANALYSIS_CONCURRENCY', 4))  # parallel OpenRouter calls
+    
+    # Statistics: longest range any /stats/api endpoint will compute (?days= is clamped to this)
+    STATS_MAX_DAYS = int(os.environ.get('STATS_MAX_DAYS', 1825))
+    STATS_CACHE_SIZE = int(os.environ.get('STATS_CACHE_SIZE', 2048))  # cached /stats/api responses per worker
+    
+    # Bulk food entry ingestion (POST /api/food_entries/bulk)
+    BULK_MAX_ENTRIES = int(os.environ.get('BULK_MAX_ENTRIES', 1000))
+    
+    # Dashboard snapshots cached per worker, keyed by (user, date, data version)
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024))
+    
+    # Instrumentation: per-request timings, /metrics (Prometheus text format) and Server-Timing headers
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # bearer token for scrapers; without it only admins can read /metrics
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'true').lower() == 'true'  # X-Profile header, admins only
+    
+    # Admin user listing
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 30))
+    ADMIN_COUNTS_TTL = int(os.environ.get('ADMIN_COUNTS_TTL', 30))  # seconds the user counts are cached per worker
+    
+    # Nutrition tip selection: in-memory index of active tip IDs
+    TIP_INDEX_TTL = int(os.environ.get('TIP_INDEX_TTL', 300))  # seconds before the index is rebuilt
+    TIP_NO_REPEAT = os.environ.get('TIP_NO_REPEAT', 'true').lower() == 'true'  # rotate tips per user
@@ -0,0 +1,123 @@
+"""baseline schema
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-18 18:53:33.197449
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by db.create_all() before migrations were introduced already
+    # have some or all of these tables, so only create the ones that are missing
+    existing_tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'nutrition_tip' not in existing_tables:
+        op.create_table('nutrition_tip',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tip_text', sa.Text(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('is_ai_generated', sa.Boolean(), nullable=True),
+        sa.Column('date_generated', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'user' not in existing_tables:
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=64), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=128), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.Column('calorie_goal', sa.Integer(), nullable=True),
+        sa.Column('protein_goal', sa.Integer(), nullable=True),
+        sa.Column('carbs_goal', sa.Integer(), nullable=True),
+        sa.Column('fat_goal', sa.Integer(), nullable=True),
+        sa.Column('fiber_goal', sa.Integer(), nullable=True),
+        sa.Column('water_goal', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_user_email'), ['email'], unique=True)
+            batch_op.create_index(batch_op.f('ix_user_username'), ['username'], unique=True)
+
+    if 'daily_summary' not in existing_tables:
+        op.create_table('daily_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date_logged', sa.Date(), nullable=False),
+        sa.Column('calories', sa.Integer(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('fat', sa.Float(), nullable=False),
+        sa.Column('fiber', sa.Float(), nullable=False),
+        sa.Column('sugar', sa.Float(), nullable=False),
+        sa.Column('sodium', sa.Float(), nullable=False),
+        sa.Column('water_ml', sa.Integer(), nullable=False),
+        sa.Column('food_entry_count', sa.Integer(), nullable=False),
+        sa.Column('water_entry_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'date_logged')
+        )
+
+    if 'food_entry' not in existing_tables:
+        op.create_table('food_entry',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('food_description', sa.String(length=200), nullable=False),
+        sa.Column('calories', sa.Integer(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=True),
+        sa.Column('carbs', sa.Float(), nullable=True),
+        sa.Column('fat', sa.Float(), nullable=True),
+        sa.Column('fiber', sa.Float(), nullable=True),
+        sa.Column('sugar', sa.Float(), nullable=True),
+        sa.Column('sodium', sa.Float(), nullable=True),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(length=50), nullable=True),
+        sa.Column('meal_type', sa.String(length=20), nullable=False),
+        sa.Column('food_category', sa.String(length=20), nullable=False),
+        sa.Column('image_url', sa.String(length=255), nullable=True),
+        sa.Column('ai_analyzed', sa.Boolean(), nullable=True),
+        sa.Column('date_logged', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'water_intake' not in existing_tables:
+        op.create_table('water_intake',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('amount_ml', sa.Integer(), nullable=False),
+        sa.Column('date_logged', sa.Date(), nullable=False),
+        sa.Column('time_logged', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('water_intake')
+    op.drop_table('food_entry')
+    op.drop_table('daily_summary')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_username'))
+        batch_op.drop_index(batch_op.f('ix_user_email'))
+
+    op.drop_table('user')
+    op.drop_table('nutrition_tip')
+    # ### end Alembic commands ###
@@ -0,0 +1,29 @@
+"""composite indexes for hot queries
+
+Revision ID: 0002_entry_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 18:53:45.785534
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_entry_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: databases created by db.create_all() may already have these indexes
+    op.create_index('ix_food_entry_user_created', 'food_entry', ['user_id', 'created_at'], unique=False, if_not_exists=True)
+    op.create_index('ix_food_entry_user_date', 'food_entry', ['user_id', 'date_logged'], unique=False, if_not_exists=True)
+    op.create_index('ix_water_intake_user_date_time', 'water_intake', ['user_id', 'date_logged', 'time_logged'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_water_intake_user_date_time', table_name='water_intake', if_exists=True)
+    op.drop_index('ix_food_entry_user_date', table_name='food_entry', if_exists=True)
+    op.drop_index('ix_food_entry_user_created', table_name='food_entry', if_exists=True)
@@ -0,0 +1,29 @@
+"""per-user data version for cache invalidation
+
+Revision ID: 0003_user_data_version
+Revises: 0002_entry_indexes
+Create Date: 2026-10-18 19:05:12.412907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_user_data_version'
+down_revision = '0002_entry_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The legacy column check in "flask init-db" may already have added the column
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('user')]
+    if 'data_version' not in columns:
+        with op.batch_alter_table('user', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,46 @@
+"""daily goal status and per-user goal streaks
+
+Revision ID: 0004_goal_progress
+Revises: 0003_user_data_version
+Create Date: 2026-10-18 19:24:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_goal_progress'
+down_revision = '0003_user_data_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # "flask init-db" (its legacy column check, or create_all with --no-migrate) may already have added the column and table
+    inspector = sa.inspect(op.get_bind())
+    columns = [column['name'] for column in inspector.get_columns('daily_summary')]
+    if 'goal_status' not in columns:
+        with op.batch_alter_table('daily_summary', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('goal_status', sa.String(length=10), nullable=True))
+
+    if not inspector.has_table('goal_progress'):
+        op.create_table('goal_progress',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('current_streak', sa.Integer(), nullable=False),
+            sa.Column('streak_end', sa.Date(), nullable=True),
+            sa.Column('longest_streak', sa.Integer(), nullable=False),
+            sa.Column('longest_streak_end', sa.Date(), nullable=True),
+            sa.Column('hit_bitmap', sa.String(length=64), nullable=False),
+            sa.Column('hit_bitmap_end', sa.Date(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    # Statuses and streaks are filled in by "flask rebuild-goal-progress" (or "flask init-db")
+
+
+def downgrade():
+    op.drop_table('goal_progress')
+    with op.batch_alter_table('daily_summary', schema=None) as batch_op:
+        batch_op.drop_column('goal_status')
@@ -0,0 +1,26 @@
+"""user indexes for the admin listing
+
+Revision ID: 0005_user_listing_indexes
+Revises: 0004_goal_progress
+Create Date: 2026-10-18 19:41:07.530218
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_user_listing_indexes'
+down_revision = '0004_goal_progress'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: databases created by db.create_all() may already have these indexes
+    op.create_index('ix_user_created_at_id', 'user', ['created_at', 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_user_last_login_id', 'user', ['last_login', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_user_last_login_id', table_name='user', if_exists=True)
+    op.drop_index('ix_user_created_at_id', table_name='user', if_exists=True)
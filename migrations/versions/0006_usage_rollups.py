@@ -0,0 +1,49 @@
+"""per-day AI entry counts and app-wide usage rollups
+
+Revision ID: 0006_usage_rollups
+Revises: 0005_user_listing_indexes
+Create Date: 2026-10-18 19:58:22.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_usage_rollups'
+down_revision = '0005_user_listing_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # "flask init-db" (its legacy column check, or create_all with --no-migrate) may already have added the column and table
+    inspector = sa.inspect(op.get_bind())
+    columns = [column['name'] for column in inspector.get_columns('daily_summary')]
+    if 'ai_entry_count' not in columns:
+        with op.batch_alter_table('daily_summary', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('ai_entry_count', sa.Integer(), server_default='0', nullable=False))
+        op.execute(
+            "UPDATE daily_summary SET ai_entry_count = ("
+            "SELECT COUNT(*) FROM food_entry WHERE food_entry.user_id = daily_summary.user_id "
+            "AND food_entry.date_logged = daily_summary.date_logged AND food_entry.ai_analyzed)"
+        )
+
+    if not inspector.has_table('usage_rollup'):
+        op.create_table('usage_rollup',
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('food_entries', sa.Integer(), nullable=False),
+            sa.Column('ai_entries', sa.Integer(), nullable=False),
+            sa.Column('water_logs', sa.Integer(), nullable=False),
+            sa.Column('active_users', sa.Integer(), nullable=False),
+            sa.Column('signups', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('date')
+        )
+    # Rollups are filled by "flask rebuild-usage-rollups" (or "flask init-db")
+
+
+def downgrade():
+    op.drop_table('usage_rollup')
+    with op.batch_alter_table('daily_summary', schema=None) as batch_op:
+        batch_op.drop_column('ai_entry_count')
@@ -0,0 +1,25 @@
+"""covering index for per-category food totals
+
+Revision ID: 0007_food_category_index
+Revises: 0006_usage_rollups
+Create Date: 2026-10-18 20:05:12.418907
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_food_category_index'
+down_revision = '0006_usage_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: databases created by db.create_all() may already have this index
+    op.create_index('ix_food_entry_user_category', 'food_entry', ['user_id', 'food_category', 'date_logged', 'calories'],
+                    unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_food_entry_user_category', table_name='food_entry', if_exists=True)
@@ -0,0 +1,27 @@
+"""lower() indexes for case-insensitive admin user search
+
+Revision ID: 0008_user_search_indexes
+Revises: 0007_food_category_index
+Create Date: 2026-10-18 21:12:40.117325
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_user_search_indexes'
+down_revision = '0007_food_category_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # if_not_exists: databases created by db.create_all() may already have these indexes
+    op.create_index('ix_user_username_lower', 'user', [sa.text('lower(username)')], unique=False, if_not_exists=True)
+    op.create_index('ix_user_email_lower', 'user', [sa.text('lower(email)')], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_user_email_lower', table_name='user', if_exists=True)
+    op.drop_index('ix_user_username_lower', table_name='user', if_exists=True)
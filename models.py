@@ -2,8 +2,9 @@ from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -16,6 +17,9 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)  # For account suspension
     last_login = db.Column(db.DateTime)
     
+    # Bumped on every food/water write so per-user caches can tell when they are stale
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Daily nutrition goals
     calorie_goal = db.Column(db.Integer, default=2000)
     protein_goal = db.Column(db.Integer, default=150)  # in grams
@@ -26,9 +30,20 @@ class User(UserMixin, db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Keyset pagination of the admin user listing seeks on (sort column, id); its
+    # case-insensitive search is a range scan on lower(username) or lower(email)
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+        db.Index('ix_user_last_login_id', 'last_login', 'id'),
+        db.Index('ix_user_username_lower', db.text('lower(username)')),
+        db.Index('ix_user_email_lower', db.text('lower(email)')),
+    )
+    
     # Relationships
     food_entries = db.relationship('FoodEntry', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     water_entries = db.relationship('WaterIntake', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    daily_summaries = db.relationship('DailySummary', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    goal_progress = db.relationship('GoalProgress', backref='user', uselist=False, cascade='all, delete-orphan')
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -66,6 +81,14 @@ class FoodEntry(db.Model):
     date_logged = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Hot queries filter on a user's date range or take their most recent entries
+    __table_args__ = (
+        db.Index('ix_food_entry_user_date', 'user_id', 'date_logged'),
+        db.Index('ix_food_entry_user_created', 'user_id', 'created_at'),
+        # Covers the per-category totals, read in category order so GROUP BY needs no temp b-tree
+        db.Index('ix_food_entry_user_category', 'user_id', 'food_category', 'date_logged', 'calories'),
+    )
+    
     def __repr__(self):
         return f'<FoodEntry {self.food_description} - {self.calories} kcal>'
 
@@ -76,9 +99,73 @@ class WaterIntake(db.Model):
     date_logged = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
     time_logged = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Covers per-day lookups and the time-ordered entry list
+    __table_args__ = (
+        db.Index('ix_water_intake_user_date_time', 'user_id', 'date_logged', 'time_logged'),
+    )
+    
     def __repr__(self):
         return f'<WaterIntake {self.amount_ml} ml>'
 
+class DailySummary(db.Model):
+    """Per-user per-day nutrition totals, kept in step with FoodEntry/WaterIntake writes"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date_logged = db.Column(db.Date, primary_key=True)
+    
+    calories = db.Column(db.Integer, nullable=False, default=0)
+    protein = db.Column(db.Float, nullable=False, default=0.0)  # in grams
+    carbs = db.Column(db.Float, nullable=False, default=0.0)    # in grams
+    fat = db.Column(db.Float, nullable=False, default=0.0)      # in grams
+    fiber = db.Column(db.Float, nullable=False, default=0.0)    # in grams
+    sugar = db.Column(db.Float, nullable=False, default=0.0)    # in grams
+    sodium = db.Column(db.Float, nullable=False, default=0.0)   # in mg
+    water_ml = db.Column(db.Integer, nullable=False, default=0)
+    
+    food_entry_count = db.Column(db.Integer, nullable=False, default=0)
+    ai_entry_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # food entries analyzed by AI
+    water_entry_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Calories against the user's goal: 'under', 'within' (+/- 10%) or 'over'; NULL without food entries
+    goal_status = db.Column(db.String(10))
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailySummary user={self.user_id} {self.date_logged}: {self.calories} kcal>'
+
+class UsageRollup(db.Model):
+    """App-wide activity per day for the admin analytics, kept in step with DailySummary writes and signups"""
+    date = db.Column(db.Date, primary_key=True)
+    
+    food_entries = db.Column(db.Integer, nullable=False, default=0)
+    ai_entries = db.Column(db.Integer, nullable=False, default=0)    # food entries analyzed by AI
+    water_logs = db.Column(db.Integer, nullable=False, default=0)
+    active_users = db.Column(db.Integer, nullable=False, default=0)  # users with at least one food or water entry
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UsageRollup {self.date}: {self.food_entries} entries, {self.active_users} active users>'
+
+class GoalProgress(db.Model):
+    """Per-user calorie goal streaks and recent hit history, maintained as daily statuses change"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    streak_end = db.Column(db.Date)  # last day of the most recent run of hit days
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak_end = db.Column(db.Date)
+    
+    # Bit i is set when the day `i` days before hit_bitmap_end hit the goal (hex-encoded)
+    hit_bitmap = db.Column(db.String(64), nullable=False, default='0')
+    hit_bitmap_end = db.Column(db.Date)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<GoalProgress user={self.user_id} streak={self.current_streak}>'
+
 class NutritionTip(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tip_text = db.Column(db.Text, nullable=False)
@@ -1,10 +1,14 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db, User
+from utils.image_cache import get_image_cache
+from utils.analysis_jobs import get_job_queue
+from utils.user_directory import SORT_COLUMNS, list_users, user_counts, decode_cursor, invalidate_user_counts
+from utils.usage_rollup import record_usage, remove_user_usage, usage_series
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField, EmailField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
-from datetime import datetime
+from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -48,8 +52,55 @@ class AdminEditUserForm(FlaskForm):
 @admin_bp.route('/dashboard')
 @admin_required
 def dashboard():
-    users = User.query.all()
-    return render_template('admin/dashboard.html', users=users, title='Admin Dashboard')
+    search = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'created_at')
+    if sort not in SORT_COLUMNS:
+        sort = 'created_at'
+    order = 'asc' if request.args.get('order') == 'asc' else 'desc'
+    
+    cursor = None
+    if request.args.get('after'):
+        try:
+            cursor = decode_cursor(request.args['after'])
+        except ValueError:
+            flash('That page link is no longer valid; showing the first page.', 'warning')
+            return redirect(url_for('admin.dashboard', q=search or None, sort=sort, order=order))
+    
+    # Keyset page plus cached aggregate counts, so the page cost doesn't grow with the number of users
+    users, next_cursor = list_users(search=search or None, sort=sort, descending=order == 'desc',
+                                    cursor=cursor, per_page=current_app.config.get('ADMIN_PAGE_SIZE', 30))
+    return render_template('admin/dashboard.html', users=users, counts=user_counts(), next_cursor=next_cursor,
+                           search=search, sort=sort, order=order, is_first_page=cursor is None,
+                           title='Admin Dashboard')
+
+@admin_bp.route('/analytics')
+@admin_required
+def analytics():
+    return render_template('admin/analytics.html', title='Usage Analytics')
+
+@admin_bp.route('/analytics/data')
+@admin_required
+def analytics_data():
+    """Daily entries, AI analyses, water logs, active users and signups for the last ?days= days"""
+    days = max(1, min(request.args.get('days', 30, type=int), current_app.config.get('STATS_MAX_DAYS', 1825)))
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days-1)
+    # Read from the pre-aggregated rollups only; raw entry tables are never scanned here
+    return jsonify(dict(usage_series(start_date, end_date), days=days))
+
+@admin_bp.route('/image_cache/stats')
+@admin_required
+def image_cache_stats():
+    image_cache = get_image_cache()
+    if image_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(enabled=True, **image_cache.stats()))
+
+@admin_bp.route('/analysis_jobs/stats')
+@admin_required
+def analysis_job_stats():
+    window = request.args.get('window', 900, type=int)
+    return jsonify(get_job_queue().stats(window=window))
 
 @admin_bp.route('/user/create', methods=['GET', 'POST'])
 @admin_required
@@ -73,7 +124,9 @@ def create_user():
             user.set_password(form.password.data)
             
             db.session.add(user)
+            record_usage(datetime.utcnow().date(), signups=1)
             db.session.commit()
+            invalidate_user_counts()
             
             flash(f'User {user.username} has been created successfully!', 'success')
             return redirect(url_for('admin.dashboard'))
@@ -118,6 +171,7 @@ def edit_user(user_id):
             user.is_active = form.is_active.data
             
             db.session.commit()
+            invalidate_user_counts()
             flash(f'User {user.username} has been updated successfully!', 'success')
             return redirect(url_for('admin.dashboard'))
         except Exception as e:
@@ -139,6 +193,7 @@ def toggle_user_status(user_id):
     try:
         user.is_active = not user.is_active
         db.session.commit()
+        invalidate_user_counts()
         status = "activated" if user.is_active else "suspended"
         flash(f'User {user.username} has been {status} successfully!', 'success')
     except Exception as e:
@@ -159,8 +214,10 @@ def delete_user(user_id):
     
     try:
         username = user.username
+        remove_user_usage(user)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user_counts()
         flash(f'User {username} has been deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
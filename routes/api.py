@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for, Response, stream_with_context
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
-from utils.openrouter_ai import OpenRouterAI
-import os
-import uuid
+from utils.openrouter_ai import get_openrouter_client
+from utils.analysis_pipeline import save_upload, analyze_upload
+from utils.analysis_jobs import get_job_queue, QueueFullError, FINISHED_STATUSES
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 api_bp = Blueprint('api', __name__)
@@ -26,27 +28,27 @@ def analyze_food_image():
     
     if file and allowed_file(file.filename):
         try:
-            # Create uploads directory if it doesn't exist
-            os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+            filepath = save_upload(file)
             
-            # Generate a unique filename
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
+            # Async mode: hand the analysis to the background queue and return a job ID
+            if request.values.get('async') in ('1', 'true'):
+                try:
+                    job_id = get_job_queue().submit(current_user.id, filepath)
+                except QueueFullError as e:
+                    return jsonify({'error': str(e)}), 503
+                return jsonify({
+                    'job_id': job_id,
+                    'status': 'queued',
+                    'status_url': url_for('api.analysis_job_status', job_id=job_id),
+                    'events_url': url_for('api.analysis_job_events', job_id=job_id)
+                }), 202
             
-            # Save the file temporarily
-            file.save(filepath)
-            
-            # Initialize OpenRouter AI client
-            openrouter_client = OpenRouterAI(current_app.config.get('OPENROUTER_API_KEY'))
-            
-            # Analyze the image. The OpenRouterAI client is responsible for adding
-            # 'image_url' and 'analysis_id' to the result upon success, or an 'error' key on failure.
-            result = openrouter_client.analyze_food_image(filepath)
+            # Analyze the image. The pipeline adds 'image_url' and 'analysis_id' to the
+            # result upon success, or an 'error' key on failure.
+            result = analyze_upload(filepath)
             
             if 'error' in result:
-                # If the analysis client returned an error, forward it with a server error status
-                current_app.logger.error(f"AI analysis failed: {result['error']}")
+                # If the analysis returned an error, forward it with a server error status
                 return jsonify(result), 500
             
             # On success, return the analysis data with HTTP 200 OK
@@ -58,6 +60,103 @@ def analyze_food_image():
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+@api_bp.route('/analyze_food_images', methods=['POST'])
+@login_required
+def analyze_food_images():
+    """Analyze several images concurrently and return one result per image, in upload order"""
+    files = [file for file in request.files.getlist('images') if file.filename != '']
+    
+    if not files:
+        return jsonify({'error': 'No images provided'}), 400
+    
+    max_images = current_app.config.get('BATCH_MAX_IMAGES', 10)
+    if len(files) > max_images:
+        return jsonify({'error': f'Too many images, the maximum per batch is {max_images}'}), 400
+    
+    results = [None] * len(files)
+    pending = []
+    for index, file in enumerate(files):
+        if not allowed_file(file.filename):
+            results[index] = {'error': 'Invalid file type'}
+            continue
+        try:
+            pending.append((index, save_upload(file)))
+        except Exception as e:
+            current_app.logger.error(f"Error saving batch image {file.filename}: {str(e)}")
+            results[index] = {'error': 'Could not save image'}
+    
+    app = current_app._get_current_object()
+    
+    def analyze(filepath):
+        with app.app_context():
+            try:
+                return analyze_upload(filepath)
+            except Exception as e:
+                app.logger.error(f"Unhandled error analyzing batch image: {str(e)}")
+                return {'error': "An unexpected server error occurred during image analysis."}
+    
+    # Fan out to the shared OpenRouter client; total time tracks the slowest image
+    concurrency = current_app.config.get('BATCH_ANALYSIS_CONCURRENCY', 4)
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(pending))) as executor:
+            futures = [(index, executor.submit(analyze, filepath)) for index, filepath in pending]
+            for index, future in futures:
+                results[index] = future.result()
+    
+    return jsonify({
+        'results': [
+            dict(result, filename=file.filename, success='error' not in result)
+            for file, result in zip(files, results)
+        ],
+        'succeeded': sum(1 for result in results if 'error' not in result),
+        'failed': sum(1 for result in results if 'error' in result)
+    })
+
+@api_bp.route('/analysis_jobs/<job_id>', methods=['GET'])
+@login_required
+def analysis_job_status(job_id):
+    job = get_job_queue().get(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Analysis job not found'}), 404
+    return jsonify(job)
+
+@api_bp.route('/analysis_jobs/<job_id>/events', methods=['GET'])
+@login_required
+def analysis_job_events(job_id):
+    """Server-Sent Events stream that emits the job status until it finishes or the maximum wait is over"""
+    queue = get_job_queue()
+    user_id = current_user.id
+    if queue.get(job_id, user_id) is None:
+        return jsonify({'error': 'Analysis job not found'}), 404
+    
+    poll_interval = current_app.config.get('ANALYSIS_JOB_POLL_INTERVAL', 0.5)
+    deadline = time.monotonic() + current_app.config.get('ANALYSIS_JOB_STREAM_MAX_WAIT', 60)
+    
+    def generate():
+        last_status = None
+        while True:
+            job = queue.get(job_id, user_id)
+            if job is None:
+                # Pruned or expired while the client was listening
+                yield f"event: not_found\ndata: {json.dumps({'error': 'Analysis job not found'})}\n\n"
+                break
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in FINISHED_STATUSES:
+                break
+            if time.monotonic() >= deadline:
+                # Free the worker thread; the client can reconnect or poll the status URL
+                yield f"event: timeout\ndata: {json.dumps(job)}\n\n"
+                break
+            time.sleep(poll_interval)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @api_bp.route('/nutrition_data/<date>', methods=['GET'])
 @login_required
 def get_nutrition_data(date):
@@ -154,8 +253,8 @@ def generate_tip():
             'fat': current_user.fat_goal
         }
         
-        # Initialize OpenRouter AI client
-        openrouter_client = OpenRouterAI(current_app.config.get('OPENROUTER_API_KEY'))
+        # Shared OpenRouter AI client (pooled connections, retries, circuit breaker)
+        openrouter_client = get_openrouter_client()
         
         # Generate personalized tip
         tip_result = openrouter_client.generate_personalized_tip(user_data, goals)
@@ -166,6 +265,36 @@ def generate_tip():
         current_app.logger.error(f"Error generating tip: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/food_entries/bulk', methods=['POST'])
+@login_required
+def add_food_entries_bulk():
+    """Insert many food entries at once; body is {"entries": [...]} or a bare list"""
+    from utils.nutrition_db import NutritionDatabase
+    
+    payload = request.get_json(silent=True)
+    entries = payload.get('entries') if isinstance(payload, dict) else payload
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'Expected a non-empty list of entries'}), 400
+    
+    max_entries = current_app.config.get('BULK_MAX_ENTRIES', 1000)
+    if len(entries) > max_entries:
+        return jsonify({'error': f'At most {max_entries} entries per request'}), 413
+    
+    atomic = request.args.get('atomic') in ('1', 'true')
+    try:
+        created, errors = NutritionDatabase.add_food_entries(current_user.id, entries, atomic=atomic)
+    except Exception as e:
+        current_app.logger.error(f"Error adding food entries in bulk: {str(e)}")
+        return jsonify({'error': 'Could not save the entries'}), 500
+    
+    response = {
+        'created': created,
+        'errors': errors,
+        'created_count': len(created),
+        'error_count': len(errors)
+    }
+    return jsonify(response), 201 if created else 400
+
 @api_bp.route('/weekly_nutrition', methods=['GET'])
 @login_required
 def get_weekly_nutrition():
@@ -178,29 +307,17 @@ def get_weekly_nutrition():
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=6)  # 7 days including today
         
-        # Get nutrition data for each day
-        days = []
-        calories = []
-        protein = []
-        carbs = []
-        fat = []
+        # One range query over the daily summaries, with empty days filled in
+        daily_totals = NutritionDatabase.get_daily_totals(current_user.id, start_date, end_date)
         
         # Create day names (Mon, Tue, etc.)
         day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
         
-        # Fetch nutrition data for each day
-        for i in range(7):
-            date = start_date + timedelta(days=i)
-            day_idx = date.weekday()  # 0 = Monday, 6 = Sunday
-            day_name = day_names[day_idx]
-            
-            daily_nutrition = NutritionDatabase.get_daily_nutrition(current_user.id, date)
-            
-            days.append(day_name)
-            calories.append(daily_nutrition['calories'])
-            protein.append(daily_nutrition['protein'])
-            carbs.append(daily_nutrition['carbs'])
-            fat.append(daily_nutrition['fat'])
+        days = [day_names[day['date'].weekday()] for day in daily_totals]  # 0 = Monday, 6 = Sunday
+        calories = [day['calories'] for day in daily_totals]
+        protein = [round(day['protein'], 2) for day in daily_totals]
+        carbs = [round(day['carbs'], 2) for day in daily_totals]
+        fat = [round(day['fat'], 2) for day in daily_totals]
         
         return jsonify({
             'days': days,
@@ -1,7 +1,11 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
 from models import db, User
+from utils.goal_progress import rebuild_goal_progress
+from utils.user_directory import invalidate_user_counts
+from utils.usage_rollup import record_usage, remove_user_usage
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, IntegerField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
@@ -55,7 +59,9 @@ def register():
             user.set_password(form.password.data)
             
             db.session.add(user)
+            record_usage(datetime.utcnow().date(), signups=1)
             db.session.commit()
+            invalidate_user_counts()
             
             flash('Your account has been created! You can now log in.', 'success')
             return redirect(url_for('auth.login'))
@@ -146,6 +152,8 @@ def profile():
     # Handle different form submissions based on update_type
     update_type = request.form.get('update_type', None)
     
+    previous_calorie_goal = current_user.calorie_goal
+    
     # Handle profile update
     if form.validate_on_submit() and (update_type is None or update_type == 'account'):
         current_user.username = form.username.data
@@ -157,6 +165,8 @@ def profile():
         current_user.water_goal = form.water_goal.data
         
         db.session.commit()
+        if current_user.calorie_goal != previous_calorie_goal:
+            rebuild_goal_progress(current_user.id)
         flash('Your profile has been updated!', 'success')
         return redirect(url_for('auth.profile'))
     
@@ -170,6 +180,9 @@ def profile():
             current_user.water_goal = int(request.form.get('water_goal', current_user.water_goal))
             
             db.session.commit()
+            if current_user.calorie_goal != previous_calorie_goal:
+                # Past days are judged against the new goal
+                rebuild_goal_progress(current_user.id)
             flash('Your nutrition goals have been updated!', 'success')
         except Exception as e:
             flash(f'Error updating nutrition goals: {str(e)}', 'danger')
@@ -184,8 +197,10 @@ def profile():
             logout_user()
             user = User.query.get(user_id)
             if user:
+                remove_user_usage(user)
                 db.session.delete(user)
                 db.session.commit()
+                invalidate_user_counts()
                 flash('Your account has been permanently deleted.', 'info')
                 return redirect(url_for('auth.login'))
             else:
@@ -197,176 +212,63 @@ def profile():
     
     return render_template('auth/profile.html', form=form, title='Profile')
 
-@auth_bp.route('/export/csv')
-@login_required
-def export_csv():
-    # Get user's nutrition data from the database
-    from models import FoodEntry, WaterIntake
-    import csv
-    from io import StringIO
+def _export_response(fmt):
+    """Stream the user's data as a download; supports ?start=, ?end= (YYYY-MM-DD) and ?mode=entries"""
     from datetime import datetime
-    from flask import Response
-    
-    # Create a StringIO object to write CSV data
-    si = StringIO()
-    cw = csv.writer(si)
+    from flask import Response, stream_with_context
+    from utils.export import EXPORT_FORMATS, EXPORT_MODES, stream_export
     
-    # Write headers
-    cw.writerow(['Date', 'Food', 'Calories', 'Protein', 'Carbs', 'Fat', 'Water (ml)'])
-    
-    # Get food and water entries
-    food_entries = FoodEntry.query.filter_by(user_id=current_user.id).all()
-    water_entries = WaterIntake.query.filter_by(user_id=current_user.id).all()
-    
-    # Create a dictionary to store daily totals
-    daily_data = {}
-    
-    # Process food entries
-    for entry in food_entries:
-        # Get date string from entry timestamp
-        date_str = entry.time_logged.strftime('%Y-%m-%d') if hasattr(entry, 'time_logged') else \
-                  entry.date_added.strftime('%Y-%m-%d') if hasattr(entry, 'date_added') else \
-                  datetime.utcnow().strftime('%Y-%m-%d')
-        
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                'food': [],
-                'calories': 0,
-                'protein': 0,
-                'carbs': 0,
-                'fat': 0,
-                'water': 0
-            }
-        
-        daily_data[date_str]['food'].append(entry.food_description)
-        daily_data[date_str]['calories'] += entry.calories
-        daily_data[date_str]['protein'] += entry.protein
-        daily_data[date_str]['carbs'] += entry.carbs
-        daily_data[date_str]['fat'] += entry.fat
-    
-    # Process water entries
-    for entry in water_entries:
-        # Get date string from entry timestamp
-        date_str = entry.date_logged.strftime('%Y-%m-%d') if hasattr(entry, 'date_logged') else \
-                  entry.time_logged.strftime('%Y-%m-%d') if hasattr(entry, 'time_logged') else \
-                  datetime.utcnow().strftime('%Y-%m-%d')
-        
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                'food': [],
-                'calories': 0,
-                'protein': 0,
-                'carbs': 0,
-                'fat': 0,
-                'water': 0
-            }
-        
-        daily_data[date_str]['water'] += entry.amount_ml
-    
-    # Write data rows
-    for date_str, data in sorted(daily_data.items()):
-        cw.writerow([
-            date_str,
-            ', '.join(data['food']) if data['food'] else 'No food entries',
-            data['calories'],
-            data['protein'],
-            data['carbs'],
-            data['fat'],
-            data['water']
-        ])
+    mode = request.args.get('mode', 'daily')
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        flash('Invalid export date range. Use YYYY-MM-DD.', 'danger')
+        return redirect(url_for('auth.profile'))
+    if mode not in EXPORT_MODES:
+        flash('Invalid export mode.', 'danger')
+        return redirect(url_for('auth.profile'))
     
-    # Create response
-    output = si.getvalue()
-    filename = f"nutrition_data_{current_user.username}_{datetime.now().strftime('%Y%m%d')}.csv"
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"nutrition_data_{current_user.username}_{datetime.now().strftime('%Y%m%d')}.{extension}"
     
+    # Rows are read in batches and written out as they are produced
+    chunks = stream_export(fmt, current_user.id, current_user.username, start, end, mode)
     return Response(
-        output,
-        mimetype="text/csv",
+        stream_with_context(chunks),
+        mimetype=mimetype,
         headers={"Content-Disposition": f"attachment;filename={filename}"}
     )
 
+@auth_bp.route('/export/csv')
+@login_required
+def export_csv():
+    return _export_response('csv')
+
 @auth_bp.route('/export/json')
 @login_required
 def export_json():
-    # Get user's nutrition data from the database
-    from models import FoodEntry, WaterIntake
-    import json
+    return _export_response('json')
+
+@auth_bp.route('/export/jsonl')
+@login_required
+def export_jsonl():
+    return _export_response('jsonl')
+
+@auth_bp.route('/export/columnar')
+@login_required
+def export_columnar_archive():
+    """Download every entry in a compressed columnar archive (Parquet when available)"""
+    import tempfile
     from datetime import datetime
-    from flask import Response
-    
-    # Get food and water entries
-    food_entries = FoodEntry.query.filter_by(user_id=current_user.id).all()
-    water_entries = WaterIntake.query.filter_by(user_id=current_user.id).all()
-    
-    # Create a dictionary to store daily totals
-    daily_data = {}
-    
-    # Process food entries
-    for entry in food_entries:
-        # Get date string from entry timestamp
-        date_str = entry.time_logged.strftime('%Y-%m-%d') if hasattr(entry, 'time_logged') else \
-                  entry.date_added.strftime('%Y-%m-%d') if hasattr(entry, 'date_added') else \
-                  datetime.utcnow().strftime('%Y-%m-%d')
-        
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                'food': [],
-                'calories': 0,
-                'protein': 0,
-                'carbs': 0,
-                'fat': 0,
-                'water': 0
-            }
-        
-        daily_data[date_str]['food'].append(entry.food_description)
-        daily_data[date_str]['calories'] += entry.calories
-        daily_data[date_str]['protein'] += entry.protein
-        daily_data[date_str]['carbs'] += entry.carbs
-        daily_data[date_str]['fat'] += entry.fat
-    
-    # Process water entries
-    for entry in water_entries:
-        # Get date string from entry timestamp
-        date_str = entry.date_logged.strftime('%Y-%m-%d') if hasattr(entry, 'date_logged') else \
-                  entry.time_logged.strftime('%Y-%m-%d') if hasattr(entry, 'time_logged') else \
-                  datetime.utcnow().strftime('%Y-%m-%d')
-        
-        if date_str not in daily_data:
-            daily_data[date_str] = {
-                'food': [],
-                'calories': 0,
-                'protein': 0,
-                'carbs': 0,
-                'fat': 0,
-                'water': 0
-            }
-        
-        daily_data[date_str]['water'] += entry.amount_ml
-    
-    # Convert daily_data to a list for JSON serialization
-    export_data = []
-    for date_str, data in sorted(daily_data.items()):
-        export_data.append({
-            'date': date_str,
-            'food': data['food'],
-            'calories': data['calories'],
-            'protein': data['protein'],
-            'carbs': data['carbs'],
-            'fat': data['fat'],
-            'water': data['water']
-        })
+    from flask import send_file
+    from utils.columnar import export_columnar
     
-    # Create response
-    output = json.dumps({
-        'user': current_user.username,
-        'export_date': datetime.now().strftime('%Y-%m-%d'),
-        'nutrition_data': export_data
-    }, indent=4)
+    archive = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    export_columnar(archive, current_user.id)
+    archive.seek(0)
     
-    filename = f"nutrition_data_{current_user.username}_{datetime.now().strftime('%Y%m%d')}.json"
-    
-    return Response(
-        output,
-        mimetype="application/json",
-        headers={"Content-Disposition": f"attachment;filename={filename}"}
-    )
+    filename = f"nutrition_entries_{current_user.username}_{datetime.now().strftime('%Y%m%d')}.zip"
+    return send_file(archive, mimetype='application/zip', as_attachment=True, download_name=filename)
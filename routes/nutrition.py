@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, request, jsonify, current_app, flash, redirect, url_for
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
-from models import db, FoodEntry, WaterIntake, NutritionTip
+from models import FoodEntry, WaterIntake, NutritionTip
 from utils.nutrition_db import NutritionDatabase
+from utils.dashboard import DashboardSnapshot
 import os
 import uuid
 
@@ -51,14 +52,15 @@ def dashboard():
     else:
         selected_date = datetime.utcnow().date()
     
-    # Get nutrition data for the selected date
-    nutrition_data = NutritionDatabase.get_daily_nutrition(current_user.id, selected_date)
-    water_intake = NutritionDatabase.get_water_intake(current_user.id, selected_date)
-    water_entries = NutritionDatabase.get_water_entries(current_user.id, selected_date)
-    weekly_stats = NutritionDatabase.get_weekly_stats(current_user.id)
+    # Get nutrition data for the selected date (cached until the user's data changes)
+    snapshot = DashboardSnapshot.load(current_user, selected_date)
+    nutrition_data = snapshot.nutrition_data
+    water_intake = snapshot.water_intake
+    water_entries = snapshot.water_entries
+    weekly_stats = snapshot.weekly_stats
     
     # Get a nutrition tip
-    tip = NutritionDatabase.get_nutrition_tip()
+    tip = NutritionDatabase.get_nutrition_tip(user_id=current_user.id)
     
     # Calculate progress percentages
     calories_percent = round((nutrition_data['calories'] / current_user.calorie_goal) * 100) if current_user.calorie_goal > 0 else 0
@@ -98,13 +100,9 @@ def add_food():
             # Check if this is from AI analysis with analysis_id
             analysis_id = request.form.get('analysis_id')
             if analysis_id:
-                # Get the analysis data from session or database
-                # For now, we'll try to extract it from the OpenRouterAI client
-                from utils.openrouter_ai import OpenRouterAI
-                openrouter_client = OpenRouterAI(current_app.config.get('OPENROUTER_API_KEY'))
-                
-                # Retrieve the cached analysis result
-                analysis_result = openrouter_client.get_cached_analysis(analysis_id)
+                # Retrieve the cached analysis result from the shared analysis store
+                from utils.analysis_store import get_analysis_store
+                analysis_result = get_analysis_store().get(analysis_id)
                 
                 if not analysis_result:
                     raise ValueError("Analysis result not found or expired")
@@ -236,9 +234,8 @@ def delete_food(entry_id):
         # Save the date before deleting
         date_str = entry.date_logged.strftime('%Y-%m-%d')
         
-        # Delete the entry
-        db.session.delete(entry)
-        db.session.commit()
+        # Delete the entry and update the daily summary
+        NutritionDatabase.delete_food_entry(entry)
         
         flash('Food entry deleted successfully!', 'success')
         
@@ -268,17 +265,17 @@ def delete_water(entry_id):
             return redirect(url_for('nutrition.dashboard'))
         
         # Save the date before deleting
-        date_str = entry.date_logged.strftime('%Y-%m-%d')
+        date_logged = entry.date_logged
+        date_str = date_logged.strftime('%Y-%m-%d')
         
-        # Delete the entry
-        db.session.delete(entry)
-        db.session.commit()
+        # Delete the entry and update the daily summary
+        NutritionDatabase.delete_water_entry(entry)
         
         flash('Water intake entry deleted successfully!', 'success')
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             # Get updated water intake for the day
-            total_water = NutritionDatabase.get_water_intake(current_user.id, entry.date_logged)
+            total_water = NutritionDatabase.get_water_intake(current_user.id, date_logged)
             water_percent = round((total_water / current_user.water_goal) * 100) if current_user.water_goal > 0 else 0
             return jsonify({
                 'success': True,
@@ -1,8 +1,10 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, abort, make_response
 from flask_login import login_required, current_user
 from datetime import datetime, timedelta
-from models import db, FoodEntry
-from sqlalchemy import func, and_, desc
+from utils.stats_engine import DailySeries, parse_days, category_breakdown, compute_overview, compare_periods, MAX_PERIODS
+from utils.stats_cache import cached_response
+from utils.db_routing import read_replica
+from utils.goal_progress import goal_progress_summary
 import json
 
 stats_bp = Blueprint('statistics', __name__)
@@ -12,55 +14,49 @@ stats_bp = Blueprint('statistics', __name__)
 def statistics():
     return render_template('statistics/dashboard.html')
 
+def requested_range():
+    """The (days, start_date, end_date) asked for with ?days=, capped at STATS_MAX_DAYS"""
+    try:
+        days = parse_days(request.args.get('days'))
+    except ValueError:
+        abort(make_response(jsonify({'error': 'days must be a whole number'}), 400))
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days-1)  # -1 because we want to include today
+    return days, start_date, end_date
+
+@stats_bp.route('/api/overview')
+@login_required
+@cached_response
+@read_replica
+def overview():
+    """Series, averages, period-over-period change, goal histograms and categories in one response"""
+    days, _, _ = requested_range()
+    return jsonify(compute_overview(current_user, days))
+
+@stats_bp.route('/api/goal-progress')
+@login_required
+@cached_response
+@read_replica
+def goal_progress():
+    """Current and longest calorie goal streaks plus 7/30/90-day hit counts"""
+    return jsonify(goal_progress_summary(current_user))
+
 @stats_bp.route('/api/nutrition-trends')
 @login_required
+@cached_response
+@read_replica
 def nutrition_trends():
-    # Get time period from request (default to 7 days)
-    days = int(request.args.get('days', 7))
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=days-1)  # -1 because we want to include today
+    days, start_date, end_date = requested_range()
     
-    # Query daily nutrition totals
-    daily_totals = db.session.query(
-        FoodEntry.date_logged,
-        func.sum(FoodEntry.calories).label('calories'),
-        func.sum(FoodEntry.protein).label('protein'),
-        func.sum(FoodEntry.carbs).label('carbs'),
-        func.sum(FoodEntry.fat).label('fat')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= start_date,
-        FoodEntry.date_logged <= end_date
-    ).group_by(FoodEntry.date_logged).order_by(FoodEntry.date_logged).all()
+    # One range query over the daily summaries, with empty days filled in
+    series = DailySeries.load(current_user.id, start_date, end_date)
     
     # Prepare data for chart.js
-    dates = []
-    calories = []
-    protein = []
-    carbs = []
-    fat = []
-    
-    # Create a dictionary to store values by date
-    data_by_date = {}
-    for day in (start_date + timedelta(days=x) for x in range((end_date - start_date).days + 1)):
-        data_by_date[day] = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
-    
-    # Fill in actual data
-    for entry in daily_totals:
-        data_by_date[entry.date_logged] = {
-            'calories': float(entry.calories),
-            'protein': float(entry.protein),
-            'carbs': float(entry.carbs),
-            'fat': float(entry.fat)
-        }
-    
-    # Convert to lists for chart.js
-    for date, values in sorted(data_by_date.items()):
-        dates.append(date.strftime('%Y-%m-%d'))
-        calories.append(values['calories'])
-        protein.append(values['protein'])
-        carbs.append(values['carbs'])
-        fat.append(values['fat'])
+    dates = series.labels
+    calories = list(series['calories'])
+    protein = [round(value, 2) for value in series['protein']]
+    carbs = [round(value, 2) for value in series['carbs']]
+    fat = [round(value, 2) for value in series['fat']]
     
     return jsonify({
         'labels': dates,
@@ -98,32 +94,14 @@ def nutrition_trends():
 
 @stats_bp.route('/api/macro-distribution')
 @login_required
+@cached_response
+@read_replica
 def macro_distribution():
-    # Get time period from request (default to 7 days)
-    days = int(request.args.get('days', 7))
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=days-1)
-    
-    # Query total macros for the period
-    totals = db.session.query(
-        func.sum(FoodEntry.protein).label('protein'),
-        func.sum(FoodEntry.carbs).label('carbs'),
-        func.sum(FoodEntry.fat).label('fat')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= start_date,
-        FoodEntry.date_logged <= end_date
-    ).first()
+    days, start_date, end_date = requested_range()
     
-    # Calculate percentages
-    total_macros = float(totals.protein or 0) + float(totals.carbs or 0) + float(totals.fat or 0)
-    
-    if total_macros > 0:
-        protein_pct = round((float(totals.protein or 0) / total_macros) * 100, 1)
-        carbs_pct = round((float(totals.carbs or 0) / total_macros) * 100, 1)
-        fat_pct = round((float(totals.fat or 0) / total_macros) * 100, 1)
-    else:
-        protein_pct = carbs_pct = fat_pct = 0
+    # Percent of total macro grams for the period
+    distribution = DailySeries.load(current_user.id, start_date, end_date).macro_distribution()
+    protein_pct, carbs_pct, fat_pct = distribution['protein'], distribution['carbs'], distribution['fat']
     
     return jsonify({
         'labels': ['Protein', 'Carbs', 'Fat'],
@@ -137,21 +115,13 @@ def macro_distribution():
 
 @stats_bp.route('/api/food-categories')
 @login_required
+@cached_response
+@read_replica
 def food_categories():
-    # Get time period from request (default to 7 days)
-    days = int(request.args.get('days', 7))
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=days-1)
+    days, start_date, end_date = requested_range()
     
-    # Query calories by food category
-    category_totals = db.session.query(
-        FoodEntry.food_category,
-        func.sum(FoodEntry.calories).label('calories')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= start_date,
-        FoodEntry.date_logged <= end_date
-    ).group_by(FoodEntry.food_category).all()
+    # Calories by food category
+    category_totals = category_breakdown(current_user.id, start_date, end_date)
     
     # Prepare data for chart.js
     categories = []
@@ -169,9 +139,9 @@ def food_categories():
     background_colors = []
     
     for entry in category_totals:
-        categories.append(entry.food_category.capitalize())
-        calories.append(float(entry.calories))
-        background_colors.append(colors.get(entry.food_category.lower(), '#a4b0be'))
+        categories.append(entry['category'].capitalize())
+        calories.append(entry['calories'])
+        background_colors.append(colors.get(entry['category'].lower(), '#a4b0be'))
     
     return jsonify({
         'labels': categories,
@@ -186,34 +156,16 @@ def food_categories():
 
 @stats_bp.route('/api/goal-achievement')
 @login_required
+@cached_response
+@read_replica
 def goal_achievement():
-    # Get time period from request (default to 7 days)
-    days = int(request.args.get('days', 7))
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=days-1)
-    
-    # Query daily nutrition totals
-    daily_totals = db.session.query(
-        FoodEntry.date_logged,
-        func.sum(FoodEntry.calories).label('calories')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= start_date,
-        FoodEntry.date_logged <= end_date
-    ).group_by(FoodEntry.date_logged).all()
-    
-    # Count days where goals were met
-    days_logged = len(daily_totals)
-    days_goal_met = sum(1 for entry in daily_totals if entry.calories >= current_user.calorie_goal * 0.9 and entry.calories <= current_user.calorie_goal * 1.1)
-    days_under_goal = sum(1 for entry in daily_totals if entry.calories < current_user.calorie_goal * 0.9)
-    days_over_goal = sum(1 for entry in daily_totals if entry.calories > current_user.calorie_goal * 1.1)
+    days, start_date, end_date = requested_range()
     
-    # Handle case where no data exists
-    if days_logged == 0:
-        days_no_data = days
-        days_logged = days_goal_met = days_under_goal = days_over_goal = 0
-    else:
-        days_no_data = days - days_logged
+    # Logged days within 10% of the calorie goal, under it, over it, and days with no data, as stored per day
+    counts = DailySeries.load(current_user.id, start_date, end_date).goal_achievement()
+    days_goal_met, days_under_goal, days_over_goal, days_no_data = (
+        counts['within'], counts['under'], counts['over'], counts['no_data']
+    )
     
     return jsonify({
         'labels': ['Within Goal Range', 'Under Goal', 'Over Goal', 'No Data'],
@@ -227,71 +179,35 @@ def goal_achievement():
 
 @stats_bp.route('/api/weekly-summary')
 @login_required
+@cached_response
+@read_replica
 def weekly_summary():
-    # Get current week and previous week
-    today = datetime.utcnow().date()
-    current_week_start = today - timedelta(days=today.weekday())
-    current_week_end = current_week_start + timedelta(days=6)
-    prev_week_start = current_week_start - timedelta(days=7)
-    prev_week_end = current_week_start - timedelta(days=1)
+    # This week and last week (Monday to Sunday), averaged per logged day
+    current_week, prev_week = compare_periods(current_user.id, 'week', 2)
     
-    # Query current week totals
-    current_week = db.session.query(
-        func.avg(FoodEntry.calories).label('avg_calories'),
-        func.avg(FoodEntry.protein).label('avg_protein'),
-        func.avg(FoodEntry.carbs).label('avg_carbs'),
-        func.avg(FoodEntry.fat).label('avg_fat')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= current_week_start,
-        FoodEntry.date_logged <= current_week_end
-    ).first()
-    
-    # Query previous week totals
-    prev_week = db.session.query(
-        func.avg(FoodEntry.calories).label('avg_calories'),
-        func.avg(FoodEntry.protein).label('avg_protein'),
-        func.avg(FoodEntry.carbs).label('avg_carbs'),
-        func.avg(FoodEntry.fat).label('avg_fat')
-    ).filter(
-        FoodEntry.user_id == current_user.id,
-        FoodEntry.date_logged >= prev_week_start,
-        FoodEntry.date_logged <= prev_week_end
-    ).first()
-    
-    # Calculate percent changes
-    def calc_percent_change(current, previous):
-        if previous and previous > 0:
-            return round(((current - previous) / previous) * 100, 1)
-        return 0
-    
-    current_calories = float(current_week.avg_calories or 0)
-    current_protein = float(current_week.avg_protein or 0)
-    current_carbs = float(current_week.avg_carbs or 0)
-    current_fat = float(current_week.avg_fat or 0)
-    
-    prev_calories = float(prev_week.avg_calories or 0)
-    prev_protein = float(prev_week.avg_protein or 0)
-    prev_carbs = float(prev_week.avg_carbs or 0)
-    prev_fat = float(prev_week.avg_fat or 0)
+    def averages(week):
+        return {name: week[name] for name in ('avg_calories', 'avg_protein', 'avg_carbs', 'avg_fat', 'days_logged')}
     
     return jsonify({
-        'current_week': {
-            'avg_calories': round(current_calories, 1),
-            'avg_protein': round(current_protein, 1),
-            'avg_carbs': round(current_carbs, 1),
-            'avg_fat': round(current_fat, 1)
-        },
-        'prev_week': {
-            'avg_calories': round(prev_calories, 1),
-            'avg_protein': round(prev_protein, 1),
-            'avg_carbs': round(prev_carbs, 1),
-            'avg_fat': round(prev_fat, 1)
-        },
-        'percent_change': {
-            'calories': calc_percent_change(current_calories, prev_calories),
-            'protein': calc_percent_change(current_protein, prev_protein),
-            'carbs': calc_percent_change(current_carbs, prev_carbs),
-            'fat': calc_percent_change(current_fat, prev_fat)
-        }
+        'current_week': averages(current_week),
+        'prev_week': averages(prev_week),
+        'percent_change': current_week['percent_change']
     })
+
+@stats_bp.route('/api/period-summary')
+@login_required
+@cached_response
+@read_replica
+def period_summary():
+    """Per-day averages for the last N weeks, months or quarters, newest first"""
+    period = request.args.get('period', 'week')
+    try:
+        count = max(2, min(int(request.args.get('periods', 2)), MAX_PERIODS))
+    except ValueError:
+        return jsonify({'error': 'periods must be a whole number'}), 400
+    try:
+        periods = compare_periods(current_user.id, period, count)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'period': period, 'periods': periods})
@@ -0,0 +1,75 @@
+/**
+ * Admin Usage Analytics
+ */
+
+let entriesChart, usersChart;
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.analytics-range-btn').forEach(btn => {
+        btn.addEventListener('click', function() {
+            document.querySelectorAll('.analytics-range-btn').forEach(b => b.classList.remove('active'));
+            this.classList.add('active');
+            loadAnalytics(this.getAttribute('data-days'));
+        });
+    });
+
+    loadAnalytics(30);
+});
+
+function lineDataset(label, data, color) {
+    return {
+        label: label,
+        data: data,
+        borderColor: color,
+        backgroundColor: color + '33',
+        tension: 0.3,
+        fill: false
+    };
+}
+
+async function loadAnalytics(days) {
+    try {
+        const response = await fetch(`/admin/analytics/data?days=${days}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error ${response.status}`);
+        }
+        const data = await response.json();
+
+        // Totals for the range
+        Object.entries(data.totals).forEach(([name, value]) => {
+            const element = document.getElementById(`total-${name}`);
+            if (element) {
+                element.textContent = value.toLocaleString();
+            }
+        });
+
+        if (entriesChart) entriesChart.destroy();
+        entriesChart = new Chart(document.getElementById('entriesChart'), {
+            type: 'line',
+            data: {
+                labels: data.labels,
+                datasets: [
+                    lineDataset('Food entries', data.series.food_entries, '#00d2a3'),
+                    lineDataset('AI analyses', data.series.ai_entries, '#ff6b6b'),
+                    lineDataset('Water logs', data.series.water_logs, '#48dbfb')
+                ]
+            },
+            options: { responsive: true, scales: { y: { beginAtZero: true } } }
+        });
+
+        if (usersChart) usersChart.destroy();
+        usersChart = new Chart(document.getElementById('usersChart'), {
+            type: 'bar',
+            data: {
+                labels: data.labels,
+                datasets: [
+                    Object.assign(lineDataset('Active users', data.series.active_users, '#feca57'), { type: 'line' }),
+                    Object.assign(lineDataset('Signups', data.series.signups, '#a29bfe'), { backgroundColor: '#a29bfe' })
+                ]
+            },
+            options: { responsive: true, scales: { y: { beginAtZero: true } } }
+        });
+    } catch (error) {
+        console.error('Error loading usage analytics:', error);
+    }
+}
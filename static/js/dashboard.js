@@ -51,6 +51,8 @@ function initImageUpload() {
                 
                 // Create FormData object to handle the form submission with CSRF token
                 const formData = new FormData(imageUploadForm);
+                // Queue the analysis in the background and poll for the result
+                formData.append('async', '1');
                 
                 // Submit the form using fetch API to handle CSRF properly
                 fetch(imageUploadForm.action, {
@@ -73,6 +75,10 @@ function initImageUpload() {
                     }
                     return response.json(); // If response.ok, parse the success JSON body.
                 })
+                .then(data => {
+                    // A queued job returns its status URL; wait for it to finish
+                    return data.job_id ? waitForAnalysisJob(data.status_url) : data;
+                })
                 .then(data => {
                     // This 'data' is the parsed JSON from a successful (response.ok === true) response.
                     // The handleAIAnalysisResponse function itself checks for data.error for application-level errors.
@@ -99,6 +105,29 @@ function initImageUpload() {
     }
 }
 
+/**
+ * Poll a background analysis job until it finishes
+ */
+function waitForAnalysisJob(statusUrl, interval = 1000) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(statusUrl, { credentials: 'same-origin' })
+                .then(response => response.json())
+                .then(job => {
+                    if (job.status === 'done') {
+                        resolve(job.result);
+                    } else if (job.status === 'failed' || job.error) {
+                        resolve({ error: job.error || 'Analysis failed' });
+                    } else {
+                        setTimeout(poll, interval);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
 /**
  * Image Preview Modal
  */
@@ -493,7 +522,7 @@ function handleAIAnalysisResponse(response) {
     aiResults.innerHTML = `
         <div class="result-container">
             <div class="result-image">
-                <img src="${response.image_url}" alt="Food Image" class="food-image-preview" data-image="${response.image_url}">
+                <img src="${response.thumbnail_url || response.image_url}" alt="Food Image" class="food-image-preview" data-image="${response.image_url}">
             </div>
             
             <div class="nutritional-estimates">
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# Config reads the environment when it is imported; keep it away from app.db and any replicas
+_import_dir = tempfile.mkdtemp(prefix='nutrition-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_import_dir, 'import.db')}",
+    'AUTO_INIT_DB': 'false',
+    'ANALYSIS_STORE_PATH': os.path.join(_import_dir, 'analysis_cache.db'),
+    'IMAGE_CACHE_PATH': os.path.join(_import_dir, 'image_cache.db'),
+    'OPENROUTER_API_KEY': 'test',
+})
+os.environ.pop('DATABASE_REPLICA_URLS', None)
+
+from config import Config
+from models import db, User
+
+# ...and its log directory out of the working tree
+_cwd = os.getcwd()
+os.chdir(_import_dir)
+try:
+    from app import create_app
+finally:
+    os.chdir(_cwd)
+
+
+def make_app(tmp_path, migrate=False, **settings):
+    """A fresh app on its own SQLite file, initialised like `flask init-db`"""
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        AUTO_INIT_DB = False
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLALCHEMY_REPLICA_URIS = []
+        ANALYSIS_STORE_PATH = str(tmp_path / 'analysis_cache.db')
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        THUMBNAIL_FOLDER = str(tmp_path / 'uploads' / 'thumbs')
+
+    for name, value in settings.items():
+        setattr(TestConfig, name, value)
+    app = create_app(TestConfig)
+
+    from utils.db_setup import init_database
+    with app.app_context():
+        init_database(migrate=migrate)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def clear_response_caches():
+    """The stats and dashboard caches are per process and keyed by user id, so tests must not share them"""
+    from utils import stats_cache, dashboard
+    for module in (stats_cache, dashboard):
+        with module._cache_lock:
+            module._cache.clear()
+    yield
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    """A regular user with default goals; returns its id"""
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com', calorie_goal=2000, protein_goal=150,
+                    carbs_goal=200, fat_goal=65, fiber_goal=30, water_goal=2500)
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def login(client, email='tester@example.com', password='secret123'):
+    return client.post('/auth/login', data={'email': email, 'password': password})
@@ -0,0 +1,211 @@
+import io
+import json
+import threading
+import time
+import pytest
+from conftest import make_app, login
+from models import db, User
+from utils import analysis_jobs
+from utils.analysis_jobs import AnalysisJobQueue, QueueFullError, TIMEOUT_ERROR
+
+RESULT = {'food_description': 'Pasta', 'calories': 650, 'analysis_id': 'abc'}
+
+
+class FakeAnalysis:
+    """Stands in for analyze_upload; holds every call until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.calls = []
+
+    def __call__(self, filepath):
+        self.calls.append(filepath)
+        self.started.release()
+        self.release.wait(5)
+        return {'error': 'Could not identify food'} if filepath.endswith('bad.jpg') else RESULT
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    fake = FakeAnalysis()
+    monkeypatch.setattr(analysis_jobs, 'analyze_upload', fake)
+    yield fake
+    fake.release.set()
+
+
+@pytest.fixture
+def job_app(tmp_path):
+    app = make_app(tmp_path, ANALYSIS_JOBS_PATH=str(tmp_path / 'analysis_jobs.db'), ANALYSIS_JOB_WORKERS=1,
+                   ANALYSIS_JOB_MAX_PENDING=2, ANALYSIS_JOB_POLL_INTERVAL=0.01, ANALYSIS_JOB_STREAM_MAX_WAIT=5)
+    with app.app_context():
+        user = User(username='tester', email='tester@example.com')
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    if 'analysis_jobs' in app.extensions:
+        app.extensions['analysis_jobs']._executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def job_client(job_app):
+    client = job_app.test_client()
+    login(client)
+    return client
+
+
+def submit(client, filename='meal.jpg'):
+    return client.post('/api/analyze_food_image', data={
+        'async': '1', 'image': (io.BytesIO(b'not really a jpeg'), filename)
+    }, content_type='multipart/form-data')
+
+
+def wait_for(client, job_id, status):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        job = client.get(f'/api/analysis_jobs/{job_id}').get_json()
+        if job['status'] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} never reached {status}: {job}')
+
+
+def events(response):
+    """(event, data) pairs of a consumed Server-Sent Events response"""
+    pairs = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        event, data = block.split('\n')
+        pairs.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return pairs
+
+
+def test_submit_then_poll_until_done(job_client, analysis):
+    response = submit(job_client)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued'
+    assert job['status_url'] == f"/api/analysis_jobs/{job['job_id']}"
+
+    analysis.started.acquire(timeout=5)
+    assert wait_for(job_client, job['job_id'], 'running') == {'job_id': job['job_id'], 'status': 'running'}
+    analysis.release.set()
+    assert wait_for(job_client, job['job_id'], 'done') == {'job_id': job['job_id'], 'status': 'done', 'result': RESULT}
+
+
+def test_failed_analysis_is_reported(job_client, analysis):
+    analysis.release.set()
+    job_id = submit(job_client, 'bad.jpg').get_json()['job_id']
+    assert wait_for(job_client, job_id, 'failed')['error'] == 'Could not identify food'
+
+
+def test_event_stream_follows_the_job(job_client, analysis):
+    analysis.release.set()
+    job = submit(job_client).get_json()
+    stream = events(job_client.get(job['events_url']))
+    assert stream[-1] == ('done', {'job_id': job['job_id'], 'status': 'done', 'result': RESULT})
+    # Polling may miss short-lived states but never reorders them
+    names = [event for event, _ in stream]
+    assert names == [status for status in ('queued', 'running', 'done') if status in names]
+
+
+def test_event_stream_stops_after_the_maximum_wait(job_app, job_client, analysis):
+    job_app.config['ANALYSIS_JOB_STREAM_MAX_WAIT'] = 0.05
+    job = submit(job_client).get_json()
+    analysis.started.acquire(timeout=5)
+
+    started = time.monotonic()
+    stream = events(job_client.get(job['events_url']))
+    assert time.monotonic() - started < 2
+    assert stream == [('running', {'job_id': job['job_id'], 'status': 'running'}),
+                      ('timeout', {'job_id': job['job_id'], 'status': 'running'})]
+
+
+def test_full_queue_answers_503(job_client, analysis):
+    first, second = submit(job_client), submit(job_client)
+    assert (first.status_code, second.status_code) == (202, 202)
+
+    rejected = submit(job_client)
+    assert rejected.status_code == 503
+    assert 'try again' in rejected.get_json()['error']
+
+    # Capacity comes back as jobs finish
+    analysis.release.set()
+    wait_for(job_client, second.get_json()['job_id'], 'done')
+    assert submit(job_client).status_code == 202
+
+
+def test_jobs_are_private_to_their_user(job_app, job_client, analysis):
+    job_id = submit(job_client).get_json()['job_id']
+    with job_app.app_context():
+        other = User(username='other', email='other@example.com')
+        other.set_password('secret123')
+        db.session.add(other)
+        db.session.commit()
+
+    client = job_app.test_client()
+    login(client, email='other@example.com')
+    assert client.get(f'/api/analysis_jobs/{job_id}').status_code == 404
+    assert client.get(f'/api/analysis_jobs/{job_id}/events').status_code == 404
+
+
+def stored_status(queue, job_id):
+    with queue._file.connection() as conn:
+        return conn.execute('SELECT status, error FROM analysis_job WHERE job_id = ?', (job_id,)).fetchone()
+
+
+def test_stale_jobs_are_failed_and_pruned(tmp_path, monkeypatch, analysis):
+    clock = FakeClock()
+    monkeypatch.setattr(analysis_jobs, 'time', clock)
+    app = make_app(tmp_path)
+    queue = AnalysisJobQueue(app, str(tmp_path / 'analysis_jobs.db'), max_workers=1, max_pending=5,
+                             job_timeout=60, retention=3600)
+    try:
+        running = queue.submit(1, 'running.jpg')
+        analysis.started.acquire(timeout=5)
+        queued = queue.submit(1, 'queued.jpg')
+        assert stored_status(queue, running) == ('running', None)
+        assert stored_status(queue, queued) == ('queued', None)
+
+        # Past the timeout the next submit fails both in storage, not just when read
+        clock.now += 61
+        fresh = queue.submit(1, 'fresh.jpg')
+        assert stored_status(queue, running) == ('failed', TIMEOUT_ERROR)
+        assert stored_status(queue, queued) == ('failed', TIMEOUT_ERROR)
+        assert queue.stats()['queued'] == 1
+
+        # A late result doesn't revive the expired job, and the expired queued job never runs
+        analysis.release.set()
+        deadline = time.monotonic() + 5
+        while queue.get(fresh, 1)['status'] != 'done' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stored_status(queue, running) == ('failed', TIMEOUT_ERROR)
+        assert analysis.calls == ['running.jpg', 'fresh.jpg']
+        assert queue.get(fresh, 1)['status'] == 'done'
+
+        # Failed jobs are pruned after the retention period like finished ones
+        clock.now += 3601
+        queue.submit(1, 'later.jpg')
+        assert queue.get(running, 1) is None and queue.get(queued, 1) is None and queue.get(fresh, 1) is None
+    finally:
+        queue._executor.shutdown(wait=True)
+
+
+def test_queue_full_error_when_pending_is_at_capacity(tmp_path, analysis):
+    queue = AnalysisJobQueue(make_app(tmp_path), str(tmp_path / 'analysis_jobs.db'), max_workers=1, max_pending=1)
+    try:
+        queue.submit(1, 'one.jpg')
+        with pytest.raises(QueueFullError):
+            queue.submit(1, 'two.jpg')
+        assert queue.stats()['worker_pending'] == 1
+    finally:
+        analysis.release.set()
+        queue._executor.shutdown(wait=True)
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+import pytest
+from conftest import make_app
+from utils import analysis_store
+from utils.analysis_store import MemoryAnalysisStore, SQLiteAnalysisStore, get_analysis_store
+
+
+class FakeClock:
+    """Stands in for the time module; every reading moves one millisecond on so LRU order is strict"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(analysis_store, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path, clock):
+    def make(**limits):
+        if request.param == 'memory':
+            return MemoryAnalysisStore(**limits)
+        return SQLiteAnalysisStore(str(tmp_path / 'analysis_cache.db'), **limits)
+    return make
+
+
+def test_round_trip_and_delete(make_store):
+    store = make_store()
+    store.put('a', {'calories': 420, 'food_description': 'Soup'})
+    assert store.get('a') == {'calories': 420, 'food_description': 'Soup'}
+    store.delete('a')
+    assert store.get('a') is None
+    assert store.get('missing') is None
+
+
+def test_entries_expire_after_the_ttl(make_store, clock):
+    store = make_store(ttl=60)
+    store.put('a', {'calories': 1})
+    clock.now += 59
+    assert store.get('a') == {'calories': 1}
+    clock.now += 2
+    assert store.get('a') is None
+
+
+def test_least_recently_used_entry_is_evicted_at_the_entry_limit(make_store):
+    store = make_store(max_entries=2)
+    store.put('a', {'n': 1})
+    store.put('b', {'n': 2})
+    store.get('a')  # b is now the least recently used
+    store.put('c', {'n': 3})
+
+    assert store.get('b') is None
+    assert store.get('a') == {'n': 1}
+    assert store.get('c') == {'n': 3}
+    assert store.stats()['entries'] == 2
+
+
+def test_least_recently_used_entries_are_evicted_at_the_byte_limit(make_store):
+    payload = {'text': 'x' * 90}
+    size = len(json.dumps(payload))
+    store = make_store(max_bytes=size * 2)
+    for key in ('a', 'b', 'c'):
+        store.put(key, payload)
+
+    assert store.get('a') is None
+    assert store.get('b') == store.get('c') == payload
+    assert store.stats()['bytes'] == size * 2
+
+
+def test_concurrent_first_use_builds_one_store(tmp_path, monkeypatch):
+    app = make_app(tmp_path, ANALYSIS_STORE_BACKEND='memory')
+    create = analysis_store.create_analysis_store
+
+    def slow_create(config):
+        time.sleep(0.05)  # widen the window in which two requests could both see no store
+        return create(config)
+
+    monkeypatch.setattr(analysis_store, 'create_analysis_store', slow_create)
+    barrier = threading.Barrier(8)
+    stores = []
+
+    def first_request():
+        barrier.wait()
+        stores.append(get_analysis_store(app))
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(store) for store in stores}) == 1
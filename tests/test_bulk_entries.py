@@ -0,0 +1,84 @@
+from datetime import date
+import pytest
+from conftest import login
+from models import db, User, FoodEntry, DailySummary, UsageRollup
+from utils.nutrition_db import NutritionDatabase
+
+DAY_ONE, DAY_TWO = date(2024, 3, 1), date(2024, 3, 2)
+
+
+def entry(description, calories, day, **fields):
+    return dict(food_description=description, calories=calories, protein=10, date_logged=day.isoformat(), **fields)
+
+
+@pytest.fixture
+def logged_in(client, user):
+    login(client)
+    return client
+
+
+def post(client, entries, query=''):
+    return client.post(f'/api/food_entries/bulk{query}', json={'entries': entries})
+
+
+def test_bulk_insert_reports_ids_and_errors_per_item(app, logged_in, user):
+    response = post(logged_in, [
+        entry('Oats', 300, DAY_ONE),
+        entry('Salad', 200, DAY_ONE, ai_analyzed='true'),
+        {'food_description': 'No calories', 'date_logged': DAY_ONE.isoformat()},
+        entry('Pasta', 700, DAY_TWO, ai_analyzed='false'),
+    ])
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['created_count'] == 3 and body['error_count'] == 1
+    assert body['errors'] == [{'index': 2, 'error': 'calories is required'}]
+    assert [item['index'] for item in body['created']] == [0, 1, 3]
+
+    with app.app_context():
+        # Each reported id is the entry made from that item
+        for item, description in zip(body['created'], ('Oats', 'Salad', 'Pasta')):
+            assert db.session.get(FoodEntry, item['id']).food_description == description
+
+        day_one = db.session.get(DailySummary, (user, DAY_ONE))
+        assert (day_one.calories, day_one.food_entry_count, day_one.ai_entry_count) == (500, 2, 1)
+        assert db.session.get(DailySummary, (user, DAY_TWO)).calories == 700
+
+        rollup = db.session.get(UsageRollup, DAY_ONE)
+        assert (rollup.food_entries, rollup.ai_entries, rollup.active_users) == (2, 1, 1)
+        assert db.session.get(User, user).data_version > 0
+
+
+def test_atomic_bulk_insert_rejects_the_whole_batch(app, logged_in, user):
+    response = post(logged_in, [entry('Oats', 300, DAY_ONE), entry('Bad', -5, DAY_ONE)], query='?atomic=1')
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['created'] == []
+    assert body['errors'] == [{'index': 1, 'error': 'calories must be zero or more'}]
+
+    with app.app_context():
+        assert FoodEntry.query.filter_by(user_id=user).count() == 0
+        assert db.session.get(DailySummary, (user, DAY_ONE)) is None
+        assert db.session.get(UsageRollup, DAY_ONE) is None
+
+
+def test_bulk_insert_is_capped(app, logged_in):
+    app.config['BULK_MAX_ENTRIES'] = 2
+    response = post(logged_in, [entry(f'Item {i}', 100, DAY_ONE) for i in range(3)])
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'At most 2 entries per request'}
+
+
+@pytest.mark.parametrize('payload', [{'entries': []}, {'entries': 'oats'}, None])
+def test_bulk_insert_needs_a_list_of_entries(logged_in, payload):
+    assert logged_in.post('/api/food_entries/bulk', json=payload).status_code == 400
+
+
+def test_ids_stay_in_order_without_ordered_returning(app, user, monkeypatch):
+    with app.app_context():
+        monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False)
+        created, errors = NutritionDatabase.add_food_entries(user, [
+            entry('First', 100, DAY_ONE), entry('Second', 200, DAY_TWO)
+        ])
+        assert errors == []
+        assert [db.session.get(FoodEntry, item['id']).food_description for item in created] == ['First', 'Second']
+        assert db.session.get(DailySummary, (user, DAY_TWO)).calories == 200
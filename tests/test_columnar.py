@@ -0,0 +1,140 @@
+import zipfile
+from datetime import date, datetime
+import pytest
+from conftest import make_app
+from models import db, User, FoodEntry, WaterIntake, DailySummary
+from utils import columnar
+from utils.columnar import TABLES, export_columnar, import_columnar
+
+FOOD = [
+    dict(food_description='Porridge', calories=350, protein=12.5, carbs=54.25, fat=6.0, fiber=None, sugar=None,
+         sodium=0.1 + 0.2, quantity=1.0, unit='bowl', meal_type='breakfast', food_category='grains',
+         image_url=None, ai_analyzed=True, date_logged=date(2026, 10, 14),
+         created_at=datetime(2026, 10, 14, 7, 30, 1, 123456)),
+    dict(food_description='Crème brûlée "deluxe"', calories=0, protein=0.0, carbs=-0.0, fat=1e-9, fiber=2.0,
+         sugar=31.333333333333332, sodium=None, quantity=None, unit=None, meal_type='snack',
+         food_category='other', image_url='/static/uploads/a.jpg', ai_analyzed=False,
+         date_logged=date(1999, 12, 31), created_at=None),
+    dict(food_description='Feast', calories=2 ** 40, protein=1e6, carbs=3.0, fat=4.5, fiber=0.0, sugar=0.0,
+         sodium=2300.0, quantity=2.5, unit='plate', meal_type='dinner', food_category='protein',
+         image_url=None, ai_analyzed=None, date_logged=date(2026, 10, 15), created_at=datetime(1970, 1, 1)),
+]
+WATER = [
+    dict(amount_ml=250, date_logged=date(2026, 10, 14), time_logged=datetime(2026, 10, 14, 8, 0, 0, 1)),
+    dict(amount_ml=750, date_logged=date(2026, 10, 15), time_logged=None),
+]
+
+
+@pytest.fixture(autouse=True)
+def without_pyarrow(monkeypatch):
+    """Exercise the stdlib array format whether or not pyarrow happens to be installed"""
+    monkeypatch.setattr(columnar, 'pa', None)
+    monkeypatch.setattr(columnar, 'pq', None)
+
+
+def fresh_app(tmp_path, name):
+    directory = tmp_path / name
+    directory.mkdir()
+    return make_app(directory)
+
+
+def add_user(username):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('secret123')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def seed(user_id, copies=1):
+    # Core inserts, so the NULLs are stored rather than replaced by the ORM column defaults
+    for _ in range(copies):
+        db.session.execute(FoodEntry.__table__.insert(), [dict(row, user_id=user_id) for row in FOOD])
+        db.session.execute(WaterIntake.__table__.insert(), [dict(row, user_id=user_id) for row in WATER])
+    db.session.commit()
+
+
+def table_columns(user_id):
+    """Every exported column except user_id, as {table: {column: [values in id order]}}"""
+    result = {}
+    for table, (model, columns) in TABLES.items():
+        names = [name for name, _ in columns if name != 'user_id']
+        rows = db.session.query(*[getattr(model, name) for name in names]).filter(
+            model.user_id == user_id).order_by(model.id).all()
+        result[table] = {name: [row[index] for row in rows] for index, name in enumerate(names)}
+    return result
+
+
+def assert_same_columns(imported, exported):
+    assert imported.keys() == exported.keys()
+    for table in exported:
+        for name, values in exported[table].items():
+            assert imported[table][name] == values, f'{table}.{name}'
+            # 10.0 must come back as a float and 350 as an int, NULL as NULL
+            assert [type(value) for value in imported[table][name]] == [type(value) for value in values], \
+                f'{table}.{name}'
+
+
+def test_cli_round_trip_keeps_every_column(tmp_path):
+    archive = str(tmp_path / 'entries.zip')
+    source = fresh_app(tmp_path, 'source')
+    with source.app_context():
+        user_id = add_user('exporter')
+        seed(user_id)
+        seed(add_user('bystander'), copies=2)
+        exported = table_columns(user_id)
+    assert exported['food_entry']['fiber'] == [None, 2.0, 0.0]
+    assert exported['water_intake']['time_logged'][1] is None
+
+    result = source.test_cli_runner().invoke(
+        args=['export-entries', archive, '--user-id', str(user_id), '--format', 'auto'])
+    assert result.exit_code == 0, result.output
+    assert 'Wrote columns archive' in result.output
+    with zipfile.ZipFile(archive) as zf:
+        assert 'food_entry/00000/fiber.nulls' in zf.namelist()
+        assert not any(name.endswith('.parquet') for name in zf.namelist())
+
+    target = fresh_app(tmp_path, 'target')
+    with target.app_context():
+        add_user('someone-else')
+        importer = add_user('importer')
+    result = target.test_cli_runner().invoke(args=['import-entries', archive, '--user-id', str(importer)])
+    assert result.exit_code == 0, result.output
+    assert 'food_entry: imported 3 rows' in result.output
+    assert 'water_intake: imported 2 rows' in result.output
+
+    with target.app_context():
+        assert_same_columns(table_columns(importer), exported)
+        summaries = {row.date_logged: (row.calories, row.water_ml, row.food_entry_count)
+                     for row in DailySummary.query.filter_by(user_id=importer)}
+    assert summaries == {
+        date(2026, 10, 14): (350, 250, 1),
+        date(1999, 12, 31): (0, 0, 1),
+        date(2026, 10, 15): (2 ** 40, 750, 1),
+    }
+
+
+def test_round_trip_across_row_groups(tmp_path):
+    archive = str(tmp_path / 'entries.zip')
+    source = fresh_app(tmp_path, 'source')
+    with source.app_context():
+        user_id = add_user('exporter')
+        seed(user_id, copies=4)
+        exported = table_columns(user_id)
+        manifest = export_columnar(archive, user_id, fmt='columns', row_group_size=5)
+    assert manifest['tables']['food_entry'] == {
+        'columns': [name for name, _ in TABLES['food_entry'][1]], 'rows': 12, 'row_groups': 3
+    }
+
+    target = fresh_app(tmp_path, 'target')
+    with target.app_context():
+        # Keeping the archived user ids needs the same user to exist
+        assert add_user('exporter') == user_id
+        assert import_columnar(archive, batch_size=4) == {'food_entry': 12, 'water_intake': 8}
+        assert_same_columns(table_columns(user_id), exported)
+
+
+def test_parquet_format_needs_pyarrow(app, tmp_path):
+    with app.app_context():
+        with pytest.raises(ValueError, match='pyarrow'):
+            export_columnar(str(tmp_path / 'entries.zip'), fmt='parquet')
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import func
+from models import db, User, FoodEntry, WaterIntake, DailySummary
+from utils.nutrition_db import NutritionDatabase, rebuild_daily_summaries, SUMMARY_NUTRIENTS
+
+DAY = date(2026, 10, 14)
+
+
+def add_food(user_id, calories, day=DAY, **fields):
+    return NutritionDatabase.add_food_entry(user_id, dict({
+        'food_description': 'Meal', 'calories': calories, 'protein': 12.3, 'carbs': 40.1, 'fat': 7.7,
+        'fiber': 2.2, 'sugar': 5.5, 'sodium': 310.0, 'date_logged': day
+    }, **fields))
+
+
+def summary_row(user_id, day=DAY):
+    row = db.session.get(DailySummary, (user_id, day))
+    return {name: getattr(row, name) for name in SUMMARY_NUTRIENTS + (
+        'water_ml', 'food_entry_count', 'water_entry_count', 'ai_entry_count')} if row else None
+
+
+def test_deleting_an_entry_decrements_the_summary(app, user):
+    with app.app_context():
+        breakfast = add_food(user, 400, ai_analyzed=True)
+        add_food(user, 650)
+        water = NutritionDatabase.add_water_intake(user, 500, DAY)
+        NutritionDatabase.add_water_intake(user, 250, DAY)
+
+        NutritionDatabase.delete_food_entry(breakfast)
+        NutritionDatabase.delete_water_entry(water)
+        totals = NutritionDatabase.get_daily_summary(user, DAY)
+        row = summary_row(user)
+
+    assert totals['calories'] == 650
+    assert totals['protein'] == 12.3
+    assert (totals['water_ml'], totals['food_entry_count'], totals['water_entry_count']) == (250, 1, 1)
+    assert row['ai_entry_count'] == 0
+
+
+def test_deleting_the_last_entries_of_a_day_leaves_zero_totals(app, user):
+    with app.app_context():
+        entries = [add_food(user, 400, ai_analyzed=True), add_food(user, 333)]
+        water = NutritionDatabase.add_water_intake(user, 500, DAY)
+        for entry in entries:
+            NutritionDatabase.delete_food_entry(entry)
+        NutritionDatabase.delete_water_entry(water)
+        totals = NutritionDatabase.get_daily_summary(user, DAY)
+        row = summary_row(user)
+        week = NutritionDatabase.get_daily_totals(user, DAY - timedelta(days=6), DAY)
+
+    assert set(totals.values()) == {0}
+    # A row that is kept must not carry anything over, not even float noise
+    if row is not None:
+        assert all(value == pytest.approx(0, abs=1e-9) for value in row.values())
+    assert week[-1]['calories'] == 0 and week[-1]['food_entry_count'] == 0
+
+
+def test_rebuild_matches_the_entry_tables(app, user):
+    with app.app_context():
+        other = User(username='other', email='other@example.com')
+        other.set_password('secret123')
+        db.session.add(other)
+        db.session.commit()
+
+        kept = []
+        for offset in range(10):
+            day = DAY - timedelta(days=offset)
+            for meal in range(3):
+                kept.append(add_food(user, 250 + offset * 17 + meal, day, protein=0.1 * (meal + 1),
+                                     ai_analyzed=meal == 0))
+            add_food(other.id, 900, day)
+            NutritionDatabase.add_water_intake(user, 300 + offset, day)
+        for entry in kept[::4]:
+            NutritionDatabase.delete_food_entry(entry)
+
+        incremental = {(row.user_id, row.date_logged): summary_row(row.user_id, row.date_logged)
+                       for row in DailySummary.query}
+        rebuild_daily_summaries()
+        rebuilt = {(row.user_id, row.date_logged): summary_row(row.user_id, row.date_logged)
+                   for row in DailySummary.query}
+
+        direct = {
+            (user_id, day): (calories, protein, count)
+            for user_id, day, calories, protein, count in db.session.query(
+                FoodEntry.user_id, FoodEntry.date_logged, func.sum(FoodEntry.calories),
+                func.sum(FoodEntry.protein), func.count(FoodEntry.id)
+            ).group_by(FoodEntry.user_id, FoodEntry.date_logged)
+        }
+        water = dict(((user_id, day), amount) for user_id, day, amount in db.session.query(
+            WaterIntake.user_id, WaterIntake.date_logged, func.sum(WaterIntake.amount_ml)
+        ).group_by(WaterIntake.user_id, WaterIntake.date_logged))
+
+    assert set(rebuilt) == set(direct)
+    for key, (calories, protein, count) in direct.items():
+        assert rebuilt[key]['calories'] == calories
+        assert rebuilt[key]['protein'] == pytest.approx(protein)
+        assert rebuilt[key]['food_entry_count'] == count
+        assert rebuilt[key]['water_ml'] == water.get(key, 0)
+
+    # The incrementally maintained rows agree with the rebuild
+    for key, row in rebuilt.items():
+        assert incremental[key] == pytest.approx(row)
@@ -0,0 +1,168 @@
+import time
+import sqlite3
+import contextlib
+from datetime import datetime
+import pytest
+from flask import current_app, session as flask_session
+from sqlalchemy import event, select, update
+from conftest import make_app, login
+from models import db, User, FoodEntry, WaterIntake
+from utils import dashboard, stats_cache
+from utils.db_routing import PINNED_UNTIL_KEY, replica_bind_keys, replica_reads
+from utils.nutrition_db import NutritionDatabase
+
+TRENDS = '/stats/api/nutrition-trends?days=7'
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app with one SQLite read replica; the replica only changes when sync_replica() copies the primary"""
+    app = make_app(tmp_path, SQLALCHEMY_REPLICA_URIS=[f"sqlite:///{tmp_path / 'replica.db'}"])
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+def sync_replica(app):
+    """Let replication catch up: copy the primary onto the replica"""
+    with app.app_context():
+        primary, replica = db.engine.url.database, db.engines[replica_bind_keys(app)[0]].url.database
+    with contextlib.closing(sqlite3.connect(primary)) as src, contextlib.closing(sqlite3.connect(replica)) as dst:
+        src.backup(dst)
+
+
+def replica_engine():
+    return db.engines[replica_bind_keys(current_app)[0]]
+
+
+@pytest.fixture
+def replica_statements(app):
+    """SQL statements that reached the replica"""
+    with app.app_context():
+        engine = replica_engine()
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def log_calories(user_id, calories):
+    NutritionDatabase.add_food_entry(user_id, {
+        'food_description': 'Meal', 'calories': calories, 'protein': 0, 'carbs': 0, 'fat': 0,
+        'date_logged': datetime.utcnow().date()
+    })
+
+
+def unpin(client):
+    """Skip the read-your-writes window that logging in opened"""
+    with client.session_transaction() as session:
+        session.pop(PINNED_UNTIL_KEY, None)
+
+
+def trends_calories(response):
+    assert response.status_code == 200
+    return response.get_json()['datasets'][0]['data'][-1]
+
+
+def test_plain_reads_in_replica_reads_go_to_a_replica(app, user):
+    sync_replica(app)
+    with app.test_request_context():
+        session = db.session()
+        assert session.get_bind(clause=select(FoodEntry)) is db.engine
+        with replica_reads():
+            assert session.get_bind(clause=select(FoodEntry)) is replica_engine()
+            assert session.get_bind(clause=select(FoodEntry).with_for_update()) is db.engine
+        assert session.get_bind(clause=select(FoodEntry)) is db.engine
+
+
+def test_writes_and_flushes_go_to_the_primary(app, user):
+    sync_replica(app)
+    with app.test_request_context():
+        session = db.session()
+        with replica_reads():
+            assert session.get_bind(clause=update(User)) is db.engine
+            # The transaction has written, so its reads must see the write
+            assert session.get_bind(clause=select(FoodEntry)) is db.engine
+        session.rollback()
+
+        with replica_reads():
+            session.add(WaterIntake(user_id=user, amount_ml=250))
+            session.flush()
+            assert session.get_bind(clause=select(WaterIntake)) is db.engine
+            session.commit()
+        assert flask_session[PINNED_UNTIL_KEY] > time.time()
+
+    with app.app_context():
+        assert db.session.execute(select(WaterIntake.amount_ml)).scalars().all() == [250]
+        with replica_engine().connect() as conn:
+            assert conn.execute(select(WaterIntake.amount_ml)).scalars().all() == []
+
+
+def test_pinned_reads_go_to_the_primary(app, user):
+    sync_replica(app)
+    with app.test_request_context():
+        flask_session[PINNED_UNTIL_KEY] = time.time() + 60
+        with replica_reads():
+            assert db.session.get_bind(clause=select(FoodEntry)) is db.engine
+
+        flask_session[PINNED_UNTIL_KEY] = time.time() - 1
+        with replica_reads():
+            assert db.session.get_bind(clause=select(FoodEntry)) is replica_engine()
+
+
+def test_app_without_replicas_reads_from_the_primary(tmp_path):
+    (tmp_path / 'plain').mkdir()
+    app = make_app(tmp_path / 'plain')
+    with app.app_context():
+        user = User(username='solo', email='solo@example.com', calorie_goal=2000)
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+        log_calories(user.id, 640)
+
+        assert replica_bind_keys(app) == []
+        with replica_reads():
+            assert db.session.get_bind(clause=select(FoodEntry)) is db.engine
+        db.session.remove()
+
+    client = app.test_client()
+    login(client, 'solo@example.com')
+    assert trends_calories(client.get(TRENDS)) == 640
+
+
+def test_caught_up_replica_serves_statistics(app, client, user, replica_statements):
+    with app.app_context():
+        log_calories(user, 900)
+    sync_replica(app)
+    login(client)
+    unpin(client)
+
+    replica_statements.clear()
+    assert trends_calories(client.get(TRENDS)) == 900
+    # The data_version check and the summary range query
+    assert len(replica_statements) >= 2
+
+
+def test_lagging_replica_does_not_fill_the_caches(app, client, user, replica_statements):
+    sync_replica(app)
+    with app.app_context():
+        log_calories(user, 1234)  # on the primary only: the replica is one data_version behind
+    login(client)
+    unpin(client)
+
+    replica_statements.clear()
+    response = client.get(TRENDS)
+    assert trends_calories(response) == 1234
+    assert len(replica_statements) == 1  # only the data_version check
+    assert client.get('/dashboard').status_code == 200
+    assert [snapshot.nutrition_data['calories'] for snapshot in dashboard._cache.values()] == [1234]
+
+    # Once the replica catches up, the cached response under the same ETag is still the fresh one
+    sync_replica(app)
+    assert [b'1234' in body for body in stats_cache._cache.values()] == [True]
+    assert client.get(TRENDS, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert trends_calories(client.get(TRENDS)) == 1234
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+import pytest
+from conftest import login
+from models import db, FoodEntry, WaterIntake
+from utils.export import ENTRY_CSV_HEADER
+
+FOOD = [
+    # (date_logged, created_at, description, calories, protein, carbs, fat)
+    (date(2026, 10, 12), datetime(2026, 10, 12, 19, 0), 'Curry', 700, 30.5, 80.25, 20.0),
+    (date(2026, 10, 12), datetime(2026, 10, 12, 8, 0), 'Toast', 250, 7.25, 30.0, 5.5),
+    (date(2026, 10, 14), datetime(2026, 10, 14, 12, 30), 'Salad', 320, 12.0, 15.5, 18.25),
+    (date(2026, 10, 11), datetime(2026, 10, 11, 9, 0), 'Eggs', 180, 13.0, 1.0, 12.0),
+]
+WATER = [
+    # (date_logged, time_logged, amount_ml)
+    (date(2026, 10, 12), datetime(2026, 10, 12, 10, 0), 500),
+    (date(2026, 10, 12), None, 250),
+    (date(2026, 10, 13), datetime(2026, 10, 13, 7, 0), 750),
+    (date(2026, 10, 14), datetime(2026, 10, 14, 12, 30), 300),
+]
+
+
+@pytest.fixture
+def entries(app, user):
+    with app.app_context():
+        for day, created, food, calories, protein, carbs, fat in FOOD:
+            db.session.add(FoodEntry(user_id=user, date_logged=day, created_at=created, food_description=food,
+                                     calories=calories, protein=protein, carbs=carbs, fat=fat))
+        # A Core insert keeps the missing time NULL instead of the ORM default
+        db.session.execute(WaterIntake.__table__.insert(), [
+            dict(user_id=user, date_logged=day, time_logged=logged, amount_ml=amount) for day, logged, amount in WATER
+        ])
+        db.session.commit()
+
+
+def baseline_daily_data():
+    """The per-day records the non-streamed export built in memory.
+
+    The old code grouped food by a timestamp attribute FoodEntry doesn't have, so
+    every meal landed on today's date; the day it was logged is what it meant.
+    """
+    daily_data = {}
+    for day, created, food, calories, protein, carbs, fat in sorted(FOOD, key=lambda row: row[1]):
+        data = daily_data.setdefault(day.strftime('%Y-%m-%d'), {
+            'food': [], 'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'water': 0})
+        data['food'].append(food)
+        data['calories'] += calories
+        data['protein'] += protein
+        data['carbs'] += carbs
+        data['fat'] += fat
+    for day, _, amount in WATER:
+        data = daily_data.setdefault(day.strftime('%Y-%m-%d'), {
+            'food': [], 'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'water': 0})
+        data['water'] += amount
+    return [dict(date=date_str, **data) for date_str, data in sorted(daily_data.items())]
+
+
+def download(client, fmt, **params):
+    response = client.get(f'/auth/export/{fmt}', query_string=params)
+    assert response.status_code == 200
+    assert response.is_streamed
+    return response
+
+
+def test_json_matches_the_baseline_document(client, entries):
+    login(client)
+    response = download(client, 'json')
+    assert response.mimetype == 'application/json'
+
+    baseline = json.dumps({
+        'user': 'tester',
+        'export_date': datetime.now().strftime('%Y-%m-%d'),
+        'nutrition_data': baseline_daily_data()
+    }, indent=4)
+    text = response.get_data(as_text=True)
+    assert json.loads(text) == json.loads(baseline)
+    assert text == baseline
+
+
+def test_csv_matches_the_baseline_rows(client, entries):
+    login(client)
+    rows = list(csv.reader(io.StringIO(download(client, 'csv').get_data(as_text=True))))
+
+    assert rows[0] == ['Date', 'Food', 'Calories', 'Protein', 'Carbs', 'Fat', 'Water (ml)']
+    assert rows[1:] == [
+        [day['date'], ', '.join(day['food']) or 'No food entries', str(day['calories']), str(day['protein']),
+         str(day['carbs']), str(day['fat']), str(day['water'])]
+        for day in baseline_daily_data()
+    ]
+
+
+def test_jsonl_has_one_baseline_record_per_line(client, entries):
+    login(client)
+    lines = download(client, 'jsonl').get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == baseline_daily_data()
+
+
+def test_entry_mode_interleaves_food_and_water(client, entries):
+    login(client)
+    records = [json.loads(line) for line in download(client, 'jsonl', mode='entries').get_data(as_text=True).splitlines()]
+    assert [(record['date'], record['time'], record['type']) for record in records] == [
+        ('2026-10-11', '09:00:00', 'food'),
+        ('2026-10-12', None, 'water'),
+        ('2026-10-12', '08:00:00', 'food'),
+        ('2026-10-12', '10:00:00', 'water'),
+        ('2026-10-12', '19:00:00', 'food'),
+        ('2026-10-13', '07:00:00', 'water'),
+        ('2026-10-14', '12:30:00', 'food'),
+        ('2026-10-14', '12:30:00', 'water'),
+    ]
+
+    document = json.loads(download(client, 'json', mode='entries').get_data(as_text=True))
+    assert document['nutrition_data'] == records
+
+    rows = list(csv.reader(io.StringIO(download(client, 'csv', mode='entries').get_data(as_text=True))))
+    assert rows[0] == ENTRY_CSV_HEADER
+    assert len(rows) == len(records) + 1
+
+
+def test_date_range_limits_every_format(client, entries):
+    login(client)
+    params = {'start': '2026-10-12', 'end': '2026-10-13'}
+    expected = [day for day in baseline_daily_data() if '2026-10-12' <= day['date'] <= '2026-10-13']
+
+    assert json.loads(download(client, 'json', **params).get_data(as_text=True))['nutrition_data'] == expected
+    assert [json.loads(line) for line in download(client, 'jsonl', **params).get_data(as_text=True).splitlines()] \
+        == expected
+    assert len(download(client, 'csv', **params).get_data(as_text=True).splitlines()) == len(expected) + 1
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl', 'json'])
+def test_empty_export_is_well_formed(client, user, fmt):
+    login(client)
+    text = download(client, fmt).get_data(as_text=True)
+    if fmt == 'json':
+        assert json.loads(text)['nutrition_data'] == []
+    elif fmt == 'jsonl':
+        assert text == ''
+    else:
+        assert text.splitlines() == ['Date,Food,Calories,Protein,Carbs,Fat,Water (ml)']
@@ -0,0 +1,150 @@
+import random
+from datetime import date, timedelta
+from conftest import login
+from models import db, User, GoalProgress
+from utils.goal_progress import BITMAP_DAYS, rebuild_goal_progress, goal_progress_summary
+from utils.nutrition_db import NutritionDatabase
+
+DAY = date(2026, 10, 14)
+HIT_CALORIES, MISS_CALORIES = 2000, 500  # against the fixture user's 2000 kcal goal
+
+
+def add_food(user_id, calories, day):
+    return NutritionDatabase.add_food_entry(user_id, {
+        'food_description': 'Meal', 'calories': calories, 'date_logged': day
+    })
+
+
+def progress_state(user_id):
+    """Streaks, the set of hit days the bitmap records and the summary as seen on a few later days"""
+    db.session.expire_all()
+    progress = db.session.get(GoalProgress, user_id)
+    user = db.session.get(User, user_id)
+    hits = set()
+    if progress.hit_bitmap_end is not None:
+        bitmap = int(progress.hit_bitmap, 16)
+        hits = {progress.hit_bitmap_end - timedelta(days=i) for i in range(BITMAP_DAYS) if bitmap >> i & 1}
+        # Only the newest BITMAP_DAYS days up to the last hit are guaranteed to be kept
+        hits = {day for day in hits if (progress.streak_end - day).days < BITMAP_DAYS}
+    last = progress.streak_end or DAY
+    return {
+        'current_streak': progress.current_streak,
+        'streak_end': progress.streak_end,
+        'longest_streak': progress.longest_streak,
+        'longest_streak_end': progress.longest_streak_end,
+        'hits': hits,
+        'summaries': [goal_progress_summary(user, last + timedelta(days=offset)) for offset in (0, 1, 2, 45, 100)],
+    }
+
+
+def assert_matches_rebuild(user_id):
+    incremental = progress_state(user_id)
+    rebuild_goal_progress(user_id)
+    assert incremental == progress_state(user_id)
+    return incremental
+
+
+def test_out_of_order_adds_match_the_rebuild(app, user):
+    # Two runs (5 and 3 days) with a one-day gap, plus scattered older hits
+    days = [DAY - timedelta(days=offset) for offset in (0, 1, 2, 4, 5, 6, 7, 8, 12, 20, 21)]
+    random.Random(7).shuffle(days)
+    with app.app_context():
+        add_food(user, MISS_CALORIES, DAY - timedelta(days=3))
+        for day in days:
+            add_food(user, HIT_CALORIES, day)
+            assert_matches_rebuild(user)
+        state = assert_matches_rebuild(user)
+
+    assert (state['current_streak'], state['streak_end']) == (3, DAY)
+    assert (state['longest_streak'], state['longest_streak_end']) == (5, DAY - timedelta(days=4))
+    assert state['summaries'][0]['hits_7d'] == 6
+
+
+def test_a_second_entry_can_turn_a_day_into_a_hit_and_out_again(app, user):
+    with app.app_context():
+        for offset in (3, 2, 1):
+            add_food(user, HIT_CALORIES, DAY - timedelta(days=offset))
+        add_food(user, 1000, DAY)
+        assert assert_matches_rebuild(user)['current_streak'] == 3
+        add_food(user, 1000, DAY)  # 2000 now
+        assert assert_matches_rebuild(user)['current_streak'] == 4
+        add_food(user, 1000, DAY)  # 3000, over the goal
+        assert assert_matches_rebuild(user)['current_streak'] == 3
+
+
+def test_deletes_inside_a_streak_match_the_rebuild(app, user):
+    with app.app_context():
+        entries = {offset: add_food(user, HIT_CALORIES, DAY - timedelta(days=offset)) for offset in range(10)}
+        assert assert_matches_rebuild(user)['longest_streak'] == 10
+
+        # Split the run in the middle
+        NutritionDatabase.delete_food_entry(entries.pop(4))
+        state = assert_matches_rebuild(user)
+        assert (state['current_streak'], state['longest_streak']) == (4, 5)
+
+        # Trim the end of the current run, which is not the longest
+        NutritionDatabase.delete_food_entry(entries.pop(0))
+        state = assert_matches_rebuild(user)
+        assert (state['current_streak'], state['streak_end']) == (3, DAY - timedelta(days=1))
+
+        # Trim the end of the longest run
+        NutritionDatabase.delete_food_entry(entries.pop(5))
+        state = assert_matches_rebuild(user)
+        assert (state['longest_streak'], state['longest_streak_end']) == (4, DAY - timedelta(days=6))
+
+        # Remove the whole current run
+        for offset in (1, 2, 3):
+            NutritionDatabase.delete_food_entry(entries.pop(offset))
+        state = assert_matches_rebuild(user)
+        assert (state['current_streak'], state['streak_end']) == (4, DAY - timedelta(days=6))
+
+
+def test_gap_longer_than_the_bitmap_matches_the_rebuild(app, user):
+    old_run = [DAY - timedelta(days=BITMAP_DAYS + offset) for offset in range(40, 45)]
+    with app.app_context():
+        for day in old_run:
+            add_food(user, HIT_CALORIES, day)
+        assert assert_matches_rebuild(user)['hits'] == set(old_run)
+
+        today = add_food(user, HIT_CALORIES, DAY)
+        state = assert_matches_rebuild(user)
+        assert state['hits'] == {DAY}  # the old run has left the bitmap
+        assert (state['current_streak'], state['longest_streak']) == (1, 5)
+
+        # An out-of-order day inside the bitmap window, then one before it
+        add_food(user, HIT_CALORIES, DAY - timedelta(days=60))
+        add_food(user, HIT_CALORIES, DAY - timedelta(days=BITMAP_DAYS + 10))
+        assert assert_matches_rebuild(user)['hits'] == {DAY, DAY - timedelta(days=60)}
+
+        # Deleting the only recent hit falls back to the older ones
+        NutritionDatabase.delete_food_entry(today)
+        state = assert_matches_rebuild(user)
+        assert state['streak_end'] == DAY - timedelta(days=60)
+        assert DAY - timedelta(days=BITMAP_DAYS + 10) in state['hits']
+
+
+def test_goal_change_through_the_profile_matches_the_rebuild(app, client, user):
+    with app.app_context():
+        for offset in range(6):
+            add_food(user, HIT_CALORIES if offset % 2 else 2500, DAY - timedelta(days=offset))
+        state = assert_matches_rebuild(user)
+        assert (state['current_streak'], state['longest_streak']) == (1, 1)
+
+    login(client)
+    response = client.post('/auth/profile', data={
+        'update_type': 'goals', 'calorie_goal': 2400, 'protein_goal': 150, 'carbs_goal': 200,
+        'fat_goal': 65, 'water_goal': 2500
+    })
+    assert response.status_code == 302
+
+    with app.app_context():
+        # 2500 kcal days are now within 10% of the goal and 2000 kcal days are under it
+        state = progress_state(user)
+        assert state['hits'] == {DAY - timedelta(days=offset) for offset in (0, 2, 4)}
+        assert assert_matches_rebuild(user) == state
+
+        # Later entries are judged against the new goal
+        add_food(user, 2400, DAY + timedelta(days=1))
+        add_food(user, 400, DAY - timedelta(days=1))  # 2400 now, joins the run
+        state = assert_matches_rebuild(user)
+        assert (state['current_streak'], state['streak_end']) == (4, DAY + timedelta(days=1))
@@ -0,0 +1,123 @@
+import io
+import random
+import threading
+import time
+import pytest
+from PIL import Image
+from conftest import make_app
+from utils import image_cache
+from utils.image_cache import ImageAnalysisCache, content_hash, get_image_cache, hamming_distance, perceptual_hash
+
+RESULT = {'food_description': 'Pasta', 'calories': 650}
+
+
+def photo(seed, size=256):
+    """A blocky test image: random 8x8 grey levels scaled up, so its dHash is well defined"""
+    rng = random.Random(seed)
+    small = Image.new('L', (8, 8))
+    small.putdata([rng.randrange(256) for _ in range(64)])
+    return small.resize((size, size), Image.NEAREST).convert('RGB')
+
+
+def jpeg_bytes(image, quality=90):
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ImageAnalysisCache(str(tmp_path / 'image_cache.db'), ttl=60, max_distance=3)
+
+
+def test_dhash_is_stable_across_resizing_and_recompression():
+    original = photo(1)
+    recompressed = Image.open(io.BytesIO(jpeg_bytes(original.resize((180, 180)), quality=40)))
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(recompressed)) <= 3
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(photo(2))) > 3
+
+
+def test_identical_upload_is_an_exact_hit(cache):
+    data = jpeg_bytes(photo(1))
+    dhash = perceptual_hash(photo(1))
+    cache.store(content_hash(data), dhash, RESULT)
+    assert cache.lookup(content_hash(data), dhash) == (RESULT, 'exact')
+
+
+def test_recompressed_upload_is_a_near_hit(cache):
+    original = jpeg_bytes(photo(1))
+    cache.store(content_hash(original), perceptual_hash(photo(1)), RESULT)
+
+    smaller = jpeg_bytes(photo(1).resize((180, 180)), quality=40)
+    dhash = perceptual_hash(Image.open(io.BytesIO(smaller)))
+    assert cache.lookup(content_hash(smaller), dhash) == (RESULT, 'near')
+
+
+@pytest.mark.parametrize('bits', [0b1, 0b101, 0b10000000000000001000000000000000100000000000000010])
+def test_near_hits_up_to_the_maximum_distance(cache, bits):
+    # Flipped bits spread over several bands still leave one band in common
+    dhash = 0x0123456789abcdef
+    cache.store('stored', dhash, RESULT)
+    distance = bin(bits).count('1')
+    expected = (RESULT, 'near') if distance <= 3 else (None, 'miss')
+    assert cache.lookup('other', dhash ^ bits) == expected
+
+
+def test_distant_image_is_a_miss(cache):
+    cache.store('stored', perceptual_hash(photo(1)), RESULT)
+    assert cache.lookup('other', perceptual_hash(photo(2))) == (None, 'miss')
+
+
+def test_exact_only_when_max_distance_is_zero(tmp_path):
+    cache = ImageAnalysisCache(str(tmp_path / 'image_cache.db'), max_distance=0)
+    cache.store('stored', 0xff, RESULT)
+    assert cache.lookup('other', 0xfe) == (None, 'miss')
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(image_cache.time, 'time', lambda: now[0])
+    cache.store('stored', 0xff, RESULT)
+    now[0] += 59
+    assert cache.lookup('stored', 0xff) == (RESULT, 'exact')
+    now[0] += 2
+    assert cache.lookup('stored', 0xff) == (None, 'miss')
+
+
+def test_oldest_entries_are_evicted_at_the_entry_limit(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(image_cache.time, 'time', lambda: now[0])
+    cache = ImageAnalysisCache(str(tmp_path / 'image_cache.db'), max_distance=0, max_entries=2)
+    for digest in ('a', 'b', 'c'):
+        now[0] += 1
+        cache.store(digest, 0xff, {'digest': digest})
+
+    assert cache.lookup('a', 0xff) == (None, 'miss')
+    assert cache.lookup('c', 0xff) == ({'digest': 'c'}, 'exact')
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert (stats['exact_hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_concurrent_first_use_builds_one_cache(tmp_path, monkeypatch):
+    app = make_app(tmp_path, IMAGE_CACHE_PATH=str(tmp_path / 'image_cache.db'))
+
+    class SlowCache(ImageAnalysisCache):
+        def __init__(self, *args, **kwargs):
+            time.sleep(0.05)  # widen the window in which two requests could both see no cache
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(image_cache, 'ImageAnalysisCache', SlowCache)
+    barrier = threading.Barrier(8)
+    caches = []
+
+    def first_request():
+        barrier.wait()
+        caches.append(get_image_cache(app))
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(cache) for cache in caches}) == 1
@@ -0,0 +1,72 @@
+import re
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from conftest import login
+from models import db
+from utils.instrumentation import get_metrics
+
+DB_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+PAUSE = 0.3  # seconds between the failed statement and the next one on the same connection
+
+
+def metric_value(text_format, name, endpoint):
+    match = re.search(rf'^{name}{{endpoint="{re.escape(endpoint)}"}} ([\d.]+)$', text_format, re.M)
+    return float(match.group(1)) if match else 0
+
+
+def test_failed_statements_do_not_disturb_later_timings(app):
+    with app.app_context():
+        metrics = get_metrics()
+        before = metrics.db_statements.series.get(('background',), 0)
+        seconds_before = metrics.db_seconds.series.get(('background',), 0)
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+            time.sleep(PAUSE)
+            assert conn.execute(text('SELECT 1')).scalar() == 1
+
+        # Only the statement that completed is counted, and not timed from the failed one's start
+        assert metrics.db_statements.series[('background',)] == before + 1
+        assert metrics.db_seconds.series[('background',)] - seconds_before < PAUSE
+
+
+def test_next_request_timings_and_metrics_add_up_after_a_failed_statement(app, client, user):
+    app.config['METRICS_TOKEN'] = 'scrape'
+    login(client)
+    with app.app_context():
+        # Leave a single pooled connection, the one whose statement failed, for the request to reuse
+        db.engine.dispose()
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+    time.sleep(PAUSE)
+
+    response = client.get('/api/weekly_nutrition')
+    assert response.status_code == 200
+    db_ms, queries = DB_TIMING.search(response.headers['Server-Timing']).groups()
+    assert float(db_ms) < PAUSE * 1000
+    assert int(queries) > 0
+
+    scraped = client.get('/metrics', headers={'Authorization': 'Bearer scrape'})
+    assert scraped.status_code == 200
+    body = scraped.get_data(as_text=True)
+    endpoint = 'api.get_weekly_nutrition'
+    assert metric_value(body, 'nutrition_db_statements_total', endpoint) == int(queries)
+    assert metric_value(body, 'nutrition_http_request_db_statements_sum', endpoint) == int(queries)
+    assert metric_value(body, 'nutrition_http_request_db_statements_count', endpoint) == 1
+    assert metric_value(body, 'nutrition_db_seconds_total', endpoint) < PAUSE
+
+
+def test_dashboard_sections_are_reported_when_the_snapshot_is_loaded(app, client, user):
+    login(client)
+    fetched = client.get('/dashboard').headers['Server-Timing']
+    assert 'dashboard.summary;dur=' in fetched
+    assert 'dashboard.food_entries;dur=' in fetched
+
+    # Served from the snapshot cache: nothing was loaded
+    cached = client.get('/dashboard').headers['Server-Timing']
+    assert 'dashboard.' not in cached
+    with app.app_context():
+        assert get_metrics().sections.series[('dashboard.summary',)][2] == 1
@@ -0,0 +1,25 @@
+import pytest
+from utils.nutrition_db import parse_food_item
+
+
+def item(**fields):
+    return dict({'food_description': 'Apple', 'calories': 95}, **fields)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (True, True), (False, False), (None, False), (1, True), (0, False),
+    ('true', True), ('True', True), ('yes', True), ('on', True), ('1', True),
+    ('false', False), ('False', False), ('no', False), ('off', False), ('0', False), ('', False),
+])
+def test_ai_analyzed_parses_booleans_and_boolean_strings(value, expected):
+    assert parse_food_item(item(ai_analyzed=value))['ai_analyzed'] is expected
+
+
+def test_ai_analyzed_defaults_to_false():
+    assert parse_food_item(item())['ai_analyzed'] is False
+
+
+@pytest.mark.parametrize('value', ['maybe', 2, 0.5, []])
+def test_ai_analyzed_rejects_other_values(value):
+    with pytest.raises(ValueError, match='ai_analyzed'):
+        parse_food_item(item(ai_analyzed=value))
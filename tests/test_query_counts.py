@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from conftest import login
+from models import db
+from utils.nutrition_db import NutritionDatabase
+
+
+@pytest.fixture
+def logged_in(app, client, user):
+    """The test user, logged in, with three food entries and a water log on each of the last 30 days"""
+    today = datetime.utcnow().date()
+    with app.app_context():
+        for offset in range(30):
+            day = today - timedelta(days=offset)
+            for meal in range(3):
+                NutritionDatabase.add_food_entry(user, {
+                    'food_description': f'Meal {meal}', 'calories': 400 + meal * 100, 'protein': 20,
+                    'carbs': 50, 'fat': 10, 'food_category': 'grain', 'date_logged': day
+                })
+            NutritionDatabase.add_water_intake(user, 500, day)
+    login(client)
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run while the test makes its requests"""
+    with app.app_context():
+        engine = db.engine
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def count(client, statements, path):
+    statements.clear()
+    response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+# The user loader's SELECT is included in every count
+@pytest.mark.parametrize('path, limit', [
+    ('/dashboard', 6),
+    ('/api/nutrition_data/{today}', 4),
+    ('/api/weekly_nutrition', 2),
+])
+def test_read_endpoints_run_a_fixed_number_of_queries(logged_in, statements, path, limit):
+    path = path.format(today=datetime.utcnow().date().isoformat())
+    assert count(logged_in, statements, path) <= limit
+
+
+def test_nutrition_trends_query_count_does_not_grow_with_the_range(logged_in, statements):
+    week = count(logged_in, statements, '/stats/api/nutrition-trends?days=7')
+    year = count(logged_in, statements, '/stats/api/nutrition-trends?days=365')
+    assert week == year <= 2
+
+
+def test_weekly_stats_is_one_query(app, logged_in, statements, user):
+    with app.app_context():
+        statements.clear()
+        stats = NutritionDatabase.get_weekly_stats(user, days=7)
+    assert len(statements) == 1
+    assert stats['days_logged'] == 7
+    assert stats['avg_calories'] == 1500
@@ -0,0 +1,33 @@
+import pytest
+from conftest import make_app
+from utils.query_plans import check_hot_queries, uses_index
+
+
+@pytest.fixture
+def migrated_app(tmp_path):
+    return make_app(tmp_path, migrate=True)
+
+
+def test_hot_queries_use_indexes(migrated_app):
+    with migrated_app.app_context():
+        results = check_hot_queries()
+
+    assert results
+    not_indexed = {name: plan for name, plan, indexed in results if not indexed}
+    assert not_indexed == {}
+
+
+@pytest.mark.parametrize('line', [
+    'SCAN food_entry',
+    'USE TEMP B-TREE FOR ORDER BY',
+    'USE TEMP B-TREE FOR GROUP BY',
+    'USE TEMP B-TREE FOR DISTINCT',
+])
+def test_full_scans_and_temp_sorts_are_not_indexed(app, line):
+    with app.app_context():
+        assert uses_index(['SEARCH food_entry USING INDEX ix_food_entry_user_date (user_id=?)', line]) is False
+
+
+def test_index_search_is_indexed(app):
+    with app.app_context():
+        assert uses_index(['SEARCH food_entry USING COVERING INDEX ix_food_entry_user_category (user_id=?)'])
@@ -0,0 +1,113 @@
+from datetime import datetime
+import pytest
+from conftest import login
+from models import db, User, FoodEntry, WaterIntake
+
+TRENDS = '/stats/api/nutrition-trends?days=7'
+ACHIEVEMENT = '/stats/api/goal-achievement?days=7'
+
+
+@pytest.fixture
+def logged_in(client, user):
+    login(client)
+    return client
+
+
+def today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def add_food(client, calories):
+    return client.post('/add_food', data={
+        'food_description': 'Meal', 'calories': calories, 'protein': 10, 'carbs': 20, 'fat': 5,
+        'date_logged': today()
+    })
+
+
+def change_calorie_goal(client, calorie_goal):
+    return client.post('/auth/profile', data={
+        'update_type': 'goals', 'calorie_goal': calorie_goal, 'protein_goal': 150, 'carbs_goal': 200,
+        'fat_goal': 65, 'water_goal': 2500
+    })
+
+
+def todays_calories(response):
+    return response.get_json()['datasets'][0]['data'][-1]
+
+
+def test_matching_etag_answers_304(logged_in):
+    first = logged_in.get(TRENDS)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    revalidated = logged_in.get(TRENDS, headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == first.headers['ETag']
+
+    # Another range is another resource
+    other = logged_in.get('/stats/api/nutrition-trends?days=30', headers={'If-None-Match': first.headers['ETag']})
+    assert other.status_code == 200
+
+
+def test_adding_and_deleting_food_invalidates(app, logged_in, user):
+    first = logged_in.get(TRENDS)
+    assert todays_calories(first) == 0
+
+    add_food(logged_in, 650)
+    added = logged_in.get(TRENDS, headers={'If-None-Match': first.headers['ETag']})
+    assert added.status_code == 200
+    assert added.headers['ETag'] != first.headers['ETag']
+    assert todays_calories(added) == 650
+
+    with app.app_context():
+        entry_id = FoodEntry.query.filter_by(user_id=user).one().id
+    logged_in.post(f'/delete_food/{entry_id}')
+    deleted = logged_in.get(TRENDS, headers={'If-None-Match': added.headers['ETag']})
+    assert deleted.status_code == 200
+    assert todays_calories(deleted) == 0
+
+
+def test_water_entries_invalidate(app, logged_in, user):
+    first = logged_in.get(ACHIEVEMENT)
+    logged_in.post('/add_water', data={'amount_ml': 500, 'date_logged': today()})
+    added = logged_in.get(ACHIEVEMENT, headers={'If-None-Match': first.headers['ETag']})
+    assert added.status_code == 200
+
+    with app.app_context():
+        entry_id = WaterIntake.query.filter_by(user_id=user).one().id
+    logged_in.post(f'/delete_water/{entry_id}')
+    deleted = logged_in.get(ACHIEVEMENT, headers={'If-None-Match': added.headers['ETag']})
+    assert deleted.status_code == 200
+
+
+def test_goal_change_invalidates(logged_in):
+    add_food(logged_in, 2000)
+    first = logged_in.get(ACHIEVEMENT)
+    within, under, over, _ = first.get_json()['datasets'][0]['data']
+    assert (within, under, over) == (1, 0, 0)
+
+    change_calorie_goal(logged_in, 3000)
+    changed = logged_in.get(ACHIEVEMENT, headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    within, under, over, _ = changed.get_json()['datasets'][0]['data']
+    assert (within, under, over) == (0, 1, 0)
+
+    # Back to the old goal: a fresh response, not the one cached before the change
+    change_calorie_goal(logged_in, 2000)
+    restored = logged_in.get(ACHIEVEMENT, headers={'If-None-Match': changed.headers['ETag']})
+    assert restored.status_code == 200
+    assert restored.get_json()['datasets'][0]['data'][:3] == [1, 0, 0]
+
+
+def test_another_users_etag_does_not_match(app, client, logged_in):
+    etag = logged_in.get(TRENDS).headers['ETag']
+    logged_in.get('/auth/logout')
+
+    with app.app_context():
+        other = User(username='other', email='other@example.com')
+        other.set_password('secret123')
+        db.session.add(other)
+        db.session.commit()
+    login(client, email='other@example.com')
+    assert client.get(TRENDS, headers={'If-None-Match': etag}).status_code == 200
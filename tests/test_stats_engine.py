@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+import pytest
+from utils.nutrition_db import NutritionDatabase
+from utils.stats_engine import DailySeries, compare_periods, compute_overview, percent_change
+from models import db, User
+
+TODAY = date(2026, 10, 14)  # a Wednesday; its week starts on 2026-10-12
+WEEK_START = date(2026, 10, 12)
+
+
+def log(user_id, day, calories, protein=0):
+    NutritionDatabase.add_food_entry(user_id, {
+        'food_description': 'Meal', 'calories': calories, 'protein': protein, 'carbs': 0, 'fat': 0,
+        'date_logged': day
+    })
+
+
+def test_percent_change_without_a_previous_value():
+    assert percent_change(1500, 0) == 0
+    assert percent_change(0, 0) == 0
+    assert percent_change(1500, 1000) == 50.0
+
+
+def test_compare_periods_with_no_logged_days(app, user):
+    with app.app_context():
+        current, previous = compare_periods(user, 'week', 2, today=TODAY)
+
+    for period in (current, previous):
+        assert period['days_logged'] == 0
+        assert period['avg_calories'] == period['avg_protein'] == 0
+    assert current['percent_change'] == {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
+
+
+def test_compare_periods_averages_per_logged_day_in_a_partial_week(app, user):
+    with app.app_context():
+        # Two entries on Monday count as one day; Tuesday and Wednesday are logged once; the rest are empty
+        log(user, WEEK_START, 1000, protein=50)
+        log(user, WEEK_START, 800, protein=30)
+        log(user, WEEK_START + timedelta(days=1), 1500, protein=60)
+        log(user, WEEK_START + timedelta(days=2), 2100, protein=100)
+        # Last week: a single logged day
+        log(user, WEEK_START - timedelta(days=3), 1600, protein=80)
+        current, previous = compare_periods(user, 'week', 2, today=TODAY)
+
+    assert (current['start'], current['end']) == ('2026-10-12', '2026-10-18')
+    assert current['days_logged'] == 3
+    assert current['avg_calories'] == 1800.0
+    assert current['avg_protein'] == 80.0
+    assert previous['days_logged'] == 1
+    assert previous['avg_calories'] == 1600.0
+    assert current['percent_change']['calories'] == 12.5
+    assert current['percent_change']['protein'] == 0.0
+
+
+def test_series_averages_with_no_logged_days(app, user):
+    with app.app_context():
+        series = DailySeries.load(user, WEEK_START, WEEK_START + timedelta(days=6))
+
+    assert series.days_logged() == 0
+    assert series.averages() == {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'fiber': 0, 'water_ml': 0}
+
+
+def test_overview_of_an_empty_period(app, user):
+    with app.app_context():
+        overview = compute_overview(db.session.get(User, user), 7, end_date=TODAY)
+
+    assert overview['days_logged'] == 0
+    assert set(overview['percent_change'].values()) == {0}
+    assert overview['goal_achievement'] == {'within': 0, 'under': 0, 'over': 0, 'no_data': 7}
+
+
+@pytest.mark.parametrize('calories, expected', [
+    (1799, 'under'),   # just below 90% of the 2000 kcal goal
+    (1800, 'within'),  # exactly 90%
+    (2000, 'within'),
+    (2200, 'within'),  # exactly 110%
+    (2201, 'over'),    # just above 110%
+])
+def test_goal_achievement_boundaries(app, user, calories, expected):
+    with app.app_context():
+        log(user, TODAY, calories)
+        counts = DailySeries.load(user, WEEK_START, TODAY).goal_achievement()
+
+    assert counts[expected] == 1
+    assert counts['within'] + counts['under'] + counts['over'] == 1
+    assert counts['no_data'] == 2
+
+
+def test_goal_achievement_follows_goal_changes(app, user):
+    from utils.goal_progress import rebuild_goal_progress
+    with app.app_context():
+        log(user, TODAY, 2000)
+        db.session.get(User, user).calorie_goal = 3000
+        db.session.commit()
+        rebuild_goal_progress(user)
+        counts = DailySeries.load(user, TODAY, TODAY).goal_achievement()
+
+    assert counts == {'within': 0, 'under': 1, 'over': 0, 'no_data': 0}
+
+
+def test_water_only_days_have_no_goal_status(app, user):
+    with app.app_context():
+        NutritionDatabase.add_water_intake(user, 500, TODAY)
+        counts = DailySeries.load(user, TODAY, TODAY).goal_achievement()
+
+    assert counts == {'within': 0, 'under': 0, 'over': 0, 'no_data': 1}
+
+
+def test_category_calories_are_integers(app, user):
+    with app.app_context():
+        log(user, TODAY, 650)
+        log(user, TODAY, 350)
+        categories = compute_overview(db.session.get(User, user), 7, end_date=TODAY)['categories']
+
+    assert categories == [{'category': 'other', 'calories': 1000, 'entries': 2}]
+    assert isinstance(categories[0]['calories'], int)
+
+
+def test_daily_totals_are_the_statistics_series(app, user):
+    with app.app_context():
+        log(user, WEEK_START, 900, protein=40)
+        log(user, TODAY, 1200, protein=55)
+        NutritionDatabase.add_water_intake(user, 750, TODAY)
+        days = NutritionDatabase.get_daily_totals(user, WEEK_START, TODAY)
+        series = DailySeries.load(user, WEEK_START, TODAY)
+
+    assert [day['date'] for day in days] == [WEEK_START, WEEK_START + timedelta(days=1), TODAY]
+    assert [day['calories'] for day in days] == list(series['calories']) == [900, 0, 1200]
+    assert [day['protein'] for day in days] == list(series['protein'])
+    assert days[1]['food_entry_count'] == 0 and days[1]['water_ml'] == 0
+    assert (days[2]['water_ml'], days[2]['water_entry_count']) == (750, 1)
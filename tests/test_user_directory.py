@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import make_app
+from models import db, User
+from utils.query_plans import explain
+from utils.user_directory import list_users, search_clause, decode_cursor
+
+BASE = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def users(app):
+    """23 users besides the seeded admin; signups come in pairs with the same timestamp and every third never logged in"""
+    with app.app_context():
+        for i in range(23):
+            user = User(username=f'member{i:02d}', email=f'member{i:02d}@example.com',
+                        created_at=BASE + timedelta(hours=i // 2),
+                        last_login=None if i % 3 == 0 else BASE + timedelta(days=i % 5))
+            user.set_password('secret123')
+            db.session.add(user)
+        for username, email in (('Alice', 'alice@example.com'), ('bob', 'Alice.Smith@Example.com')):
+            user = User(username=username, email=email, created_at=BASE)
+            user.set_password('secret123')
+            db.session.add(user)
+        db.session.commit()
+        return {user.id: (user.created_at, user.last_login) for user in User.query}
+
+
+def all_pages(sort, descending, per_page=4):
+    ids, cursor = [], None
+    while True:
+        page, next_cursor = list_users(sort=sort, descending=descending, cursor=cursor and decode_cursor(cursor),
+                                       per_page=per_page)
+        ids += [user.id for user in page]
+        if next_cursor is None:
+            return ids
+        assert len(page) == per_page
+        cursor = next_cursor
+
+
+@pytest.mark.parametrize('sort', ['created_at', 'last_login'])
+@pytest.mark.parametrize('descending', [True, False])
+def test_pages_cover_every_user_once_in_a_stable_order(app, users, sort, descending):
+    column = 0 if sort == 'created_at' else 1
+    filled = sorted((user_id for user_id, values in users.items() if values[column] is not None),
+                    key=lambda user_id: (users[user_id][column], user_id), reverse=descending)
+    empty = sorted((user_id for user_id, values in users.items() if values[column] is None), reverse=descending)
+
+    with app.app_context():
+        ids = all_pages(sort, descending)
+        # Same pages again: the order does not depend on anything but the data
+        assert all_pages(sort, descending) == ids
+
+    assert len(ids) == len(set(ids)) == len(users)
+    assert ids == filled + empty  # ties broken by id, users without a value last
+
+
+def test_page_size_of_one_crosses_every_tie(app, users):
+    with app.app_context():
+        assert sorted(all_pages('created_at', True, per_page=1)) == sorted(users)
+
+
+@pytest.mark.parametrize('search, expected', [
+    ('alice', {'Alice', 'bob'}),
+    ('ALI', {'Alice', 'bob'}),
+    ('Alice.smith@', {'bob'}),
+    ('BOB', {'bob'}),
+    ('MEMBER0', {f'member0{i}' for i in range(10)}),
+    ('nobody', set()),
+])
+def test_search_ignores_case(app, users, search, expected):
+    with app.app_context():
+        page, _ = list_users(search=search, per_page=50)
+        assert {user.username for user in page} == expected
+
+
+@pytest.mark.parametrize('migrate', [False, True])
+def test_search_uses_the_lower_indexes(tmp_path, migrate):
+    app = make_app(tmp_path, migrate=migrate)
+    with app.app_context():
+        plan = '\n'.join(explain(User.query.filter(search_clause('Al'))))
+
+    assert 'ix_user_username_lower' in plan
+    assert 'ix_user_email_lower' in plan
+    assert 'SCAN user\n' not in plan + '\n'
@@ -0,0 +1,190 @@
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from utils.analysis_store import LocalSQLiteFile
+from utils.analysis_pipeline import analyze_upload
+
+# Job lifecycle: queued -> running -> done | failed
+FINISHED_STATUSES = ('done', 'failed')
+TIMEOUT_ERROR = 'Analysis timed out'
+
+_queue_lock = threading.Lock()
+
+
+class QueueFullError(Exception):
+    """Raised when the analysis queue of this worker is at capacity"""
+
+
+class AnalysisJobQueue:
+    """Bounded background executor for image analyses, with job state kept in a shared SQLite file"""
+
+    def __init__(self, app, path, max_workers=4, max_pending=32, job_timeout=300, retention=24 * 3600):
+        self.app = app
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.retention = retention
+        self._file = LocalSQLiteFile(path)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        with self._file.connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_job ('
+                'job_id TEXT PRIMARY KEY, '
+                'user_id INTEGER NOT NULL, '
+                'status TEXT NOT NULL, '
+                'filepath TEXT NOT NULL, '
+                'result TEXT, '
+                'error TEXT, '
+                'created_at REAL NOT NULL, '
+                'started_at REAL, '
+                'finished_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_job_status ON analysis_job (status)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_job_finished_at ON analysis_job (finished_at)')
+
+    def submit(self, user_id, filepath):
+        """Queue an analysis of a saved upload and return its job ID"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError('Too many analyses in progress, please try again shortly')
+            self._pending += 1
+
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        try:
+            with self._file.connection() as conn:
+                conn.execute(
+                    'INSERT INTO analysis_job (job_id, user_id, status, filepath, created_at) VALUES (?, ?, ?, ?, ?)',
+                    (job_id, user_id, 'queued', filepath, now)
+                )
+                self._expire(conn, now)
+            self._executor.submit(self._run, job_id, filepath)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def get(self, job_id, user_id):
+        """Return the job as a dict, or None if it doesn't exist or belongs to another user"""
+        with self._file.connection() as conn:
+            row = conn.execute(
+                'SELECT job_id, status, result, error, created_at, started_at, finished_at '
+                'FROM analysis_job WHERE job_id = ? AND user_id = ?',
+                (job_id, user_id)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, status, result, error, created_at, started_at, finished_at = row
+        # A job whose worker died never finishes; report it instead of polling forever
+        if status not in FINISHED_STATUSES and time.time() - created_at > self.job_timeout:
+            status, error = 'failed', TIMEOUT_ERROR
+
+        job = {'job_id': job_id, 'status': status}
+        if status == 'done':
+            job['result'] = json.loads(result)
+        elif status == 'failed':
+            job['error'] = error
+        return job
+
+    def stats(self, window=900):
+        """Queue depth plus wait/run times for jobs finished in the last `window` seconds"""
+        since = time.time() - window
+        with self._file.connection() as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM analysis_job WHERE status IN ('queued', 'running') GROUP BY status"
+            ).fetchall())
+            finished, failed, avg_wait, max_wait, avg_run, max_run = conn.execute(
+                'SELECT COUNT(*), '
+                "SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END), "
+                'AVG(started_at - created_at), MAX(started_at - created_at), '
+                'AVG(finished_at - started_at), MAX(finished_at - started_at) '
+                'FROM analysis_job WHERE finished_at >= ?',
+                (since,)
+            ).fetchone()
+        with self._lock:
+            local_pending = self._pending
+
+        def seconds(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'worker_pending': local_pending,
+            'worker_capacity': self.max_pending,
+            'window_seconds': window,
+            'finished': finished,
+            'failed': failed or 0,
+            'avg_wait_seconds': seconds(avg_wait),
+            'max_wait_seconds': seconds(max_wait),
+            'avg_run_seconds': seconds(avg_run),
+            'max_run_seconds': seconds(max_run)
+        }
+
+    def _expire(self, conn, now):
+        """Fail jobs left queued or running past the timeout and prune finished jobs past the retention period"""
+        conn.execute(
+            "UPDATE analysis_job SET status = 'failed', error = ?, finished_at = ? "
+            "WHERE status IN ('queued', 'running') AND created_at < ?",
+            (TIMEOUT_ERROR, now, now - self.job_timeout)
+        )
+        conn.execute('DELETE FROM analysis_job WHERE finished_at < ?', (now - self.retention,))
+
+    def _run(self, job_id, filepath):
+        try:
+            with self._file.connection() as conn:
+                started = conn.execute(
+                    "UPDATE analysis_job SET status = 'running', started_at = ? WHERE job_id = ? AND status = 'queued'",
+                    (time.time(), job_id)
+                ).rowcount
+            if not started:
+                # Expired while it waited for a thread; nobody is waiting for the result any more
+                return
+
+            try:
+                with self.app.app_context():
+                    result = analyze_upload(filepath)
+            except Exception as e:
+                self.app.logger.error(f"Error in analysis job {job_id}: {str(e)}")
+                result = {'error': 'An unexpected server error occurred during image analysis.'}
+
+            with self._file.connection() as conn:
+                if 'error' in result:
+                    conn.execute(
+                        "UPDATE analysis_job SET status = 'failed', error = ?, finished_at = ? "
+                        "WHERE job_id = ? AND status = 'running'",
+                        (result['error'], time.time(), job_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE analysis_job SET status = 'done', result = ?, finished_at = ? "
+                        "WHERE job_id = ? AND status = 'running'",
+                        (json.dumps(result), time.time(), job_id)
+                    )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+def get_job_queue(app=None):
+    """Return this worker's analysis job queue, creating it on first use"""
+    app = app or current_app._get_current_object()
+    with _queue_lock:
+        queue = app.extensions.get('analysis_jobs')
+        if queue is None:
+            queue = AnalysisJobQueue(
+                app,
+                app.config['ANALYSIS_JOBS_PATH'],
+                max_workers=app.config.get('ANALYSIS_JOB_WORKERS', 4),
+                max_pending=app.config.get('ANALYSIS_JOB_MAX_PENDING', 32),
+                job_timeout=app.config.get('ANALYSIS_JOB_TIMEOUT', 300)
+            )
+            app.extensions['analysis_jobs'] = queue
+    return queue
@@ -0,0 +1,59 @@
+import os
+import uuid
+from flask import current_app
+from werkzeug.utils import secure_filename
+from utils.analysis_store import remember_analysis
+from utils.image_cache import get_image_cache
+from utils.image_processing import preprocess_upload
+from utils.openrouter_ai import get_openrouter_client
+
+
+def save_upload(file):
+    """Save an uploaded image under a unique name and return its path on disk"""
+    # Create uploads directory if it doesn't exist
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    # Generate a unique filename
+    filename = secure_filename(file.filename)
+    unique_filename = f"{uuid.uuid4()}_{filename}"
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
+
+    file.save(filepath)
+    return filepath
+
+
+def analyze_upload(filepath):
+    """Analyze a saved upload, returning nutrition data or a dict with an 'error' key"""
+    # Downsize once: the result carries the model payload, fingerprints and thumbnail
+    processed = preprocess_upload(filepath)
+    image_url = f"/static/uploads/{os.path.basename(filepath)}"
+    thumbnail_url = None
+    if processed.thumbnail_path:
+        thumbnail_url = f"/static/uploads/thumbs/{os.path.basename(processed.thumbnail_path)}"
+
+    # Re-uploads of the same photo reuse the previous analysis
+    image_cache = get_image_cache()
+    if image_cache is not None:
+        cached_result, match_type = image_cache.lookup(processed.content_hash, processed.perceptual_hash)
+        if cached_result is not None:
+            cached_result['image_url'] = image_url
+            cached_result['thumbnail_url'] = thumbnail_url
+            cached_result['cache'] = match_type
+            remember_analysis(cached_result)
+            return cached_result
+
+    # Analyze the image. The OpenRouterAI client is responsible for adding
+    # 'image_url' and 'analysis_id' to the result upon success, or an 'error' key on failure.
+    result = get_openrouter_client().analyze_food_image(processed)
+
+    if 'error' in result:
+        current_app.logger.error(f"AI analysis failed: {result['error']}")
+        return result
+
+    if image_cache is not None:
+        image_cache.store(processed.content_hash, processed.perceptual_hash, {
+            key: value for key, value in result.items() if key not in ('analysis_id', 'image_url')
+        })
+
+    result['thumbnail_url'] = thumbnail_url
+    return result
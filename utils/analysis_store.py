@@ -0,0 +1,221 @@
+import os
+import json
+import uuid
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import current_app
+
+_store_lock = threading.Lock()
+
+
+class AnalysisStore(ABC):
+    """Base class for stores that hold AI analysis results until the user confirms them"""
+
+    @abstractmethod
+    def get(self, analysis_id):
+        """The stored data, or None when missing or expired"""
+
+    @abstractmethod
+    def put(self, analysis_id, data):
+        """Store data under analysis_id"""
+
+    @abstractmethod
+    def delete(self, analysis_id):
+        """Remove analysis_id if present"""
+
+    @abstractmethod
+    def stats(self):
+        """Entry counts and sizes for monitoring"""
+
+
+class MemoryAnalysisStore(AnalysisStore):
+    """Per-process LRU store with TTL, entry-count and byte limits"""
+
+    def __init__(self, ttl=3600, max_entries=10000, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # analysis_id -> (expires_at, size, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, analysis_id):
+        with self._lock:
+            item = self._entries.get(analysis_id)
+            if item is None:
+                return None
+            expires_at, size, payload = item
+            if expires_at < time.time():
+                self._remove(analysis_id)
+                return None
+            # Mark as most recently used
+            self._entries.move_to_end(analysis_id)
+            return json.loads(payload)
+
+    def put(self, analysis_id, data):
+        payload = json.dumps(data)
+        size = len(payload)
+        with self._lock:
+            if analysis_id in self._entries:
+                self._remove(analysis_id)
+            self._entries[analysis_id] = (time.time() + self.ttl, size, payload)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, analysis_id):
+        with self._lock:
+            if analysis_id in self._entries:
+                self._remove(analysis_id)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _remove(self, analysis_id):
+        _, size, _ = self._entries.pop(analysis_id)
+        self._bytes -= size
+
+    def _evict(self):
+        # Drop expired entries first, then least recently used until within limits
+        now = time.time()
+        for analysis_id in [key for key, item in self._entries.items() if item[0] < now]:
+            self._remove(analysis_id)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+
+class LocalSQLiteFile:
+    """Thread-safe access to a SQLite file shared by all worker processes on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def connection(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class SQLiteAnalysisStore(AnalysisStore):
+    """Store backed by a local SQLite file so every worker on the host sees the same results"""
+
+    def __init__(self, path, ttl=3600, max_entries=10000, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._file = LocalSQLiteFile(path)
+        self._connection = self._file.connection
+
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache ('
+                'analysis_id TEXT PRIMARY KEY, '
+                'payload TEXT NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'expires_at REAL NOT NULL, '
+                'accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_cache_accessed_at ON analysis_cache (accessed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_analysis_cache_expires_at ON analysis_cache (expires_at)')
+
+    def get(self, analysis_id):
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT payload FROM analysis_cache WHERE analysis_id = ? AND expires_at >= ?',
+                (analysis_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE analysis_cache SET accessed_at = ? WHERE analysis_id = ?', (now, analysis_id))
+        return json.loads(row[0])
+
+    def put(self, analysis_id, data):
+        payload = json.dumps(data)
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analysis_cache (analysis_id, payload, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (analysis_id, payload, len(payload), now + self.ttl, now)
+            )
+            self._evict(conn, now)
+
+    def delete(self, analysis_id):
+        with self._connection() as conn:
+            conn.execute('DELETE FROM analysis_cache WHERE analysis_id = ?', (analysis_id,))
+
+    def stats(self):
+        with self._connection() as conn:
+            entries, total_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+        return {'backend': 'sqlite', 'entries': entries, 'bytes': total_bytes}
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM analysis_cache WHERE expires_at < ?', (now,))
+
+        entries, total_bytes = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+        if entries > self.max_entries:
+            conn.execute(
+                'DELETE FROM analysis_cache WHERE analysis_id IN '
+                '(SELECT analysis_id FROM analysis_cache ORDER BY accessed_at LIMIT ?)',
+                (entries - self.max_entries,)
+            )
+
+        if total_bytes > self.max_bytes:
+            # Walk from the least recently used entry until enough bytes are freed
+            excess = total_bytes - self.max_bytes
+            victims = []
+            for analysis_id, size in conn.execute('SELECT analysis_id, size FROM analysis_cache ORDER BY accessed_at'):
+                if excess <= 0:
+                    break
+                victims.append((analysis_id,))
+                excess -= size
+            conn.executemany('DELETE FROM analysis_cache WHERE analysis_id = ?', victims)
+
+
+def create_analysis_store(config):
+    """Build the analysis store configured for the application"""
+    options = {
+        'ttl': config.get('ANALYSIS_CACHE_TTL', 3600),
+        'max_entries': config.get('ANALYSIS_CACHE_MAX_ENTRIES', 10000),
+        'max_bytes': config.get('ANALYSIS_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    }
+    backend = config.get('ANALYSIS_STORE_BACKEND', 'sqlite')
+
+    if backend == 'memory':
+        return MemoryAnalysisStore(**options)
+    if backend == 'sqlite':
+        return SQLiteAnalysisStore(config['ANALYSIS_STORE_PATH'], **options)
+    raise ValueError(f"Unknown analysis store backend: {backend}")
+
+
+def get_analysis_store(app=None):
+    """Return the analysis store for the current application, creating it on first use"""
+    app = app or current_app._get_current_object()
+    with _store_lock:
+        store = app.extensions.get('analysis_store')
+        if store is None:
+            store = create_analysis_store(app.config)
+            app.extensions['analysis_store'] = store
+    return store
+
+
+def remember_analysis(nutrition_data, app=None):
+    """Assign an analysis ID to a result and keep it until the user confirms the entry"""
+    analysis_id = str(uuid.uuid4())
+    nutrition_data['analysis_id'] = analysis_id
+    get_analysis_store(app).put(analysis_id, nutrition_data)
+    return analysis_id
@@ -0,0 +1,242 @@
+import sys
+import json
+import shutil
+import zipfile
+import tempfile
+from array import array
+from itertools import islice
+from datetime import date, datetime, timedelta
+from models import db, FoodEntry, WaterIntake
+from utils.nutrition_db import rebuild_daily_summaries
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet is optional; the stdlib column format is used instead
+    pa = None
+    pq = None
+
+ARCHIVE_VERSION = 1
+ROW_GROUP_SIZE = 50000
+IMPORT_BATCH_SIZE = 5000
+
+# Exported columns per table with their storage type; primary keys are reassigned on import
+TABLES = {
+    'food_entry': (FoodEntry, [
+        ('user_id', 'int'), ('food_description', 'str'), ('calories', 'int'),
+        ('protein', 'float'), ('carbs', 'float'), ('fat', 'float'), ('fiber', 'float'),
+        ('sugar', 'float'), ('sodium', 'float'), ('quantity', 'float'), ('unit', 'str'),
+        ('meal_type', 'str'), ('food_category', 'str'), ('image_url', 'str'),
+        ('ai_analyzed', 'bool'), ('date_logged', 'date'), ('created_at', 'datetime')
+    ]),
+    'water_intake': (WaterIntake, [
+        ('user_id', 'int'), ('amount_ml', 'int'), ('date_logged', 'date'), ('time_logged', 'datetime')
+    ])
+}
+
+# array typecodes for the stdlib format; dates are day ordinals, datetimes microseconds since the epoch
+TYPECODES = {'int': 'q', 'float': 'd', 'bool': 'b', 'date': 'i', 'datetime': 'q'}
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def parquet_available():
+    return pq is not None
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024)
+
+
+def _encode(kind, value):
+    if kind == 'date':
+        return value.toordinal()
+    if kind == 'datetime':
+        return (value - EPOCH) // MICROSECOND
+    return value
+
+
+def _decode(kind, value):
+    if kind == 'date':
+        return date.fromordinal(value)
+    if kind == 'datetime':
+        return EPOCH + timedelta(microseconds=value)
+    if kind == 'bool':
+        return bool(value)
+    return value
+
+
+def _write_column_group(archive, prefix, columns, rows):
+    """Write one row group as a compressed member per column"""
+    for index, (name, kind) in enumerate(columns):
+        values = [row[index] for row in rows]
+        if kind == 'str':
+            archive.writestr(f'{prefix}/{name}.json', json.dumps(values))
+            continue
+        nulls = bytes(value is None for value in values)
+        data = array(TYPECODES[kind], (0 if value is None else _encode(kind, value) for value in values))
+        archive.writestr(f'{prefix}/{name}.bin', data.tobytes())
+        if any(nulls):
+            archive.writestr(f'{prefix}/{name}.nulls', nulls)
+
+
+def _read_column_group(archive, prefix, columns, byteorder):
+    """Read one row group back into a list of row dicts"""
+    names = archive.namelist()
+    decoded = []
+    for name, kind in columns:
+        if kind == 'str':
+            decoded.append(json.loads(archive.read(f'{prefix}/{name}.json')))
+            continue
+        data = array(TYPECODES[kind])
+        data.frombytes(archive.read(f'{prefix}/{name}.bin'))
+        if byteorder != sys.byteorder:
+            data.byteswap()
+        values = [_decode(kind, value) for value in data]
+        if f'{prefix}/{name}.nulls' in names:
+            nulls = archive.read(f'{prefix}/{name}.nulls')
+            values = [None if null else value for value, null in zip(values, nulls)]
+        decoded.append(values)
+    return [dict(zip([name for name, _ in columns], row)) for row in zip(*decoded)]
+
+
+def _parquet_schema(columns):
+    types = {
+        'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'bool': pa.bool_(),
+        'date': pa.date32(), 'datetime': pa.timestamp('us')
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def export_columnar(target, user_id=None, fmt='auto', row_group_size=ROW_GROUP_SIZE):
+    """Write food and water entries (one user's, or everyone's) to a zip archive of columnar tables.
+
+    fmt is 'parquet' (needs pyarrow), 'columns' (stdlib arrays, deflate-compressed)
+    or 'auto' for Parquet when available. Returns the archive manifest.
+    """
+    if fmt == 'auto':
+        fmt = 'parquet' if parquet_available() else 'columns'
+    if fmt == 'parquet' and not parquet_available():
+        raise ValueError('Parquet export requires the pyarrow package')
+    if fmt not in ('parquet', 'columns'):
+        raise ValueError(f'Unknown columnar format: {fmt}')
+
+    manifest = {
+        'version': ARCHIVE_VERSION,
+        'format': fmt,
+        'byteorder': sys.byteorder,
+        'user_id': user_id,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': {}
+    }
+
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for table, (model, columns) in TABLES.items():
+            query = db.session.query(*[getattr(model, name) for name, _ in columns])
+            if user_id is not None:
+                query = query.filter(model.user_id == user_id)
+            rows = iter(query.order_by(model.id).yield_per(row_group_size))
+
+            total = groups = 0
+            if fmt == 'parquet':
+                schema = _parquet_schema(columns)
+                with _spool() as buffer:
+                    with pq.ParquetWriter(buffer, schema, compression='zstd') as writer:
+                        while chunk := list(islice(rows, row_group_size)):
+                            writer.write_table(pa.Table.from_pylist(
+                                [dict(zip(schema.names, row)) for row in chunk], schema=schema
+                            ))
+                            total += len(chunk)
+                            groups += 1
+                    buffer.seek(0)
+                    # Parquet compresses its own pages, so the member is stored as-is
+                    with archive.open(zipfile.ZipInfo(f'{table}.parquet'), 'w') as member:
+                        shutil.copyfileobj(buffer, member)
+            else:
+                while chunk := list(islice(rows, row_group_size)):
+                    _write_column_group(archive, f'{table}/{groups:05d}', columns, chunk)
+                    total += len(chunk)
+                    groups += 1
+
+            manifest['tables'][table] = {
+                'columns': [name for name, _ in columns],
+                'rows': total,
+                'row_groups': groups
+            }
+
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+    return manifest
+
+
+def _iter_row_batches(archive, manifest, table, columns, batch_size):
+    info = manifest['tables'][table]
+    if manifest['format'] == 'parquet':
+        if not parquet_available():
+            raise ValueError('This archive contains Parquet tables; install pyarrow to import it')
+        # Parquet readers need a seekable file, which a zip member doesn't reliably provide
+        with _spool() as buffer:
+            with archive.open(f'{table}.parquet') as member:
+                shutil.copyfileobj(member, buffer)
+            buffer.seek(0)
+            parquet = pq.ParquetFile(buffer)
+            for batch in parquet.iter_batches(batch_size=batch_size, columns=[name for name, _ in columns]):
+                yield batch.to_pylist()
+    else:
+        for group in range(info['row_groups']):
+            rows = _read_column_group(archive, f'{table}/{group:05d}', columns, manifest['byteorder'])
+            for start in range(0, len(rows), batch_size):
+                yield rows[start:start + batch_size]
+
+
+def import_columnar(source, user_id=None, batch_size=IMPORT_BATCH_SIZE):
+    """Load an export_columnar() archive with batched executemany inserts in a single transaction.
+
+    With user_id every row is assigned to that user; otherwise the archived
+    user IDs are kept, which suits restoring a full export. Daily summaries for
+    the imported date range are rebuilt afterwards. Returns rows inserted per table.
+    """
+    counts = {}
+    first_date = last_date = None
+
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise ValueError('Not a nutrition export archive: the file is not a zip archive')
+
+    with archive:
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except KeyError:
+            raise ValueError('Not a nutrition export archive: manifest.json is missing')
+        if manifest.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version: {manifest.get('version')}")
+
+        try:
+            for table, (model, columns) in TABLES.items():
+                if table not in manifest['tables']:
+                    continue
+                missing = {name for name, _ in columns} - set(manifest['tables'][table]['columns'])
+                if missing:
+                    raise ValueError(f"{table} is missing columns: {', '.join(sorted(missing))}")
+
+                counts[table] = 0
+                for rows in _iter_row_batches(archive, manifest, table, columns, batch_size):
+                    if user_id is not None:
+                        for row in rows:
+                            row['user_id'] = user_id
+                    if not rows:
+                        continue
+                    dates = [row['date_logged'] for row in rows]
+                    first_date = min(dates) if first_date is None else min(first_date, *dates)
+                    last_date = max(dates) if last_date is None else max(last_date, *dates)
+                    db.session.execute(model.__table__.insert(), rows)
+                    counts[table] += len(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    if first_date is not None:
+        rebuild_daily_summaries(user_id, first_date, last_date)
+    return counts
@@ -0,0 +1,110 @@
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import desc
+from models import db, FoodEntry, WaterIntake
+from utils.nutrition_db import NutritionDatabase, weekly_stats_from_totals
+from utils.db_routing import read_replica
+from utils.instrumentation import record_section_timing
+
+FOOD_ENTRY_COLUMNS = (
+    'id', 'food_description', 'calories', 'protein', 'carbs', 'fat', 'fiber',
+    'quantity', 'unit', 'meal_type', 'food_category', 'image_url'
+)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class DashboardSnapshot:
+    """Everything the dashboard shows for one user and day, loaded in as few statements as possible.
+
+    Entries are plain dicts rather than ORM objects so snapshots can be cached
+    across requests. Cache keys include the user's data_version, which every
+    food/water write bumps, so all workers stop serving a stale snapshot as
+    soon as the write commits.
+    """
+
+    def __init__(self, nutrition_data, water_intake, water_entries, weekly_stats, timings):
+        self.nutrition_data = nutrition_data
+        self.water_intake = water_intake
+        self.water_entries = water_entries
+        self.weekly_stats = weekly_stats
+        self.timings = timings  # section -> milliseconds, measured when the snapshot was fetched
+
+    @classmethod
+    def load(cls, user, date, weekly_days=7):
+        """Return the snapshot for a user and day, from the cache when the user's data hasn't changed"""
+        today = datetime.utcnow().date()
+        key = (user.id, date, today, user.data_version)
+
+        with _cache_lock:
+            snapshot = _cache.get(key)
+            if snapshot is not None:
+                _cache.move_to_end(key)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = cls._fetch(user.id, date, today, weekly_days)
+
+        max_size = current_app.config.get('DASHBOARD_CACHE_SIZE', 1024)
+        with _cache_lock:
+            _cache[key] = snapshot
+            while len(_cache) > max_size:
+                _cache.popitem(last=False)
+        return snapshot
+
+    @classmethod
+    @read_replica
+    def _fetch(cls, user_id, date, today, weekly_days):
+        timings = {}
+
+        def timed(section, func):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            timings[section] = round(elapsed * 1000, 2)
+            # Only fetched snapshots are timed; a cache hit adds no dashboard.* entries
+            record_section_timing(f'dashboard.{section}', elapsed)
+            return result
+
+        # Weekly stats and (usually) the selected day's totals come from one summary range query
+        week_start = today - timedelta(days=weekly_days - 1)
+        week = timed('summary', lambda: NutritionDatabase.get_daily_totals(user_id, week_start, today))
+        if week_start <= date <= today:
+            day_totals = week[(date - week_start).days]
+        else:
+            day_totals = timed('day_summary', lambda: NutritionDatabase.get_daily_summary(user_id, date))
+
+        food_entries = timed('food_entries', lambda: [
+            row._asdict() for row in db.session.query(
+                *[getattr(FoodEntry, name) for name in FOOD_ENTRY_COLUMNS]
+            ).filter(
+                FoodEntry.user_id == user_id,
+                FoodEntry.date_logged == date
+            ).order_by(FoodEntry.id).all()
+        ])
+
+        water_entries = timed('water_entries', lambda: [
+            row._asdict() for row in db.session.query(
+                WaterIntake.id, WaterIntake.amount_ml, WaterIntake.time_logged
+            ).filter(
+                WaterIntake.user_id == user_id,
+                WaterIntake.date_logged == date
+            ).order_by(desc(WaterIntake.time_logged)).all()
+        ])
+
+        nutrition_data = {
+            'calories': day_totals['calories'],
+            'protein': round(day_totals['protein'], 2),
+            'carbs': round(day_totals['carbs'], 2),
+            'fat': round(day_totals['fat'], 2),
+            'fiber': round(day_totals['fiber'], 2),
+            'entries': food_entries
+        }
+
+        weekly_stats = weekly_stats_from_totals(week, weekly_days)
+
+        return cls(nutrition_data, day_totals['water_ml'], water_entries, weekly_stats, timings)
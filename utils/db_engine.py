@@ -0,0 +1,82 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from models import db
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config, uri=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database (or another URI, such as a replica).
+
+    SQLite gets a driver-level busy timeout (its pragmas are applied per
+    connection by init_db_engine); server databases get a sized connection
+    pool that pings and recycles connections so restarts and idle timeouts
+    on the server side don't surface as request errors.
+    """
+    if is_sqlite(uri or config['SQLALCHEMY_DATABASE_URI']):
+        return {'connect_args': {'timeout': config.get('SQLITE_BUSY_TIMEOUT', 5000) / 1000}}
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+
+def sqlite_pragmas(config):
+    """The PRAGMA statements run on every new SQLite connection, in order"""
+    journal_mode = config.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    synchronous = config.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f'SQLITE_JOURNAL_MODE must be one of {", ".join(JOURNAL_MODES)}')
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f'SQLITE_SYNCHRONOUS must be one of {", ".join(SYNCHRONOUS_MODES)}')
+    return [
+        # WAL lets readers run alongside the single writer instead of blocking it
+        f'PRAGMA journal_mode={journal_mode}',
+        # NORMAL only syncs at checkpoints in WAL mode; a power loss can drop the last commits but never corrupts
+        f'PRAGMA synchronous={synchronous}',
+        f'PRAGMA busy_timeout={int(config.get("SQLITE_BUSY_TIMEOUT", 5000))}',
+        f'PRAGMA mmap_size={int(config.get("SQLITE_MMAP_SIZE", 268435456))}',
+        f'PRAGMA cache_size={int(config.get("SQLITE_CACHE_SIZE", -65536))}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+
+def _set_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def init_db_engine(app):
+    """Apply engine options and replica binds before db.init_app(app), then tune each SQLite connection as it opens"""
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    # Read replicas become binds replica_0, replica_1, ...; utils.db_routing decides which queries use them
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    replica_keys = []
+    for i, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+        key = f'replica_{i}'
+        binds[key] = dict(engine_options(app.config, uri), url=uri)
+        replica_keys.append(key)
+    app.extensions['db_replicas'] = replica_keys
+    db.init_app(app)
+
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+    if engines:
+        pragmas = sqlite_pragmas(app.config)
+        for engine in engines:
+            _set_pragmas(engine, pragmas)
@@ -0,0 +1,114 @@
+import time
+import random
+from functools import wraps
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, session as flask_session
+from sqlalchemy import event, inspect, select
+from flask_sqlalchemy.session import Session
+
+# Flask session key holding the time until which this browser reads from the primary
+PINNED_UNTIL_KEY = '_primary_until'
+
+
+def replica_bind_keys(app):
+    """Bind keys of the configured read replicas, in SQLALCHEMY_BINDS"""
+    return app.extensions.get('db_replicas', [])
+
+
+def _pinned_to_primary():
+    """True for a short while after this browser committed a write, until replicas have caught up"""
+    return has_request_context() and flask_session.get(PINNED_UNTIL_KEY, 0) > time.time()
+
+
+def _replica_caught_up(engine):
+    """True if the replica has every write of the logged-in user that the primary had when the request began.
+
+    Cached dashboard and statistics payloads are keyed on the data_version
+    the user loader read from the primary, so a lagging replica must not fill
+    them. Requests without a logged-in user have nothing to compare.
+    """
+    user = g.get('_login_user') if has_request_context() else None
+    if user is None or not user.is_authenticated:
+        return True
+    # Only an already loaded value: refreshing it here would route back through get_bind
+    version = inspect(user).dict.get('data_version')
+    if version is None:
+        return False
+    from models import User
+    with engine.connect() as conn:
+        replica_version = conn.execute(select(User.data_version).where(User.id == user.id)).scalar()
+    return replica_version is not None and replica_version >= version
+
+
+def _is_plain_select(clause):
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class RoutingSession(Session):
+    """db.session class that sends reads inside replica_reads() to a read replica.
+
+    Everything else goes to the primary: writes, flushes, raw SQL, reads
+    outside replica_reads(), reads in a transaction that has already written,
+    every read for REPLICA_STICKY_SECONDS after the browser's last committed
+    write, so users always see their own changes, and every read in a request
+    whose replica is behind the logged-in user's data_version on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+            elif (self.info.get('replica_depth') and _is_plain_select(clause)
+                  and not self.info.get('wrote') and not _pinned_to_primary()):
+                engine = self._replica_engine()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self):
+        keys = replica_bind_keys(current_app)
+        if not keys or self.info.get('replica_behind'):
+            return None
+        # One replica per session, so a request never mixes two replicas' lag
+        key = self.info.get('replica_key')
+        if key not in keys:
+            key = random.choice(keys)
+            if not _replica_caught_up(self._db.engines[key]):
+                self.info['replica_behind'] = True
+                return None
+            self.info['replica_key'] = key
+        return self._db.engines[key]
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_after_write(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+        if sticky > 0 and replica_bind_keys(current_app):
+            flask_session[PINNED_UNTIL_KEY] = time.time() + sticky
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
+
+@contextmanager
+def replica_reads():
+    """Let read-only queries in this block go to a read replica when one is configured"""
+    from models import db
+    session = db.session()
+    session.info['replica_depth'] = session.info.get('replica_depth', 0) + 1
+    try:
+        yield
+    finally:
+        session.info['replica_depth'] -= 1
+
+
+def read_replica(func):
+    """Decorator form of replica_reads() for read-only functions and views"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
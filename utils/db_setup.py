@@ -0,0 +1,134 @@
+from flask import current_app
+from sqlalchemy import text
+from models import db, User, NutritionTip, FoodEntry, WaterIntake, DailySummary, GoalProgress, UsageRollup
+
+# Columns added to existing tables before Alembic migrations existed; create_all() never adds columns
+LEGACY_USER_COLUMNS = (
+    ('is_admin', 'BOOLEAN DEFAULT 0'),
+    ('is_active', 'BOOLEAN DEFAULT 1'),
+    ('last_login', 'DATETIME'),
+    ('data_version', 'INTEGER NOT NULL DEFAULT 0'),
+)
+LEGACY_SUMMARY_COLUMNS = (
+    ('goal_status', 'VARCHAR(10)'),
+    ('ai_entry_count', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+
+def _add_missing_columns(inspector, table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, ddl) the table lacks; returns the names added"""
+    if not inspector.has_table(table):
+        return []
+    existing = {column['name'] for column in inspector.get_columns(table)}
+    added = [name for name, _ in columns if name not in existing]
+    if added:
+        with db.engine.connect() as conn:
+            for name, ddl in columns:
+                if name in added:
+                    conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {name} {ddl}'))
+            conn.commit()
+    return added
+
+
+def upgrade_legacy_schema(include_summary=True):
+    """Patch tables created by older versions of the app; returns True if AI counts need a backfill"""
+    inspector = db.inspect(db.engine)
+    if _add_missing_columns(inspector, 'user', LEGACY_USER_COLUMNS):
+        current_app.logger.info('Added new columns to the user table')
+    # Migration 0006 fills in ai_entry_count itself, so only the create_all() path needs to
+    added = _add_missing_columns(inspector, 'daily_summary', LEGACY_SUMMARY_COLUMNS) if include_summary else []
+    return 'ai_entry_count' in added
+
+
+def seed_initial_data():
+    """Seed initial data for the application"""
+    # Create admin user if no users exist
+    if User.query.count() == 0:
+        admin_user = User(
+            username='admin',
+            email='admin@example.com',
+            is_admin=True,
+            is_active=True,
+            calorie_goal=2000,
+            protein_goal=150,
+            carbs_goal=200,
+            fat_goal=65,
+            fiber_goal=30,
+            water_goal=2500
+        )
+        admin_user.set_password('admin123')  # TODO: Change this default password after first login
+        db.session.add(admin_user)
+        db.session.commit()
+        print('Created initial admin user: admin@example.com / admin123')
+
+    # Add some default nutrition tips if none exist
+    if NutritionTip.query.count() == 0:
+        tips = [
+            {
+                'tip_text': 'Try to include a variety of colorful fruits and vegetables in your diet. Each color provides different phytonutrients and antioxidants that support your immune system and overall health.',
+                'category': 'general'
+            },
+            {
+                'tip_text': 'Stay hydrated! Water helps transport nutrients, regulate body temperature, and remove waste. Aim for at least 8 glasses (2 liters) daily.',
+                'category': 'hydration'
+            },
+            {
+                'tip_text': 'Include protein with each meal to help maintain muscle mass and keep you feeling full longer. Good sources include lean meats, fish, eggs, dairy, legumes, and tofu.',
+                'category': 'protein'
+            },
+            {
+                'tip_text': 'Choose whole grains over refined grains. Whole grains contain more fiber, vitamins, and minerals that are important for digestive health and sustained energy.',
+                'category': 'carbs'
+            },
+            {
+                'tip_text': 'Not all fats are bad! Include healthy fats from sources like avocados, nuts, seeds, and olive oil to support brain health and nutrient absorption.',
+                'category': 'fat'
+            },
+            {
+                'tip_text': 'Meal prep can save time and help you make healthier choices throughout the week. Try setting aside a few hours each weekend to prepare meals and snacks.',
+                'category': 'planning'
+            },
+            {
+                'tip_text': 'Read nutrition labels to make informed choices. Pay attention to serving sizes, added sugars, sodium, and the ingredients list.',
+                'category': 'awareness'
+            }
+        ]
+        
+        for tip_data in tips:
+            tip = NutritionTip(**tip_data)
+            db.session.add(tip)
+
+        db.session.commit()
+
+
+def backfill_derived_tables(rebuild_summaries=False):
+    """Fill the summary, goal streak and usage rollup tables for databases created before them"""
+    from utils.nutrition_db import rebuild_daily_summaries
+    from utils.goal_progress import rebuild_goal_progress
+    from utils.usage_rollup import rebuild_usage_rollups
+
+    if (rebuild_summaries or DailySummary.query.first() is None) and (FoodEntry.query.first() or WaterIntake.query.first()):
+        current_app.logger.info(f'Backfilled {rebuild_daily_summaries()} daily summaries')
+    if GoalProgress.query.first() is None and DailySummary.query.first() is not None:
+        current_app.logger.info(f'Backfilled goal progress for {rebuild_goal_progress()} users')
+    if UsageRollup.query.first() is None:
+        current_app.logger.info(f'Backfilled {rebuild_usage_rollups()} days of usage rollups')
+
+
+def init_database(migrate=False):
+    """Bring the schema up to date, seed the defaults and backfill derived tables.
+
+    With migrate=True the schema comes from the Alembic migrations (as in
+    `flask db upgrade`); otherwise missing tables are created with
+    create_all(). Safe to run repeatedly; must run inside an application
+    context.
+    """
+    missing_ai_counts = upgrade_legacy_schema(include_summary=not migrate)
+    if migrate:
+        from flask_migrate import upgrade
+        upgrade()
+    else:
+        # The primary only: replicas get their schema through replication
+        db.create_all(bind_key=None)
+    seed_initial_data()
+    backfill_derived_tables(rebuild_summaries=missing_ai_counts)
@@ -0,0 +1,197 @@
+import csv
+import json
+import heapq
+import textwrap
+from io import StringIO
+from itertools import groupby
+from datetime import datetime
+from models import db, FoodEntry, WaterIntake
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'json': ('application/json', 'json')
+}
+EXPORT_MODES = ('daily', 'entries')
+
+DAILY_CSV_HEADER = ['Date', 'Food', 'Calories', 'Protein', 'Carbs', 'Fat', 'Water (ml)']
+ENTRY_CSV_HEADER = [
+    'Date', 'Time', 'Type', 'Food', 'Meal', 'Category', 'Quantity', 'Unit',
+    'Calories', 'Protein', 'Carbs', 'Fat', 'Fiber', 'Water (ml)'
+]
+
+# Rows fetched per round trip; only one batch per table is held in memory
+EXPORT_BATCH_SIZE = 500
+
+
+def _date_filters(column, start, end):
+    filters = []
+    if start:
+        filters.append(column >= start)
+    if end:
+        filters.append(column <= end)
+    return filters
+
+
+def _food_rows(user_id, start, end, batch_size):
+    query = db.session.query(
+        FoodEntry.date_logged, FoodEntry.created_at, FoodEntry.food_description,
+        FoodEntry.meal_type, FoodEntry.food_category, FoodEntry.quantity, FoodEntry.unit,
+        FoodEntry.calories, FoodEntry.protein, FoodEntry.carbs, FoodEntry.fat, FoodEntry.fiber
+    ).filter(
+        FoodEntry.user_id == user_id,
+        *_date_filters(FoodEntry.date_logged, start, end)
+    ).order_by(FoodEntry.date_logged, FoodEntry.created_at, FoodEntry.id)
+
+    for row in query.yield_per(batch_size):
+        yield {
+            'type': 'food',
+            'date': row.date_logged,
+            'time': row.created_at,
+            'food': row.food_description,
+            'meal_type': row.meal_type,
+            'category': row.food_category,
+            'quantity': row.quantity,
+            'unit': row.unit,
+            'calories': row.calories or 0,
+            'protein': row.protein or 0,
+            'carbs': row.carbs or 0,
+            'fat': row.fat or 0,
+            'fiber': row.fiber or 0,
+            'water': 0
+        }
+
+
+def _water_rows(user_id, start, end, batch_size):
+    query = db.session.query(
+        WaterIntake.date_logged, WaterIntake.time_logged, WaterIntake.amount_ml
+    ).filter(
+        WaterIntake.user_id == user_id,
+        *_date_filters(WaterIntake.date_logged, start, end)
+    ).order_by(WaterIntake.date_logged, WaterIntake.time_logged, WaterIntake.id)
+
+    for row in query.yield_per(batch_size):
+        yield {
+            'type': 'water',
+            'date': row.date_logged,
+            'time': row.time_logged,
+            'water': row.amount_ml or 0
+        }
+
+
+def iter_entries(user_id, start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the user's food and water entries merged in date order"""
+    return heapq.merge(
+        _food_rows(user_id, start, end, batch_size),
+        _water_rows(user_id, start, end, batch_size),
+        key=lambda row: (row['date'], row['time'] or datetime.min)
+    )
+
+
+def iter_daily_totals(user_id, start=None, end=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield one aggregated dict per logged day; only the current day is held in memory"""
+    for date, rows in groupby(iter_entries(user_id, start, end, batch_size), key=lambda row: row['date']):
+        day = {'date': date.strftime('%Y-%m-%d'), 'food': [], 'calories': 0,
+               'protein': 0, 'carbs': 0, 'fat': 0, 'water': 0}
+        for row in rows:
+            if row['type'] == 'food':
+                day['food'].append(row['food'])
+                for key in ('calories', 'protein', 'carbs', 'fat'):
+                    day[key] += row[key]
+            else:
+                day['water'] += row['water']
+        for key in ('protein', 'carbs', 'fat'):
+            day[key] = round(day[key], 2)
+        yield day
+
+
+def _entry_record(row):
+    record = {
+        'date': row['date'].strftime('%Y-%m-%d'),
+        'time': row['time'].strftime('%H:%M:%S') if row['time'] else None,
+        'type': row['type']
+    }
+    if row['type'] == 'food':
+        record.update({key: row[key] for key in (
+            'food', 'meal_type', 'category', 'quantity', 'unit',
+            'calories', 'protein', 'carbs', 'fat', 'fiber'
+        )})
+    else:
+        record['water'] = row['water']
+    return record
+
+
+def iter_records(user_id, start=None, end=None, mode='daily'):
+    """Yield export records: aggregated days, or individual entries with mode='entries'"""
+    if mode == 'entries':
+        return (_entry_record(row) for row in iter_entries(user_id, start, end))
+    return iter_daily_totals(user_id, start, end)
+
+
+def _csv_row(record, mode):
+    if mode == 'entries':
+        return [
+            record['date'], record['time'], record['type'], record.get('food', ''),
+            record.get('meal_type', ''), record.get('category', ''), record.get('quantity', ''),
+            record.get('unit', ''), record.get('calories', ''), record.get('protein', ''),
+            record.get('carbs', ''), record.get('fat', ''), record.get('fiber', ''),
+            record.get('water', '')
+        ]
+    return [
+        record['date'],
+        ', '.join(record['food']) if record['food'] else 'No food entries',
+        record['calories'],
+        record['protein'],
+        record['carbs'],
+        record['fat'],
+        record['water']
+    ]
+
+
+def stream_csv(records, mode='daily'):
+    """Yield CSV text one row at a time"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ENTRY_CSV_HEADER if mode == 'entries' else DAILY_CSV_HEADER)
+    for record in records:
+        writer.writerow(_csv_row(record, mode))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header of an empty export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_jsonl(records):
+    """Yield one JSON document per line"""
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+def stream_json(records, username):
+    """Yield an indented JSON document with the same shape as json.dumps(..., indent=4)"""
+    header = json.dumps({
+        'user': username,
+        'export_date': datetime.now().strftime('%Y-%m-%d')
+    }, indent=4)
+    # Reopen the header object and add the data array to it
+    yield header[:-2] + ',\n    "nutrition_data": ['
+
+    first = True
+    for record in records:
+        item = textwrap.indent(json.dumps(record, indent=4), ' ' * 8)
+        yield ('\n' if first else ',\n') + item
+        first = False
+
+    yield ']\n}' if first else '\n    ]\n}'
+
+
+def stream_export(fmt, user_id, username, start=None, end=None, mode='daily'):
+    """Return a generator of text chunks for an export in the given format"""
+    records = iter_records(user_id, start, end, mode)
+    if fmt == 'csv':
+        return stream_csv(records, mode)
+    if fmt == 'jsonl':
+        return stream_jsonl(records)
+    return stream_json(records, username)
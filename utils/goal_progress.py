@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from itertools import groupby
+from sqlalchemy import select, update, case, func
+from models import db, User, DailySummary, GoalProgress
+
+HIT = 'within'
+GOAL_TOLERANCE = 0.1
+# Days of hit history kept in the bitmap; enough for the longest rolling window
+BITMAP_DAYS = 128
+ROLLING_WINDOWS = (7, 30, 90)
+
+
+def goal_status_expression(calorie_goal):
+    """A day's goal status as SQL over DailySummary: 'under', 'within' or 'over' the calorie goal, NULL without food entries.
+
+    Within means no more than GOAL_TOLERANCE either side of the goal. This is
+    the only place the rule lives; everything else reads the stored goal_status.
+    """
+    goal = func.coalesce(calorie_goal, 0)
+    return case(
+        (DailySummary.food_entry_count <= 0, None),
+        (DailySummary.calories < goal * (1 - GOAL_TOLERANCE), 'under'),
+        (DailySummary.calories > goal * (1 + GOAL_TOLERANCE), 'over'),
+        else_=HIT
+    )
+
+
+def _set_hit(progress, day, hit):
+    """Set or clear a day's bit, moving the bitmap forward when the day is newer than its end"""
+    bitmap = int(progress.hit_bitmap or '0', 16)
+    if progress.hit_bitmap_end is None or day > progress.hit_bitmap_end:
+        if progress.hit_bitmap_end is not None:
+            bitmap <<= (day - progress.hit_bitmap_end).days
+        progress.hit_bitmap_end = day
+    offset = (progress.hit_bitmap_end - day).days
+    if offset < BITMAP_DAYS:
+        bitmap = bitmap | (1 << offset) if hit else bitmap & ~(1 << offset)
+    progress.hit_bitmap = format(bitmap & ((1 << BITMAP_DAYS) - 1), 'x')
+
+
+def _recompute(progress, hit_days):
+    """Rebuild streaks and the bitmap from a user's sorted hit dates"""
+    progress.current_streak = progress.longest_streak = 0
+    progress.streak_end = progress.longest_streak_end = None
+    progress.hit_bitmap, progress.hit_bitmap_end = '0', None
+
+    run, previous = 0, None
+    for day in hit_days:
+        run = run + 1 if previous is not None and day == previous + timedelta(days=1) else 1
+        previous = day
+        if run >= progress.longest_streak:
+            progress.longest_streak, progress.longest_streak_end = run, day
+    if previous is not None:
+        progress.current_streak, progress.streak_end = run, previous
+        for day in hit_days:
+            if (previous - day).days < BITMAP_DAYS:
+                _set_hit(progress, day, True)
+
+
+def _hit_days(user_id):
+    return db.session.execute(select(DailySummary.date_logged).where(
+        DailySummary.user_id == user_id,
+        DailySummary.goal_status == HIT
+    ).order_by(DailySummary.date_logged)).scalars().all()
+
+
+def _get_or_create(user_id):
+    progress = db.session.get(GoalProgress, user_id)
+    if progress is None:
+        progress = GoalProgress(user_id=user_id, current_streak=0, longest_streak=0, hit_bitmap='0')
+        db.session.add(progress)
+    return progress
+
+
+def record_goal_status(user_id, date):
+    """Reclassify one day after its totals changed and update the user's streaks within the current transaction.
+
+    Extending the latest run, starting a new one or trimming the end of a run
+    that isn't the longest are constant-time; other edits fall back to
+    recomputing from the user's hit days.
+    """
+    row = db.session.execute(select(
+        DailySummary.goal_status, goal_status_expression(User.calorie_goal)
+    ).join(User, User.id == DailySummary.user_id).where(
+        DailySummary.user_id == user_id,
+        DailySummary.date_logged == date
+    )).one_or_none()
+    if row is None:
+        return
+
+    old_status, status = row
+    if status == old_status:
+        return
+
+    db.session.execute(update(DailySummary).where(
+        DailySummary.user_id == user_id,
+        DailySummary.date_logged == date
+    ).values(goal_status=status))
+
+    was_hit, is_hit = old_status == HIT, status == HIT
+    if was_hit == is_hit:
+        return
+
+    progress = _get_or_create(user_id)
+    end = progress.streak_end
+    if is_hit and (end is None or date > end):
+        # Extends the latest run or starts a new one after it
+        progress.current_streak = progress.current_streak + 1 if end is not None and date == end + timedelta(days=1) else 1
+        progress.streak_end = date
+        if progress.current_streak >= progress.longest_streak:
+            progress.longest_streak, progress.longest_streak_end = progress.current_streak, date
+        _set_hit(progress, date, True)
+    elif not is_hit and date == end and progress.current_streak > 1 and progress.longest_streak_end != end:
+        # The latest run loses its last day, isn't the longest run and doesn't disappear
+        progress.current_streak -= 1
+        progress.streak_end = end - timedelta(days=1)
+        _set_hit(progress, date, False)
+    else:
+        _recompute(progress, _hit_days(user_id))
+
+
+def rebuild_goal_progress(user_id=None):
+    """Reclassify every summary day against the current goals and recompute streaks; commits"""
+    try:
+        if user_id is not None:
+            goal = db.session.execute(select(User.calorie_goal).where(User.id == user_id)).scalar_one()
+            db.session.execute(update(DailySummary).where(
+                DailySummary.user_id == user_id
+            ).values(goal_status=goal_status_expression(goal)))
+            user_ids = [user_id]
+        else:
+            goal = select(User.calorie_goal).where(User.id == DailySummary.user_id).scalar_subquery()
+            db.session.execute(update(DailySummary).values(goal_status=goal_status_expression(goal)))
+            user_ids = db.session.execute(select(User.id)).scalars().all()
+
+        hits = db.session.execute(select(DailySummary.user_id, DailySummary.date_logged).where(
+            DailySummary.goal_status == HIT,
+            *([DailySummary.user_id == user_id] if user_id is not None else [])
+        ).order_by(DailySummary.user_id, DailySummary.date_logged)).all()
+        hits_by_user = {user: [day for _, day in rows] for user, rows in groupby(hits, key=lambda row: row[0])}
+
+        for uid in user_ids:
+            _recompute(_get_or_create(uid), hits_by_user.get(uid, []))
+        # The stored statuses changed, so views cached on data_version (and lagging replicas) are stale
+        db.session.execute(update(User).where(
+            *([User.id == user_id] if user_id is not None else [])
+        ).values(data_version=User.data_version + 1))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+    return len(user_ids)
+
+
+def goal_progress_summary(user, today=None):
+    """Current and longest streak plus rolling hit counts, read from the precomputed record"""
+    today = today or datetime.utcnow().date()
+    progress = db.session.get(GoalProgress, user.id)
+    summary = {'current_streak': 0, 'longest_streak': 0, 'streak_end': None}
+    summary.update({f'hits_{days}d': 0 for days in ROLLING_WINDOWS})
+    if progress is None:
+        return summary
+
+    # A streak is still alive when its last hit was today or yesterday
+    if progress.streak_end is not None and progress.streak_end >= today - timedelta(days=1):
+        summary['current_streak'] = progress.current_streak
+        summary['streak_end'] = progress.streak_end.isoformat()
+    summary['longest_streak'] = progress.longest_streak
+
+    if progress.hit_bitmap_end is not None:
+        bitmap = int(progress.hit_bitmap, 16)
+        offset = (progress.hit_bitmap_end - today).days
+        # Align bit 0 with today
+        bitmap = bitmap >> offset if offset >= 0 else bitmap << -offset
+        for days in ROLLING_WINDOWS:
+            summary[f'hits_{days}d'] = (bitmap & ((1 << days) - 1)).bit_count()
+    return summary
@@ -0,0 +1,159 @@
+import json
+import time
+import hashlib
+import threading
+from PIL import Image
+from flask import current_app
+from utils.analysis_store import LocalSQLiteFile
+
+# The 64-bit perceptual hash is split into this many 16-bit bands. Two hashes within
+# a Hamming distance of DHASH_BANDS - 1 are guaranteed to share at least one band,
+# so near-duplicate lookups only need an indexed equality match per band.
+DHASH_BANDS = 4
+DHASH_BAND_BITS = 64 // DHASH_BANDS
+
+_cache_lock = threading.Lock()
+
+
+def content_hash(image_bytes):
+    """SHA-256 of the raw upload, used for byte-identical matches"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image):
+    """64-bit difference hash (dHash) of a PIL image, stable across re-encoding and resizing"""
+    small = image.convert('L').resize((9, 8), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(dhash):
+    mask = (1 << DHASH_BAND_BITS) - 1
+    return [(dhash >> (i * DHASH_BAND_BITS)) & mask for i in range(DHASH_BANDS)]
+
+
+class ImageAnalysisCache:
+    """Persistent cache of nutrition analyses keyed by image content and perceptual hash"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_distance=3, max_entries=50000):
+        self.ttl = ttl
+        self.max_distance = min(max_distance, DHASH_BANDS - 1)
+        self.max_entries = max_entries
+        self._file = LocalSQLiteFile(path)
+
+        band_columns = ', '.join(f'band{i} INTEGER NOT NULL' for i in range(DHASH_BANDS))
+        with self._file.connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS image_analysis_cache ('
+                'content_hash TEXT PRIMARY KEY, '
+                'dhash TEXT NOT NULL, '
+                f'{band_columns}, '
+                'result TEXT NOT NULL, '
+                'expires_at REAL NOT NULL)'
+            )
+            for i in range(DHASH_BANDS):
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS ix_image_analysis_cache_band{i} ON image_analysis_cache (band{i})'
+                )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_image_analysis_cache_expires_at ON image_analysis_cache (expires_at)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS image_cache_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def lookup(self, digest, dhash):
+        """Return (result, match_type) for a cached analysis, or (None, 'miss')"""
+        now = time.time()
+        with self._file.connection() as conn:
+            row = conn.execute(
+                'SELECT result FROM image_analysis_cache WHERE content_hash = ? AND expires_at >= ?',
+                (digest, now)
+            ).fetchone()
+            if row is not None:
+                self._increment(conn, 'exact_hits')
+                return json.loads(row[0]), 'exact'
+
+            if self.max_distance > 0:
+                where = ' OR '.join(f'band{i} = ?' for i in range(DHASH_BANDS))
+                candidates = conn.execute(
+                    f'SELECT dhash, result FROM image_analysis_cache WHERE ({where}) AND expires_at >= ?',
+                    (*_bands(dhash), now)
+                ).fetchall()
+                best = None
+                for candidate_hash, result in candidates:
+                    distance = hamming_distance(dhash, int(candidate_hash, 16))
+                    if distance <= self.max_distance and (best is None or distance < best[0]):
+                        best = (distance, result)
+                if best is not None:
+                    self._increment(conn, 'near_hits')
+                    return json.loads(best[1]), 'near'
+
+            self._increment(conn, 'misses')
+        return None, 'miss'
+
+    def store(self, digest, dhash, result):
+        now = time.time()
+        placeholders = ', '.join('?' for _ in range(DHASH_BANDS))
+        band_names = ', '.join(f'band{i}' for i in range(DHASH_BANDS))
+        with self._file.connection() as conn:
+            conn.execute(
+                f'INSERT OR REPLACE INTO image_analysis_cache (content_hash, dhash, {band_names}, result, expires_at) '
+                f'VALUES (?, ?, {placeholders}, ?, ?)',
+                (digest, f'{dhash:016x}', *_bands(dhash), json.dumps(result), now + self.ttl)
+            )
+            conn.execute('DELETE FROM image_analysis_cache WHERE expires_at < ?', (now,))
+            count = conn.execute('SELECT COUNT(*) FROM image_analysis_cache').fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    'DELETE FROM image_analysis_cache WHERE content_hash IN '
+                    '(SELECT content_hash FROM image_analysis_cache ORDER BY expires_at LIMIT ?)',
+                    (count - self.max_entries,)
+                )
+
+    def stats(self):
+        with self._file.connection() as conn:
+            counters = dict(conn.execute('SELECT name, value FROM image_cache_counters').fetchall())
+            entries = conn.execute('SELECT COUNT(*) FROM image_analysis_cache').fetchone()[0]
+        hits = counters.get('exact_hits', 0) + counters.get('near_hits', 0)
+        lookups = hits + counters.get('misses', 0)
+        return {
+            'entries': entries,
+            'exact_hits': counters.get('exact_hits', 0),
+            'near_hits': counters.get('near_hits', 0),
+            'misses': counters.get('misses', 0),
+            'hit_rate': round(hits / lookups, 3) if lookups else 0
+        }
+
+    def _increment(self, conn, name):
+        conn.execute(
+            'INSERT INTO image_cache_counters (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+
+def get_image_cache(app=None):
+    """Return the image analysis cache for the current application, or None if disabled"""
+    app = app or current_app._get_current_object()
+    if not app.config.get('IMAGE_CACHE_ENABLED', True):
+        return None
+    with _cache_lock:
+        cache = app.extensions.get('image_cache')
+        if cache is None:
+            cache = ImageAnalysisCache(
+                app.config['IMAGE_CACHE_PATH'],
+                ttl=app.config.get('IMAGE_CACHE_TTL', 7 * 24 * 3600),
+                max_distance=app.config.get('IMAGE_CACHE_MAX_DISTANCE', 3),
+                max_entries=app.config.get('IMAGE_CACHE_MAX_ENTRIES', 50000)
+            )
+            app.extensions['image_cache'] = cache
+    return cache
@@ -0,0 +1,99 @@
+import os
+import base64
+from io import BytesIO
+from PIL import Image, ImageOps
+from flask import current_app
+from utils.image_cache import content_hash, perceptual_hash
+
+
+class ProcessedImage:
+    """Result of preprocessing an upload: the model-bound payload plus derived artifacts"""
+
+    def __init__(self, source_path, payload, content_hash, perceptual_hash, original_size, size,
+                 thumbnail_path=None):
+        self.source_path = source_path
+        self.payload = payload  # JPEG bytes sent to the model
+        self.content_hash = content_hash
+        self.perceptual_hash = perceptual_hash
+        self.original_size = original_size
+        self.size = size
+        self.thumbnail_path = thumbnail_path
+
+    @property
+    def base64_payload(self):
+        return base64.b64encode(self.payload).decode('utf-8')
+
+
+def _to_rgb(img):
+    """Convert to RGB, flattening transparency onto a white background"""
+    if img.mode == 'RGB':
+        return img
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        rgba = img.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def load_image(image_bytes, max_dimension):
+    """Decode an upload as an upright RGB image no larger than max_dimension on either side"""
+    img = Image.open(BytesIO(image_bytes))
+    original_size = img.size
+
+    # For JPEGs let the decoder downscale by a power of two while decoding, which
+    # is much cheaper than decoding at full resolution and resizing afterwards
+    if img.format == 'JPEG':
+        img.draft('RGB', (max_dimension, max_dimension))
+
+    # Apply the EXIF orientation so phone photos aren't sent sideways
+    img = ImageOps.exif_transpose(img)
+    img = _to_rgb(img)
+    img.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=2.0)
+    return img, original_size
+
+
+def encode_jpeg(img, quality):
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def preprocess_image(filepath, max_dimension=1024, quality=80, thumbnail_size=256, thumbnail_folder=None):
+    """Downsize an uploaded image once, producing the model payload, fingerprints and a thumbnail"""
+    with open(filepath, 'rb') as image_file:
+        image_bytes = image_file.read()
+
+    img, original_size = load_image(image_bytes, max_dimension)
+    payload = encode_jpeg(img, quality)
+
+    thumbnail_path = None
+    if thumbnail_folder:
+        os.makedirs(thumbnail_folder, exist_ok=True)
+        thumbnail = img.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+        name = os.path.splitext(os.path.basename(filepath))[0]
+        thumbnail_path = os.path.join(thumbnail_folder, f"{name}.jpg")
+        thumbnail.save(thumbnail_path, format='JPEG', quality=quality, optimize=True)
+
+    return ProcessedImage(
+        source_path=filepath,
+        payload=payload,
+        content_hash=content_hash(image_bytes),
+        perceptual_hash=perceptual_hash(img),
+        original_size=original_size,
+        size=img.size,
+        thumbnail_path=thumbnail_path
+    )
+
+
+def preprocess_upload(filepath, app=None):
+    """Preprocess an upload using the application's image settings"""
+    app = app or current_app
+    return preprocess_image(
+        filepath,
+        max_dimension=app.config.get('IMAGE_MAX_DIMENSION', 1024),
+        quality=app.config.get('IMAGE_JPEG_QUALITY', 80),
+        thumbnail_size=app.config.get('THUMBNAIL_SIZE', 256),
+        thumbnail_folder=app.config.get('THUMBNAIL_FOLDER')
+    )
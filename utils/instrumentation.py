@@ -0,0 +1,274 @@
+import io
+import hmac
+import time
+import threading
+from flask import current_app, g, request, has_request_context, before_render_template, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from models import db
+
+try:
+    import pyinstrument
+except ImportError:  # optional: sampling profiler, cProfile is used without it
+    pyinstrument = None
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+OPENROUTER_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+PROFILE_HEADER = 'X-Profile'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """A Prometheus counter or histogram with a fixed set of label names"""
+
+    def __init__(self, name, help_text, labels=(), buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> total, or [bucket counts, sum, count] for histograms
+
+    def observe(self, value, *label_values):
+        if self.buckets is None:
+            self.series[label_values] = self.series.get(label_values, 0) + value
+            return
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        kind = 'counter' if self.buckets is None else 'histogram'
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {kind}']
+        for label_values, series in sorted(self.series.items()):
+            if self.buckets is None:
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {series}')
+                continue
+            bucket_counts, total, count = series
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                labels = _format_labels(self.labels, label_values, [('le', bound)])
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = _format_labels(self.labels, label_values, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, label_values)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, label_values)} {count}')
+        return '\n'.join(lines)
+
+
+class Metrics:
+    """Per-process request, SQL, template, page section and OpenRouter metrics in Prometheus text format.
+
+    Each worker process keeps its own numbers, so scrape every worker (or
+    run one) to see the whole picture.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = _Metric('nutrition_http_request_duration_seconds', 'Wall time per request.',
+                                ('method', 'endpoint', 'status'), REQUEST_BUCKETS)
+        self.request_statements = _Metric('nutrition_http_request_db_statements', 'SQL statements per request.',
+                                          ('endpoint',), STATEMENT_BUCKETS)
+        self.db_statements = _Metric('nutrition_db_statements_total', 'SQL statements executed.', ('endpoint',))
+        self.db_seconds = _Metric('nutrition_db_seconds_total', 'Time spent executing SQL.', ('endpoint',))
+        self.templates = _Metric('nutrition_template_render_seconds', 'Template render time.',
+                                 ('template',), REQUEST_BUCKETS)
+        self.openrouter = _Metric('nutrition_openrouter_request_seconds', 'OpenRouter API call latency.',
+                                  ('outcome',), OPENROUTER_BUCKETS)
+        self.sections = _Metric('nutrition_section_load_seconds', 'Time to load one section of a page.',
+                                ('section',), REQUEST_BUCKETS)
+        self._metrics = (self.requests, self.request_statements, self.db_statements, self.db_seconds,
+                         self.templates, self.openrouter, self.sections)
+
+    def observe(self, metric, value, *label_values):
+        with self._lock:
+            metric.observe(value, *label_values)
+
+    def render(self):
+        with self._lock:
+            return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+def get_metrics(app=None):
+    """Return the application's metrics registry, or None if instrumentation is disabled"""
+    app = app or current_app._get_current_object()
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return None
+    metrics = app.extensions.get('metrics')
+    if metrics is None:
+        metrics = app.extensions['metrics'] = Metrics()
+    return metrics
+
+
+def _request_timing():
+    """Timings of the current request, or None outside a request (e.g. background jobs)"""
+    return g.get('_request_timing') if has_request_context() else None
+
+
+def _endpoint():
+    return (request.endpoint or 'unmatched') if has_request_context() else 'background'
+
+
+def record_openrouter_call(metrics, seconds, outcome):
+    """Count one OpenRouter call in the metrics and in the current request's Server-Timing"""
+    if metrics is not None:
+        metrics.observe(metrics.openrouter, seconds, outcome)
+    timing = _request_timing()
+    if timing is not None:
+        timing['openrouter'] += seconds
+        timing['openrouter_calls'] += 1
+
+
+def record_section_timing(section, seconds):
+    """Count the load time of one page section in the metrics and in the current request's Server-Timing"""
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.observe(metrics.sections, seconds, section)
+    timing = _request_timing()
+    if timing is not None:
+        timing['sections'].append((section, seconds))
+
+
+def _server_timing(timing, total):
+    parts = [f'app;dur={total * 1000:.1f}',
+             f'db;dur={timing["db"] * 1000:.1f};desc="{timing["statements"]} queries"']
+    if timing['template']:
+        parts.append(f'tpl;dur={timing["template"] * 1000:.1f}')
+    if timing['openrouter_calls']:
+        parts.append(f'openrouter;dur={timing["openrouter"] * 1000:.1f};desc="{timing["openrouter_calls"]} calls"')
+    parts.extend(f'{section};dur={seconds * 1000:.1f}' for section, seconds in timing['sections'])
+    return ', '.join(parts)
+
+
+def _start_profiler():
+    """Start a pyinstrument (sampling) or cProfile profiler; None if another one is already running"""
+    try:
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except (RuntimeError, ValueError):
+        return None
+    return profiler
+
+
+def _profile_report(profiler):
+    if pyinstrument is not None:
+        profiler.stop()
+        return profiler.output_text(unicode=True, color=False)
+    import pstats
+    profiler.disable()
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(60)
+    return stream.getvalue()
+
+
+def _metrics_allowed(app):
+    token = app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        return hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {token}'.encode('utf-8'))
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def init_instrumentation(app):
+    """Time every request, its SQL and templates; serve /metrics and Server-Timing; profile on request"""
+    metrics = get_metrics(app)
+    if metrics is None:
+        return
+
+    # The start time lives on the statement's execution context, so a statement that raises
+    # (no after_cursor_execute) leaves nothing behind on the connection
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._instrumentation_start = time.perf_counter()
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_instrumentation_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        endpoint = _endpoint()
+        metrics.observe(metrics.db_statements, 1, endpoint)
+        metrics.observe(metrics.db_seconds, elapsed, endpoint)
+        timing = _request_timing()
+        if timing is not None:
+            timing['statements'] += 1
+            timing['db'] += elapsed
+
+    # The primary and any read replicas
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _template_started(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault('_template_starts', []).append(time.perf_counter())
+
+    def _template_finished(sender, template, context, **extra):
+        starts = g.get('_template_starts') if has_request_context() else None
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        metrics.observe(metrics.templates, elapsed, template.name or 'string')
+        timing = _request_timing()
+        # Nested renders (includes) are already counted in their parent
+        if timing is not None and not starts:
+            timing['template'] += elapsed
+
+    # Strong references: the receivers are closures that would otherwise be collected
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
+
+    @app.before_request
+    def _start_request_timing():
+        g._request_timing = {'start': time.perf_counter(), 'statements': 0, 'db': 0.0,
+                             'template': 0.0, 'openrouter': 0.0, 'openrouter_calls': 0, 'sections': []}
+        if app.config.get('PROFILER_ENABLED', True) and request.headers.get(PROFILE_HEADER) \
+                and current_user.is_authenticated and current_user.is_admin:
+            g._profiler = _start_profiler()
+
+    @app.after_request
+    def _finish_request_timing(response):
+        timing = g.pop('_request_timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing['start']
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe(metrics.requests, total, request.method, endpoint, str(response.status_code))
+        metrics.observe(metrics.request_statements, timing['statements'], endpoint)
+
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            # Admin-only: hand back the profile instead of the page
+            status = response.status_code
+            response = app.response_class(_profile_report(profiler), mimetype='text/plain')
+            response.headers['X-Profiled-Status'] = str(status)
+
+        if app.config.get('SERVER_TIMING_ENABLED', True):
+            response.headers['Server-Timing'] = _server_timing(timing, total)
+        return response
+
+    def metrics_view():
+        if not _metrics_allowed(app):
+            return app.response_class('Forbidden\n', status=403, mimetype='text/plain')
+        return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,47 +1,268 @@
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, desc
-from models import db, FoodEntry, WaterIntake, NutritionTip, User
+from sqlalchemy import func, and_, desc, update, select, case
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, FoodEntry, WaterIntake, NutritionTip, User, DailySummary
+from utils.goal_progress import record_goal_status, rebuild_goal_progress
+from utils.usage_rollup import record_usage, rebuild_usage_rollups
+from utils.db_routing import read_replica
+from utils.stats_engine import DailySeries
+
+# Nutrient columns shared by FoodEntry and DailySummary
+SUMMARY_NUTRIENTS = ('calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium')
+
+def _food_deltas(entry, sign=1):
+    deltas = {name: sign * (getattr(entry, name) or 0) for name in SUMMARY_NUTRIENTS}
+    deltas['food_entry_count'] = sign
+    deltas['ai_entry_count'] = sign if entry.ai_analyzed else 0
+    return deltas
+
+def _water_deltas(entry, sign=1):
+    return {'water_ml': sign * entry.amount_ml, 'water_entry_count': sign}
+
+# Optional text fields of a bulk food entry: name -> (maximum length, default)
+FOOD_TEXT_FIELDS = {
+    'unit': (50, 'serving'),
+    'meal_type': (20, 'other'),
+    'food_category': (20, 'other'),
+    'image_url': (255, None)
+}
+FOOD_NUMBER_FIELDS = ('protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium')
+TRUE_STRINGS = ('1', 'true', 'yes', 'on')
+FALSE_STRINGS = ('0', 'false', 'no', 'off', '')
+
+def parse_food_item(item):
+    """Validate one bulk food entry and return the food_data dict add_food_entries inserts; raises ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError('entry must be an object')
+    
+    def number(name, default=None, positive=False):
+        value = item.get(name, default)
+        if value is None:
+            raise ValueError(f'{name} is required')
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f'{name} must be a number')
+        if value < 0 or (positive and value == 0):
+            raise ValueError(f'{name} must be {"positive" if positive else "zero or more"}')
+        return value
+    
+    def flag(name):
+        # Form and CSV-style input sends booleans as strings; bool('false') would be True
+        value = item.get(name)
+        if value is None or isinstance(value, bool):
+            return bool(value)
+        if isinstance(value, int) and value in (0, 1):
+            return bool(value)
+        if isinstance(value, str) and value.strip().lower() in TRUE_STRINGS + FALSE_STRINGS:
+            return value.strip().lower() in TRUE_STRINGS
+        raise ValueError(f'{name} must be true or false')
+    
+    description = item.get('food_description')
+    if not isinstance(description, str) or not description.strip():
+        raise ValueError('food_description is required')
+    if len(description) > 200:
+        raise ValueError('food_description must be at most 200 characters')
+    
+    food_data = {
+        'food_description': description.strip(),
+        'calories': int(round(number('calories'))),
+        'quantity': float(number('quantity', 1, positive=True)),
+        'ai_analyzed': flag('ai_analyzed')
+    }
+    for name in FOOD_NUMBER_FIELDS:
+        food_data[name] = float(number(name, 0))
+    for name, (max_length, default) in FOOD_TEXT_FIELDS.items():
+        value = item.get(name, default)
+        if value is not None and (not isinstance(value, str) or len(value) > max_length):
+            raise ValueError(f'{name} must be a string of at most {max_length} characters')
+        food_data[name] = value
+    
+    date_logged = item.get('date_logged')
+    try:
+        food_data['date_logged'] = datetime.strptime(date_logged, '%Y-%m-%d').date() if date_logged else datetime.utcnow().date()
+    except (TypeError, ValueError):
+        raise ValueError('date_logged must be a YYYY-MM-DD date')
+    return food_data
+
+def bump_data_version(user_id=None):
+    """Mark a user's (or every user's) cached views as stale within the current transaction"""
+    stmt = update(User).values(data_version=User.data_version + 1)
+    if user_id is not None:
+        stmt = stmt.where(User.id == user_id)
+    db.session.execute(stmt)
+
+def update_daily_summary(user_id, date, deltas):
+    """Add deltas to a user's DailySummary row within the current transaction, creating it if needed"""
+    now = datetime.utcnow()
+    bind = db.session.get_bind()
+    dialect = bind.dialect.name
+    bump_data_version(user_id)
+    
+    if dialect in ('sqlite', 'postgresql'):
+        # Atomic upsert so concurrent workers never race on creating the row
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(DailySummary).values(user_id=user_id, date_logged=date, updated_at=now, **deltas)
+        columns = DailySummary.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'date_logged'],
+            set_=dict({name: columns[name] + stmt.excluded[name] for name in deltas}, updated_at=now)
+        )
+        entry_counts = (DailySummary.food_entry_count, DailySummary.water_entry_count)
+        if bind.dialect.insert_returning:
+            food_count, water_count = db.session.execute(stmt.returning(*entry_counts)).one()
+        else:
+            db.session.execute(stmt)
+            food_count, water_count = db.session.execute(select(*entry_counts).where(
+                DailySummary.user_id == user_id, DailySummary.date_logged == date
+            )).one()
+    else:
+        summary = db.session.get(DailySummary, (user_id, date))
+        if summary is None:
+            summary = DailySummary(user_id=user_id, date_logged=date, **deltas)
+            db.session.add(summary)
+        else:
+            for name, value in deltas.items():
+                setattr(summary, name, getattr(summary, name) + value)
+        food_count, water_count = summary.food_entry_count or 0, summary.water_entry_count or 0
+    
+    # The user became active (or inactive) that day when their entry count crossed zero
+    entries_after = food_count + water_count
+    entries_before = entries_after - deltas.get('food_entry_count', 0) - deltas.get('water_entry_count', 0)
+    record_usage(
+        date,
+        food_entries=deltas.get('food_entry_count', 0),
+        ai_entries=deltas.get('ai_entry_count', 0),
+        water_logs=deltas.get('water_entry_count', 0),
+        active_users=(entries_after > 0) - (entries_before > 0)
+    )
+    
+    # Only food changes can move a day against the calorie goal
+    if 'food_entry_count' in deltas:
+        record_goal_status(user_id, date)
+
+def rebuild_daily_summaries(user_id=None, start_date=None, end_date=None):
+    """Recompute DailySummary rows from the raw entry tables; returns the number of rows written"""
+    def scoped(query, model):
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        if start_date is not None:
+            query = query.filter(model.date_logged >= start_date)
+        if end_date is not None:
+            query = query.filter(model.date_logged <= end_date)
+        return query
+    
+    food_totals = scoped(db.session.query(
+        FoodEntry.user_id,
+        FoodEntry.date_logged,
+        *[func.coalesce(func.sum(getattr(FoodEntry, name)), 0) for name in SUMMARY_NUTRIENTS],
+        func.count(FoodEntry.id),
+        func.sum(case((FoodEntry.ai_analyzed == True, 1), else_=0))
+    ), FoodEntry).group_by(FoodEntry.user_id, FoodEntry.date_logged)
+    
+    water_totals = scoped(db.session.query(
+        WaterIntake.user_id,
+        WaterIntake.date_logged,
+        func.coalesce(func.sum(WaterIntake.amount_ml), 0),
+        func.count(WaterIntake.id)
+    ), WaterIntake).group_by(WaterIntake.user_id, WaterIntake.date_logged)
+    
+    rows = {}
+    for user, date, *values, count, ai_count in food_totals:
+        row = rows.setdefault((user, date), {'user_id': user, 'date_logged': date, 'water_ml': 0, 'water_entry_count': 0})
+        row.update(zip(SUMMARY_NUTRIENTS, values))
+        row['food_entry_count'] = count
+        row['ai_entry_count'] = ai_count or 0
+    for user, date, amount, count in water_totals:
+        row = rows.setdefault((user, date), dict(
+            {name: 0 for name in SUMMARY_NUTRIENTS}, user_id=user, date_logged=date, food_entry_count=0, ai_entry_count=0
+        ))
+        row['water_ml'] = amount
+        row['water_entry_count'] = count
+    
+    try:
+        scoped(DailySummary.query, DailySummary).delete(synchronize_session=False)
+        if rows:
+            now = datetime.utcnow()
+            db.session.execute(
+                DailySummary.__table__.insert(),
+                [dict(row, updated_at=now) for row in rows.values()]
+            )
+        bump_data_version(user_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+    
+    # Rebuilt rows carry no goal status yet, and the app-wide rollups for those days may have moved
+    rebuild_goal_progress(user_id)
+    rebuild_usage_rollups(start_date, end_date)
+    return len(rows)
+
+def weekly_stats_from_totals(daily_totals, total_days):
+    """Average the days that have food entries from a get_daily_totals() result"""
+    logged = [day for day in daily_totals if day['food_entry_count'] > 0]
+    days_logged = len(logged)
+    
+    def average(name):
+        return round(sum(day[name] for day in logged) / days_logged, 1) if days_logged > 0 else 0
+    
+    return {
+        'avg_calories': average('calories'),
+        'avg_protein': average('protein'),
+        'avg_carbs': average('carbs'),
+        'avg_fat': average('fat'),
+        'days_logged': days_logged,
+        'total_days': total_days
+    }
 
 class NutritionDatabase:
     @staticmethod
+    @read_replica
+    def get_daily_summary(user_id, date=None):
+        """Get nutrition and water totals for a specific day from the summary table"""
+        if date is None:
+            date = datetime.utcnow().date()
+        
+        summary = db.session.get(DailySummary, (user_id, date))
+        if summary is None:
+            totals = {name: 0 for name in SUMMARY_NUTRIENTS}
+            totals.update(water_ml=0, food_entry_count=0, water_entry_count=0)
+            return totals
+        
+        totals = {name: getattr(summary, name) for name in SUMMARY_NUTRIENTS}
+        for name in ('protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium'):
+            # Incremental float updates can leave rounding noise behind
+            totals[name] = round(totals[name], 2)
+        totals.update(
+            water_ml=summary.water_ml,
+            food_entry_count=summary.food_entry_count,
+            water_entry_count=summary.water_entry_count
+        )
+        return totals
+    
+    @staticmethod
+    @read_replica
     def get_daily_nutrition(user_id, date=None):
         """Get nutrition summary for a specific day"""
         if date is None:
             date = datetime.utcnow().date()
-            
+        
+        totals = NutritionDatabase.get_daily_summary(user_id, date)
+        
         # Get all food entries for the specified day
-        entries = FoodEntry.query.filter(
+        totals['entries'] = FoodEntry.query.filter(
             FoodEntry.user_id == user_id,
             FoodEntry.date_logged == date
         ).all()
         
-        # Calculate totals
-        totals = {
-            'calories': sum(entry.calories for entry in entries),
-            'protein': sum(entry.protein for entry in entries),
-            'carbs': sum(entry.carbs for entry in entries),
-            'fat': sum(entry.fat for entry in entries),
-            'fiber': sum(entry.fiber for entry in entries),
-            'entries': entries
-        }
-        
         return totals
     
     @staticmethod
     def get_water_intake(user_id, date=None):
         """Get water intake for a specific day"""
-        if date is None:
-            date = datetime.utcnow().date()
-            
-        # Sum all water entries for the day
-        result = db.session.query(func.sum(WaterIntake.amount_ml)).filter(
-            WaterIntake.user_id == user_id,
-            WaterIntake.date_logged == date
-        ).scalar()
-        
-        return result or 0
+        return NutritionDatabase.get_daily_summary(user_id, date)['water_ml']
     
     @staticmethod
+    @read_replica
     def get_water_entries(user_id, date=None):
         """Get individual water intake entries for a specific day"""
         if date is None:
@@ -80,12 +301,65 @@ class NutritionDatabase:
             )
             
             db.session.add(entry)
+            update_daily_summary(user_id, entry.date_logged, _food_deltas(entry))
             db.session.commit()
             return entry
         except Exception as e:
             db.session.rollback()
             raise e
     
+    @staticmethod
+    def add_food_entries(user_id, items, atomic=False):
+        """Validate and insert many food entries in one transaction.
+        
+        Invalid items are reported and skipped (or, with atomic=True, nothing is
+        inserted). Returns (created, errors): created is a list of
+        {'index', 'id'} and errors a list of {'index', 'error'}.
+        """
+        rows, indexes, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                rows.append(dict(parse_food_item(item), user_id=user_id))
+                indexes.append(index)
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+        
+        if not rows or (atomic and errors):
+            return [], errors
+        
+        # Summary deltas per day, applied once per day rather than once per entry
+        deltas = {}
+        for row in rows:
+            day = deltas.setdefault(row['date_logged'], dict.fromkeys(SUMMARY_NUTRIENTS, 0))
+            for name in SUMMARY_NUTRIENTS:
+                day[name] += row[name]
+            day['food_entry_count'] = day.get('food_entry_count', 0) + 1
+            day['ai_entry_count'] = day.get('ai_entry_count', 0) + (1 if row['ai_analyzed'] else 0)
+        
+        now = datetime.utcnow()
+        for row in rows:
+            row['created_at'] = now
+        
+        try:
+            stmt = FoodEntry.__table__.insert()
+            if db.session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+                # Batched multi-row INSERT ... RETURNING where the driver can keep IDs in parameter
+                # order (SQLite runs it row by row in-process, which is still cheap)
+                result = db.session.execute(stmt.returning(FoodEntry.id, sort_by_parameter_order=True), rows)
+                ids = result.scalars().all()
+            else:
+                # Without ordered RETURNING a batch can't say which ID belongs to which item,
+                # so insert row by row (still one transaction) and read each primary key
+                ids = [db.session.execute(stmt, row).inserted_primary_key[0] for row in rows]
+            for date, day in deltas.items():
+                update_daily_summary(user_id, date, day)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        
+        return [{'index': index, 'id': entry_id} for index, entry_id in zip(indexes, ids)], errors
+    
     @staticmethod
     def add_water_intake(user_id, amount_ml, date=None):
         """Add a water intake entry"""
@@ -100,6 +374,7 @@ class NutritionDatabase:
             )
             
             db.session.add(water_entry)
+            update_daily_summary(user_id, date, _water_deltas(water_entry))
             db.session.commit()
             return water_entry
         except Exception as e:
@@ -107,21 +382,55 @@ class NutritionDatabase:
             raise e
     
     @staticmethod
-    def get_nutrition_tip(category=None):
-        """Get a random nutrition tip, optionally filtered by category"""
-        query = NutritionTip.query.filter(NutritionTip.is_active == True)
+    def delete_food_entry(entry):
+        """Delete a food entry and remove it from the daily summary"""
+        try:
+            update_daily_summary(entry.user_id, entry.date_logged, _food_deltas(entry, sign=-1))
+            db.session.delete(entry)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+    
+    @staticmethod
+    def delete_water_entry(entry):
+        """Delete a water intake entry and remove it from the daily summary"""
+        try:
+            update_daily_summary(entry.user_id, entry.date_logged, _water_deltas(entry, sign=-1))
+            db.session.delete(entry)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+    
+    @staticmethod
+    @read_replica
+    def get_nutrition_tip(category=None, user_id=None):
+        """Get a random nutrition tip, optionally filtered by category and without repeats per user"""
+        from utils.tip_index import get_tip_index
+        tip_index = get_tip_index()
         
-        if category:
-            query = query.filter(NutritionTip.category == category)
-            
-        # Get a random tip
-        tip = query.order_by(func.random()).first()
+        # Selection happens in memory; the tip itself is a primary-key lookup
+        for _ in range(2):
+            tip_id = tip_index.choose_id(category, user_id)
+            if tip_id is None:
+                return None
+            tip = db.session.get(NutritionTip, tip_id)
+            if tip is not None and tip.is_active:
+                return tip
+            # The tip was removed or deactivated since the index was built
+            tip_index.invalidate()
+        return None
+    
+    @staticmethod
+    @read_replica
+    def get_daily_totals(user_id, start_date, end_date):
+        """Get per-day totals for every date in a range (inclusive) in one query, zero-filling gaps.
         
-        # If no tip found in the specified category, get any tip
-        if not tip and category:
-            tip = NutritionTip.query.filter(NutritionTip.is_active == True).order_by(func.random()).first()
-            
-        return tip
+        Built on the statistics engine's DailySeries, so the dashboard, the weekly
+        API and the statistics page all read the same range the same way.
+        """
+        return DailySeries.load(user_id, start_date, end_date).daily_totals()
     
     @staticmethod
     def get_weekly_stats(user_id, days=7):
@@ -129,39 +438,10 @@ class NutritionDatabase:
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=days-1)  # -1 because we want to include today
         
-        # Get all food entries in the date range
-        entries = FoodEntry.query.filter(
-            FoodEntry.user_id == user_id,
-            FoodEntry.date_logged >= start_date,
-            FoodEntry.date_logged <= end_date
-        ).all()
-        
-        # Count days with entries
-        days_logged = db.session.query(func.count(func.distinct(FoodEntry.date_logged))).filter(
-            FoodEntry.user_id == user_id,
-            FoodEntry.date_logged >= start_date,
-            FoodEntry.date_logged <= end_date
-        ).scalar() or 0
-        
-        # Calculate averages
-        if entries:
-            avg_calories = sum(entry.calories for entry in entries) / days_logged if days_logged > 0 else 0
-            avg_protein = sum(entry.protein for entry in entries) / days_logged if days_logged > 0 else 0
-            avg_carbs = sum(entry.carbs for entry in entries) / days_logged if days_logged > 0 else 0
-            avg_fat = sum(entry.fat for entry in entries) / days_logged if days_logged > 0 else 0
-        else:
-            avg_calories = avg_protein = avg_carbs = avg_fat = 0
-        
-        return {
-            'avg_calories': round(avg_calories, 1),
-            'avg_protein': round(avg_protein, 1),
-            'avg_carbs': round(avg_carbs, 1),
-            'avg_fat': round(avg_fat, 1),
-            'days_logged': days_logged,
-            'total_days': days
-        }
+        return weekly_stats_from_totals(NutritionDatabase.get_daily_totals(user_id, start_date, end_date), days)
     
     @staticmethod
+    @read_replica
     def get_recent_entries(user_id, limit=5):
         """Get most recent food entries for a user"""
         entries = FoodEntry.query.filter(
@@ -1,61 +1,144 @@
 import os
 import base64
 import json
+import time
+import threading
 import requests
-from io import BytesIO
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import current_app
+from utils.analysis_store import get_analysis_store, remember_analysis
+from utils.image_processing import ProcessedImage, preprocess_upload, load_image, encode_jpeg
+from utils.instrumentation import get_metrics, record_openrouter_call
 
-class OpenRouterAI:
-    # Class variable to store analysis results
-    _analysis_cache = {}
+# Upstream statuses worth retrying and counting against the circuit breaker
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_client_lock = threading.Lock()
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling OpenRouter while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, then let a single probe through after a cool-down"""
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+    
+    def allow_request(self):
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Only one probe at a time: push the window forward until it reports back
+                self.opened_at = time.monotonic()
+                return True
+            return state == 'closed'
     
-    def __init__(self, api_key=None):
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+class OpenRouterAI:
+    def __init__(self, api_key=None, api_url=None, model=None, connect_timeout=5, read_timeout=60,
+                 max_retries=2, backoff_factor=0.5, pool_size=10, circuit_breaker=None, metrics=None):
         self.api_key = api_key or os.environ.get('OPENROUTER_API_KEY')
-        self.api_url = 'https://openrouter.ai/api/v1/chat/completions'
-        self.model = 'google/gemini-2.5-flash-preview-05-20'  # Using Gemini model as specified in memory
+        self.api_url = api_url or 'https://openrouter.ai/api/v1/chat/completions'
+        self.model = model or 'google/gemini-2.5-flash-preview-05-20'  # Using Gemini model as specified in memory
+        self.timeout = (connect_timeout, read_timeout)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = metrics
         
         if not self.api_key:
             raise ValueError("OpenRouter API key is required. Set it in the .env file or pass it to the constructor.")
+        
+        # Keep-alive connection pool with bounded exponential backoff on 429/5xx
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,  # a timed out read may have been billed upstream, don't replay it
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        })
+    
+    def _post(self, payload):
+        """POST a chat completion request through the pooled session and circuit breaker"""
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("OpenRouter is unavailable (circuit breaker open), please try again shortly")
+        
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            self.circuit_breaker.record_failure()
+            record_openrouter_call(self.metrics, time.perf_counter() - start, type(e).__name__.lower())
+            raise
+        # Includes urllib3's retries and backoff, which is what the caller waits for
+        record_openrouter_call(self.metrics, time.perf_counter() - start, str(response.status_code))
+        
+        if response.status_code in RETRY_STATUSES:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        
+        response.raise_for_status()
+        return response.json()
     
     def _encode_image(self, image_file):
         """Encode image to base64 for API request"""
         try:
+            # Already preprocessed upload
+            if isinstance(image_file, ProcessedImage):
+                return image_file.base64_payload
             # If image_file is a file path
             if isinstance(image_file, str):
-                with open(image_file, 'rb') as img_file:
-                    img = Image.open(BytesIO(img_file.read()))
-                    # Convert to RGB if needed (e.g., for PNG with transparency)
-                    if img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    buffer = BytesIO()
-                    img.save(buffer, format='JPEG')
-                    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+                return preprocess_upload(image_file).base64_payload
             # If image_file is already a file object
-            else:
-                img = Image.open(image_file)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                buffer = BytesIO()
-                img.save(buffer, format='JPEG')
-                return base64.b64encode(buffer.getvalue()).decode('utf-8')
+            img, _ = load_image(image_file.read(), current_app.config.get('IMAGE_MAX_DIMENSION', 1024))
+            payload = encode_jpeg(img, current_app.config.get('IMAGE_JPEG_QUALITY', 80))
+            return base64.b64encode(payload).decode('utf-8')
         except Exception as e:
             raise ValueError(f"Error encoding image: {str(e)}")
     
     def get_cached_analysis(self, analysis_id):
         """Retrieve a cached analysis result by ID"""
-        return self._analysis_cache.get(analysis_id)
+        return get_analysis_store().get(analysis_id)
     
     def analyze_food_image(self, image_file):
         """Analyze food image and return nutrition data"""
         try:
             base64_image = self._encode_image(image_file)
             
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             payload = {
                 'model': self.model,
                 'messages': [
@@ -82,10 +165,7 @@ class OpenRouterAI:
                 'response_format': {'type': 'json_object'}
             }
             
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self._post(payload)
             
             # Extract the JSON content from the response
             content = result.get('choices', [{}])[0].get('message', {}).get('content', '{}')
@@ -114,20 +194,17 @@ class OpenRouterAI:
                 nutrition_data.setdefault('unit', 'serving')
                 nutrition_data.setdefault('food_category', 'other')
                 
-                # Generate a unique analysis ID and cache the result
-                import uuid
-                analysis_id = str(uuid.uuid4())
-                nutrition_data['analysis_id'] = analysis_id
-                
                 # Add image URL if provided
+                if isinstance(image_file, ProcessedImage):
+                    image_file = image_file.source_path
                 if isinstance(image_file, str) and os.path.exists(image_file):
                     # Extract the filename from the path
                     filename = os.path.basename(image_file)
                     # Construct the URL to the uploaded image
                     nutrition_data['image_url'] = f"/static/uploads/{filename}"
                 
-                # Cache the result
-                self._analysis_cache[analysis_id] = nutrition_data
+                # Generate a unique analysis ID and cache the result so any worker can resolve it on confirm
+                remember_analysis(nutrition_data)
                 
                 return nutrition_data
             except json.JSONDecodeError as json_e:
@@ -173,11 +250,6 @@ class OpenRouterAI:
     def generate_personalized_tip(self, user_data, goals):
         """Generate a personalized nutrition tip based on user data and goals"""
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             # Prepare user data for the prompt
             user_info = f"User's daily goals: {goals['calories']} calories, {goals['protein']}g protein, "
             user_info += f"{goals['carbs']}g carbs, {goals['fat']}g fat."
@@ -201,10 +273,7 @@ class OpenRouterAI:
                 ]
             }
             
-            response = requests.post(self.api_url, headers=headers, json=payload)
-            response.raise_for_status()
-            
-            result = response.json()
+            result = self._post(payload)
             tip_text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
             
             return {
@@ -218,3 +287,32 @@ class OpenRouterAI:
                 'tip_text': "Try to include a variety of colorful fruits and vegetables in your diet. Each color provides different phytonutrients and antioxidants that support your immune system and overall health.",
                 'category': 'general'  # Fallback to general tip
             }
+
+
+def get_openrouter_client(app=None):
+    """Return the process-wide OpenRouter client, sharing its connection pool across requests"""
+    app = app or current_app._get_current_object()
+    client = app.extensions.get('openrouter_client')
+    if client is not None:
+        return client
+    # Batch analysis threads can get here together; they must share one pool and one circuit breaker
+    with _client_lock:
+        client = app.extensions.get('openrouter_client')
+        if client is None:
+            client = OpenRouterAI(
+                app.config.get('OPENROUTER_API_KEY'),
+                api_url=app.config.get('OPENROUTER_API_URL'),
+                model=app.config.get('OPENROUTER_MODEL'),
+                connect_timeout=app.config.get('OPENROUTER_CONNECT_TIMEOUT', 5),
+                read_timeout=app.config.get('OPENROUTER_READ_TIMEOUT', 60),
+                max_retries=app.config.get('OPENROUTER_MAX_RETRIES', 2),
+                backoff_factor=app.config.get('OPENROUTER_BACKOFF_FACTOR', 0.5),
+                pool_size=app.config.get('OPENROUTER_POOL_SIZE', 10),
+                circuit_breaker=CircuitBreaker(
+                    failure_threshold=app.config.get('OPENROUTER_CIRCUIT_FAILURES', 5),
+                    reset_timeout=app.config.get('OPENROUTER_CIRCUIT_RESET', 30)
+                ),
+                metrics=get_metrics(app)
+            )
+            app.extensions['openrouter_client'] = client
+    return client
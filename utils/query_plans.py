@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, desc, text
+from models import db, FoodEntry, WaterIntake
+
+
+def hot_queries(user_id=1, date=None):
+    """The per-user queries on the request path, keyed by a short name"""
+    date = date or datetime.utcnow().date()
+    week_start = date - timedelta(days=6)
+
+    return {
+        'daily_food_entries': FoodEntry.query.filter(
+            FoodEntry.user_id == user_id,
+            FoodEntry.date_logged == date
+        ),
+        'daily_water_entries': WaterIntake.query.filter(
+            WaterIntake.user_id == user_id,
+            WaterIntake.date_logged == date
+        ).order_by(desc(WaterIntake.time_logged)),
+        'recent_food_entries': FoodEntry.query.filter(
+            FoodEntry.user_id == user_id
+        ).order_by(desc(FoodEntry.created_at)).limit(5),
+        'food_range_totals': db.session.query(
+            FoodEntry.date_logged,
+            func.sum(FoodEntry.calories)
+        ).filter(
+            FoodEntry.user_id == user_id,
+            FoodEntry.date_logged >= week_start,
+            FoodEntry.date_logged <= date
+        ).group_by(FoodEntry.date_logged),
+        'food_range_categories': db.session.query(
+            FoodEntry.food_category,
+            func.sum(FoodEntry.calories)
+        ).filter(
+            FoodEntry.user_id == user_id,
+            FoodEntry.date_logged >= week_start,
+            FoodEntry.date_logged <= date
+        ).group_by(FoodEntry.food_category),
+    }
+
+
+def explain(query):
+    """Return the database's query plan for a SQLAlchemy query as a list of lines"""
+    dialect = db.session.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(text(prefix + sql)).fetchall()
+    # SQLite returns (id, parent, notused, detail); other databases a single text column
+    return [row[-1] for row in rows]
+
+
+def uses_index(plan_lines):
+    """True when no entry table is read with a full scan or sorted in a temp b-tree.
+
+    Only SQLite plans are judged; other planners legitimately prefer sequential
+    scans on small tables, so their plans are reported without a verdict.
+    """
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return None
+    for line in plan_lines:
+        if line.startswith('SCAN ') and 'USING' not in line:
+            return False
+        if 'USE TEMP B-TREE' in line:  # ORDER BY, GROUP BY or DISTINCT the index doesn't provide
+            return False
+    return True
+
+
+def check_hot_queries(user_id=1, date=None):
+    """Explain every hot query; returns a list of (name, plan_lines, uses_index)"""
+    results = []
+    for name, query in hot_queries(user_id, date).items():
+        plan = explain(query)
+        results.append((name, plan, uses_index(plan)))
+    return results
@@ -0,0 +1,68 @@
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, request, make_response
+from flask_login import current_user
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def response_key(user, endpoint, args):
+    """Everything a statistics response depends on.
+
+    data_version changes on every food/water write, the goals feed the goal
+    charts, and ranges are relative to today, so each is part of the key.
+    """
+    return (
+        user.id,
+        endpoint,
+        tuple(sorted(args.items(multi=True))),
+        user.data_version,
+        (user.calorie_goal, user.protein_goal, user.carbs_goal, user.fat_goal, user.water_goal),
+        datetime.utcnow().date().isoformat()
+    )
+
+
+def etag_for(key):
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def cached_response(view):
+    """Cache a JSON view per user and data version, answering matching If-None-Match with 304.
+
+    A 304 is decided from the already loaded current_user alone, so unchanged
+    charts cost no queries beyond authentication.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = response_key(current_user, request.endpoint, request.args)
+        etag = etag_for(key)
+
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            with _cache_lock:
+                body = _cache.get(key)
+                if body is not None:
+                    _cache.move_to_end(key)
+
+            if body is not None:
+                response = current_app.response_class(body, mimetype='application/json')
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                max_size = current_app.config.get('STATS_CACHE_SIZE', 2048)
+                with _cache_lock:
+                    _cache[key] = response.get_data()
+                    while len(_cache) > max_size:
+                        _cache.popitem(last=False)
+
+        response.set_etag(etag)
+        # Browsers may keep the response but must revalidate it on every use
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
@@ -0,0 +1,346 @@
+from array import array
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select, case, and_
+from models import db, FoodEntry, DailySummary
+from utils.goal_progress import goal_progress_summary
+
+# Per-day series held by DailySeries, each a compact array (typecode per series). Integer
+# columns stay integers so the JSON series match what the charts always received
+SERIES = {
+    'calories': 'q', 'protein': 'd', 'carbs': 'd', 'fat': 'd', 'fiber': 'd', 'sugar': 'd', 'sodium': 'd',
+    'water_ml': 'q', 'food_entry_count': 'q', 'water_entry_count': 'q'
+}
+MACROS = ('protein', 'carbs', 'fat')
+AVERAGED = ('calories', 'protein', 'carbs', 'fat', 'fiber')
+TOTALED = AVERAGED + ('water_ml',)
+
+# Calendar periods compare_periods() understands, and the most it will compare at once
+PERIODS = ('week', 'month', 'quarter')
+MAX_PERIODS = 24
+PERIOD_NUTRIENTS = ('calories', 'protein', 'carbs', 'fat')
+
+# Goal histogram bins as fractions of the goal: [0, 0.5), [0.5, 0.9), [0.9, 1.1], (1.1, 1.5], > 1.5
+GOAL_BINS = ('<50%', '50-90%', '90-110%', '110-150%', '>150%')
+
+
+def parse_days(value, default=7):
+    """Parse a ?days= argument, clamped to 1..STATS_MAX_DAYS; raises ValueError if it isn't a number"""
+    max_days = current_app.config.get('STATS_MAX_DAYS', 1825)
+    if value is None or value == '':
+        return min(default, max_days)
+    return max(1, min(int(value), max_days))
+
+
+def percent_change(current, previous):
+    if previous and previous > 0:
+        return round(((current - previous) / previous) * 100, 1)
+    return 0
+
+
+class DailySeries:
+    """One user's daily totals for a date range, zero-filled and stored column-wise in arrays.
+
+    Built from a single DailySummary range query; every derived metric is a
+    pass over these arrays rather than another trip to the database.
+    """
+
+    def __init__(self, start_date, days):
+        self.start_date = start_date
+        self.days = days
+        self.columns = {name: array(code, bytes(array(code).itemsize * days)) for name, code in SERIES.items()}
+        self.goal_status = [None] * days  # stored calorie goal classification per day
+
+    @classmethod
+    def load(cls, user_id, start_date, end_date):
+        series = cls(start_date, (end_date - start_date).days + 1)
+        # Table columns rather than ORM attributes, so rows skip the ORM loading path entirely;
+        # it dominated at year-long ranges
+        table = DailySummary.__table__.c
+        rows = db.session.execute(select(
+            table.date_logged,
+            table.goal_status,
+            *[table[name] for name in SERIES]
+        ).where(
+            table.user_id == user_id,
+            table.date_logged >= start_date,
+            table.date_logged <= end_date
+        )).all()
+        if not rows:
+            return series
+        # Fill column by column: one tight loop per array instead of one per row and column
+        days, goal_statuses, *values = zip(*rows)
+        first = start_date.toordinal()
+        offsets = [day.toordinal() - first for day in days]
+        for offset, goal_status in zip(offsets, goal_statuses):
+            series.goal_status[offset] = goal_status
+        for name, column_values in zip(SERIES, values):
+            column = series.columns[name]
+            for offset, value in zip(offsets, column_values):
+                column[offset] = value or 0
+        return series
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def labels(self):
+        first = self.start_date.toordinal()
+        return [date.fromordinal(first + offset).isoformat() for offset in range(self.days)]
+
+    def daily_totals(self):
+        """One dict per day with every series plus its 'date', as NutritionDatabase.get_daily_totals returns"""
+        first = self.start_date.toordinal()
+        names = list(self.columns)
+        return [
+            dict(zip(names, values), date=date.fromordinal(first + offset))
+            for offset, values in enumerate(zip(*self.columns.values()))
+        ]
+
+    def window(self, start, stop):
+        """Days [start, stop) copied into a new series"""
+        part = DailySeries(self.start_date + timedelta(days=start), stop - start)
+        part.columns = {name: column[start:stop] for name, column in self.columns.items()}
+        part.goal_status = self.goal_status[start:stop]
+        return part
+
+    def logged_mask(self):
+        return [count > 0 for count in self.columns['food_entry_count']]
+
+    def days_logged(self):
+        return sum(1 for count in self.columns['food_entry_count'] if count > 0)
+
+    def totals(self):
+        return {name: round(sum(self.columns[name]), 1) for name in TOTALED}
+
+    def averages(self):
+        """Mean per logged day (days with at least one food entry); water uses days with any water"""
+        logged = self.days_logged()
+        result = {}
+        for name in AVERAGED:
+            result[name] = round(sum(self.columns[name]) / logged, 1) if logged else 0
+        water = self.columns['water_ml']
+        water_days = sum(1 for value in water if value > 0)
+        result['water_ml'] = round(sum(water) / water_days, 1) if water_days else 0
+        return result
+
+    def rolling_average(self, name, window=7):
+        """Trailing mean over the logged days in each `window`-day span; None where nothing was logged"""
+        values = self.columns[name]
+        counts = self.columns['food_entry_count']
+        result = []
+        total = logged = 0
+        for offset in range(self.days):
+            if counts[offset] > 0:
+                total += values[offset]
+                logged += 1
+            if offset >= window and counts[offset - window] > 0:
+                total -= values[offset - window]
+                logged -= 1
+            result.append(round(total / logged, 1) if logged else None)
+        return result
+
+    def macro_distribution(self):
+        totals = {name: sum(self.columns[name]) for name in MACROS}
+        grams = sum(totals.values())
+        return {name: round(value / grams * 100, 1) if grams > 0 else 0 for name, value in totals.items()}
+
+    def goal_achievement(self):
+        """Count days within, under and over the calorie goal, plus days without food entries.
+
+        Reads the classification stored on each DailySummary row (see
+        utils.goal_progress.goal_status_expression), which is kept current on
+        every food write and goal change.
+        """
+        counts = {'within': 0, 'under': 0, 'over': 0}
+        for status in self.goal_status:
+            if status in counts:
+                counts[status] += 1
+        counts['no_data'] = self.days - sum(counts.values())
+        return counts
+
+    def goal_histogram(self, name, goal):
+        """Logged days bucketed by their value as a share of the goal (see GOAL_BINS)"""
+        counts = [0] * len(GOAL_BINS)
+        if goal and goal > 0:
+            mask = self.logged_mask() if name != 'water_ml' else [value > 0 for value in self.columns[name]]
+            for value, logged in zip(self.columns[name], mask):
+                if not logged:
+                    continue
+                ratio = value / goal
+                if ratio < 0.5:
+                    counts[0] += 1
+                elif ratio < 0.9:
+                    counts[1] += 1
+                elif ratio <= 1.1:
+                    counts[2] += 1
+                elif ratio <= 1.5:
+                    counts[3] += 1
+                else:
+                    counts[4] += 1
+        return {'bins': list(GOAL_BINS), 'counts': counts}
+
+
+def category_breakdown(user_id, start_date, end_date):
+    """Calories and entry counts per food category, largest first"""
+    rows = db.session.query(
+        FoodEntry.food_category,
+        func.coalesce(func.sum(FoodEntry.calories), 0),
+        func.count(FoodEntry.id)
+    ).filter(
+        FoodEntry.user_id == user_id,
+        FoodEntry.date_logged >= start_date,
+        FoodEntry.date_logged <= end_date
+    ).group_by(FoodEntry.food_category).all()
+    return sorted(
+        ({'category': category, 'calories': int(calories), 'entries': entries} for category, calories, entries in rows),
+        key=lambda row: row['calories'],
+        reverse=True
+    )
+
+
+def period_averages(user_id, start_date, end_date):
+    """(averages, days_logged) for a date range as DailySeries.averages() computes them, in one aggregate query"""
+    logged = DailySummary.food_entry_count > 0
+    row = db.session.execute(select(
+        *[func.coalesce(func.sum(getattr(DailySummary, name)), 0) for name in AVERAGED],
+        func.coalesce(func.sum(DailySummary.water_ml), 0),
+        func.count(case((logged, 1))),
+        func.count(case((DailySummary.water_ml > 0, 1)))
+    ).where(
+        DailySummary.user_id == user_id,
+        DailySummary.date_logged >= start_date,
+        DailySummary.date_logged <= end_date
+    )).one()
+    *sums, water, days_logged, water_days = row
+    averages = {name: round(total / days_logged, 1) if days_logged else 0 for name, total in zip(AVERAGED, sums)}
+    averages['water_ml'] = round(water / water_days, 1) if water_days else 0
+    return averages, days_logged
+
+
+def compute_overview(user, days, end_date=None, rolling_window=7):
+    """Every statistics-page metric for the last `days` days.
+
+    The daily series (plus a few days of lookback for the rolling average) is
+    one range query; the previous period only contributes its averages, so
+    it is aggregated in SQL rather than loaded day by day.
+    """
+    end_date = end_date or datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days - 1)
+    previous_start = start_date - timedelta(days=days)
+
+    # Rolling averages look back into the previous period so the first days aren't blank
+    lookback = min(rolling_window - 1, days)
+    rolling_source = DailySeries.load(user.id, start_date - timedelta(days=lookback), end_date)
+    current = rolling_source.window(lookback, lookback + days)
+
+    averages = current.averages()
+    previous_averages, previous_days_logged = period_averages(user.id, previous_start, start_date - timedelta(days=1))
+    goals = {
+        'calories': user.calorie_goal,
+        'protein': user.protein_goal,
+        'carbs': user.carbs_goal,
+        'fat': user.fat_goal,
+        'water_ml': user.water_goal
+    }
+
+    return {
+        'range': {
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_date.strftime('%Y-%m-%d'),
+            'days': days
+        },
+        'series': {
+            'labels': current.labels,
+            'calories': current['calories'].tolist(),
+            **{name: [round(value, 2) for value in current[name]] for name in MACROS},
+            'water_ml': current['water_ml'].tolist(),
+            'calories_rolling_avg': rolling_source.rolling_average('calories', rolling_window)[lookback:]
+        },
+        'days_logged': current.days_logged(),
+        'totals': current.totals(),
+        'averages': averages,
+        'previous_period': {
+            'start': previous_start.strftime('%Y-%m-%d'),
+            'days_logged': previous_days_logged,
+            'averages': previous_averages
+        },
+        'percent_change': {name: percent_change(averages[name], previous_averages[name]) for name in averages},
+        'macro_distribution': current.macro_distribution(),
+        'goal_achievement': current.goal_achievement(),
+        'goal_histograms': {name: current.goal_histogram(name, goal) for name, goal in goals.items()},
+        'categories': category_breakdown(user.id, start_date, end_date),
+        'goal_progress': goal_progress_summary(user, end_date)
+    }
+
+
+def _shift_months(day, months):
+    """First day of the month `months` months after (or before) day's month"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def period_bounds(period, today, count):
+    """(start, end) of the calendar period containing today and the count-1 before it, newest first"""
+    if period not in PERIODS:
+        raise ValueError(f'period must be one of: {", ".join(PERIODS)}')
+    bounds = []
+    if period == 'week':
+        start = today - timedelta(days=today.weekday())  # Monday
+        for index in range(count):
+            week_start = start - timedelta(days=7 * index)
+            bounds.append((week_start, week_start + timedelta(days=6)))
+    else:
+        months = 1 if period == 'month' else 3
+        start = date(today.year, today.month - (today.month - 1) % months, 1)
+        for index in range(count):
+            period_start = _shift_months(start, -months * index)
+            bounds.append((period_start, _shift_months(period_start, months) - timedelta(days=1)))
+    return bounds
+
+
+def compare_periods(user_id, period='week', count=2, today=None):
+    """Per-day averages for the last `count` calendar periods from one conditional-aggregation query.
+
+    Averages are over days with at least one food entry, taken from the
+    per-day totals in DailySummary, so a day with five snacks counts once.
+    Each period also reports its percent change against the one before it.
+    """
+    today = today or datetime.utcnow().date()
+    bounds = period_bounds(period, today, count)
+
+    columns = []
+    for start, end in bounds:
+        logged_in_period = and_(
+            DailySummary.date_logged >= start,
+            DailySummary.date_logged <= end,
+            DailySummary.food_entry_count > 0
+        )
+        # AVG ignores the NULLs CASE produces for days outside the period
+        columns.extend(
+            func.avg(case((logged_in_period, getattr(DailySummary, name)))) for name in PERIOD_NUTRIENTS
+        )
+        columns.append(func.count(case((logged_in_period, 1))))
+
+    row = db.session.execute(select(*columns).where(
+        DailySummary.user_id == user_id,
+        DailySummary.date_logged >= bounds[-1][0],
+        DailySummary.date_logged <= bounds[0][1]
+    )).one()
+
+    width = len(PERIOD_NUTRIENTS) + 1
+    periods = []
+    for index, (start, end) in enumerate(bounds):
+        *averages, days_logged = row[index * width:(index + 1) * width]
+        periods.append({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'days_logged': days_logged,
+            **{f'avg_{name}': round(float(value or 0), 1) for name, value in zip(PERIOD_NUTRIENTS, averages)}
+        })
+
+    for current, previous in zip(periods, periods[1:]):
+        current['percent_change'] = {
+            name: percent_change(current[f'avg_{name}'], previous[f'avg_{name}']) for name in PERIOD_NUTRIENTS
+        }
+    return periods
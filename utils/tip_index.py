@@ -0,0 +1,89 @@
+import time
+import random
+import threading
+from collections import OrderedDict
+from flask import current_app
+from models import db, NutritionTip
+
+_index_lock = threading.Lock()
+
+
+class TipIndex:
+    """In-process index of active tip IDs per category for constant-time random selection.
+
+    The index is rebuilt from one (id, category) query every `ttl` seconds or
+    after invalidate(). With no_repeat, each user draws from a shuffled deck per
+    category and only sees a tip again once every tip in it has been shown.
+    """
+
+    def __init__(self, ttl=300, no_repeat=True, max_users=10000):
+        self.ttl = ttl
+        self.no_repeat = no_repeat
+        self.max_users = max_users
+        self.version = 0
+        self._by_category = {}
+        self._all = []
+        self._loaded_at = None
+        self._decks = OrderedDict()  # (user_id, category) -> (version, remaining tip IDs)
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Rebuild the index on next use; call after adding, editing or deactivating tips"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _refresh_if_stale(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        rows = db.session.query(NutritionTip.id, NutritionTip.category).filter(
+            NutritionTip.is_active == True
+        ).all()
+        by_category = {}
+        for tip_id, category in rows:
+            by_category.setdefault(category, []).append(tip_id)
+        self._by_category = by_category
+        self._all = [tip_id for tip_id, _ in rows]
+        self._loaded_at = time.monotonic()
+        self.version += 1
+        self._decks.clear()
+
+    def choose_id(self, category=None, user_id=None):
+        """Pick a random active tip ID, falling back to any category when the requested one is empty"""
+        with self._lock:
+            self._refresh_if_stale()
+            if category and self._by_category.get(category):
+                pool_key, pool = category, self._by_category[category]
+            else:
+                pool_key, pool = None, self._all
+            if not pool:
+                return None
+            if not self.no_repeat or user_id is None:
+                return random.choice(pool)
+            return self._draw(user_id, pool_key, pool)
+
+    def _draw(self, user_id, pool_key, pool):
+        key = (user_id, pool_key)
+        version, remaining = self._decks.get(key, (None, None))
+        if version != self.version or not remaining:
+            remaining = list(pool)
+            random.shuffle(remaining)
+        tip_id = remaining.pop()
+        self._decks[key] = (self.version, remaining)
+        self._decks.move_to_end(key)
+        while len(self._decks) > self.max_users:
+            self._decks.popitem(last=False)
+        return tip_id
+
+
+def get_tip_index(app=None):
+    """Return the tip index for the current application, creating it on first use"""
+    app = app or current_app._get_current_object()
+    with _index_lock:
+        index = app.extensions.get('tip_index')
+        if index is None:
+            index = TipIndex(
+                ttl=app.config.get('TIP_INDEX_TTL', 300),
+                no_repeat=app.config.get('TIP_NO_REPEAT', True)
+            )
+            app.extensions['tip_index'] = index
+    return index
@@ -0,0 +1,121 @@
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, func, case
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, User, DailySummary, UsageRollup
+
+# Per-day global counters kept in UsageRollup
+USAGE_COUNTERS = ('food_entries', 'ai_entries', 'water_logs', 'active_users', 'signups')
+
+
+def record_usage(date, **deltas):
+    """Add deltas to the global UsageRollup row for a day within the current transaction.
+
+    Every food/water write touches today's row, so concurrent writers queue
+    on it until they commit; those transactions are short, so the wait is
+    brief.
+    """
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(UsageRollup).values(date=date, updated_at=now, **deltas)
+        columns = UsageRollup.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['date'],
+            set_=dict({name: columns[name] + stmt.excluded[name] for name in deltas}, updated_at=now)
+        )
+        db.session.execute(stmt)
+    else:
+        rollup = db.session.get(UsageRollup, date)
+        if rollup is None:
+            db.session.add(UsageRollup(date=date, **deltas))
+        else:
+            for name, value in deltas.items():
+                setattr(rollup, name, getattr(rollup, name) + value)
+
+
+def remove_user_usage(user):
+    """Take a user's entries and signup out of the rollups before the user is deleted"""
+    for day, food, ai, water in db.session.execute(select(
+        DailySummary.date_logged, DailySummary.food_entry_count,
+        DailySummary.ai_entry_count, DailySummary.water_entry_count
+    ).where(DailySummary.user_id == user.id)):
+        record_usage(day, food_entries=-food, ai_entries=-ai, water_logs=-water,
+                     active_users=-1 if food + water > 0 else 0)
+    if user.created_at is not None:
+        record_usage(user.created_at.date(), signups=-1)
+
+
+def _as_date(value):
+    # func.date() returns strings on SQLite and dates on PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild_usage_rollups(start_date=None, end_date=None):
+    """Recompute UsageRollup rows from the daily summaries and user signups; commits and returns the rows written"""
+    def scoped(query, column):
+        if start_date is not None:
+            query = query.where(column >= start_date)
+        if end_date is not None:
+            query = query.where(column <= end_date)
+        return query
+
+    summaries = scoped(select(
+        DailySummary.date_logged,
+        func.sum(DailySummary.food_entry_count),
+        func.sum(DailySummary.ai_entry_count),
+        func.sum(DailySummary.water_entry_count),
+        func.sum(case((DailySummary.food_entry_count + DailySummary.water_entry_count > 0, 1), else_=0))
+    ), DailySummary.date_logged).group_by(DailySummary.date_logged)
+
+    signup_day = func.date(User.created_at)
+    signups = select(signup_day, func.count(User.id)).where(User.created_at.isnot(None))
+    if start_date is not None:
+        signups = signups.where(User.created_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        signups = signups.where(User.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    signups = signups.group_by(signup_day)
+
+    rows = {}
+    for day, food, ai, water, active in db.session.execute(summaries):
+        rows[day] = {'date': day, 'food_entries': food or 0, 'ai_entries': ai or 0,
+                     'water_logs': water or 0, 'active_users': active or 0, 'signups': 0}
+    for day, count in db.session.execute(signups):
+        day = _as_date(day)
+        rows.setdefault(day, dict(dict.fromkeys(USAGE_COUNTERS, 0), date=day))['signups'] = count
+
+    try:
+        db.session.execute(scoped(UsageRollup.__table__.delete(), UsageRollup.date))
+        if rows:
+            now = datetime.utcnow()
+            db.session.execute(UsageRollup.__table__.insert(), [dict(row, updated_at=now) for row in rows.values()])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+    return len(rows)
+
+
+def usage_series(start_date, end_date):
+    """Chart-ready daily counters for a date range from one rollup query, with missing days as zero"""
+    rows = db.session.execute(select(
+        UsageRollup.date, *[getattr(UsageRollup, name) for name in USAGE_COUNTERS]
+    ).where(UsageRollup.date >= start_date, UsageRollup.date <= end_date)).all()
+    by_date = {row[0]: row[1:] for row in rows}
+
+    days = (end_date - start_date).days + 1
+    labels = [(start_date + timedelta(days=i)).isoformat() for i in range(days)]
+    series = {name: [] for name in USAGE_COUNTERS}
+    for i in range(days):
+        values = by_date.get(start_date + timedelta(days=i), (0,) * len(USAGE_COUNTERS))
+        for name, value in zip(USAGE_COUNTERS, values):
+            series[name].append(value)
+
+    totals = {name: sum(values) for name, values in series.items()}
+    # Active users are distinct per day, so their sum is user-days rather than users
+    totals['active_user_days'] = totals.pop('active_users')
+    return {'labels': labels, 'series': series, 'totals': totals}
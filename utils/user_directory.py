@@ -0,0 +1,119 @@
+import json
+import time
+import base64
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, func, case, and_, or_, tuple_
+from models import db, User
+
+# Sort keys accepted by the admin user listing; each is backed by a (column, id) index
+SORT_COLUMNS = {
+    'created_at': User.created_at,
+    'last_login': User.last_login,
+}
+# Upper bound appended to a search term to turn a prefix match into an index range scan
+_PREFIX_END = '\U0010ffff'
+
+
+def encode_cursor(value, user_id):
+    """Opaque page token holding the last row's sort value and ID"""
+    raw = json.dumps([value.isoformat() if value is not None else None, user_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """(sort value, user ID) from encode_cursor(); ValueError for anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, user_id = json.loads(raw)
+        return (datetime.fromisoformat(value) if value is not None else None), int(user_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid page cursor') from e
+
+
+def _page(query, column, descending, cursor, limit):
+    """Up to `limit` rows after the cursor in (column, id) order, with NULL sort values last.
+
+    Non-NULL and NULL rows are read as two separate seeks so each one walks
+    the (column, id) index in order instead of sorting the whole table.
+    """
+    beyond = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+    direction = (lambda c: c.desc()) if descending else (lambda c: c.asc())
+    value, user_id = cursor if cursor is not None else (None, None)
+
+    rows = []
+    if cursor is None or value is not None:
+        filled = query.where(column.isnot(None))
+        if cursor is not None:
+            filled = filled.where(beyond(tuple_(column, User.id), tuple_(value, user_id)))
+        rows = db.session.execute(
+            filled.order_by(direction(column), direction(User.id)).limit(limit)
+        ).scalars().all()
+        user_id = None
+
+    if len(rows) < limit:
+        empty = query.where(column.is_(None))
+        if user_id is not None:
+            empty = empty.where(beyond(User.id, user_id))
+        rows += db.session.execute(
+            empty.order_by(direction(User.id)).limit(limit - len(rows))
+        ).scalars().all()
+    return rows
+
+
+def search_clause(search):
+    """Case-insensitive prefix match on username or email, served by the lower() expression indexes"""
+    term = search.lower()
+    username, email = func.lower(User.username), func.lower(User.email)
+    return or_(
+        and_(username >= term, username < term + _PREFIX_END),
+        and_(email >= term, email < term + _PREFIX_END)
+    )
+
+
+def list_users(search=None, sort='created_at', descending=True, cursor=None, per_page=30):
+    """One page of users in (sort, id) order and the cursor for the next page, or None on the last page.
+
+    Search is a case-insensitive prefix match on username or email, served
+    as range scans on their lower() indexes; pages seek past the cursor
+    instead of using OFFSET, so every page costs the same however deep it is.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f'Unknown sort: {sort}')
+    column = SORT_COLUMNS[sort]
+    query = select(User)
+
+    if search:
+        query = query.where(search_clause(search))
+
+    # One extra row tells whether there is a next page
+    users = _page(query, column, descending, cursor, per_page + 1)
+
+    next_cursor = None
+    if len(users) > per_page:
+        users = users[:per_page]
+        next_cursor = encode_cursor(getattr(users[-1], sort), users[-1].id)
+    return users, next_cursor
+
+
+def user_counts():
+    """Total, admin, active and suspended users from one aggregate query, cached for ADMIN_COUNTS_TTL seconds"""
+    ttl = current_app.config.get('ADMIN_COUNTS_TTL', 30)
+    cached = current_app.extensions.get('user_counts')
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    total, admins, active, suspended = db.session.execute(select(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.is_admin == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.is_active == False, 1), else_=0)), 0)
+    )).one()
+    counts = {'total': total, 'admins': admins, 'active': active, 'suspended': suspended}
+    current_app.extensions['user_counts'] = (time.monotonic(), counts)
+    return counts
+
+
+def invalidate_user_counts():
+    """Drop the cached counts; call after creating, deleting or (de)activating users"""
+    current_app.extensions.pop('user_counts', None)